@@ -1,3 +1,7 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,14 +11,46 @@ from controllers.auth_controller import router as auth_router
 # from controller.admin_services_controller import router as admin_services_router  # 暂时禁用：缺少 token 验证
 from controllers.docs_controller import router as docs_router
 from controllers.echo_controller import router as echo_router
+from controllers.metrics_controller import router as metrics_router
 from controllers.students_controller import router as students_router
+from core.password_hashing import get_password_hashing_engine
+from services.access_denylist_service import get_access_denylist_service
+from services.refresh_token_purge_service import get_refresh_token_purge_service
 from utils import register_exception_handlers
 from utils.config import settings
+from utils.db import AsyncSessionLocal
 from utils.logging import get_logger, init_logging
 from utils.openapi import create_custom_openapi
 
 API_PREFIX = "/api"
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # 预先拉起密码哈希执行器，退出时回收子进程
+    engine = get_password_hashing_engine()
+    await engine.warm_up()
+    # access token 注销名单的后台增量同步（不在请求路径上执行）
+    tasks: list[asyncio.Task[None]] = [asyncio.create_task(get_access_denylist_service().run_periodic())]
+    # 过期刷新令牌的周期清理（间隔为 0 时由外部定时运行 CLI）
+    if settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        tasks.append(
+            asyncio.create_task(
+                get_refresh_token_purge_service().run_periodic(
+                    AsyncSessionLocal, settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS
+                )
+            )
+        )
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        engine.shutdown()
+
+
 app = FastAPI(
     title="FastAPI Demo",
     description="A simple FastAPI application",
@@ -23,6 +59,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    lifespan=lifespan,
 )
 
 init_logging(settings.LOG_LEVEL)
@@ -50,6 +87,7 @@ app.include_router(echo_router, prefix=API_PREFIX)
 app.include_router(students_router, prefix=API_PREFIX)
 app.include_router(auth_router, prefix=API_PREFIX)
 app.include_router(docs_router, prefix=API_PREFIX)
+app.include_router(metrics_router, prefix=API_PREFIX)
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=False)
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 from typing import Any
+from uuid import UUID
 
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Query, Request, Response
 
-from core.auth_dependency import CurrentUser
+from core.auth_dependency import CurrentUser, ServiceAuth
+from core.jwt_keys import get_key_ring
+from core.permissions import permission_names
 from schemas.auth import (
     BasicResponse,
     ChangePasswordRequest,
+    IntrospectRequest,
     LoginRequest,
     LoginResponse,
     RegisterVerifyAndCreateRequest,
@@ -19,8 +23,10 @@ from schemas.auth import (
 )
 from services.auth_service import AuthService
 from services.email_verification_service import EmailVerificationService
+from services.introspection_service import IntrospectionService
 from services.password_service import PasswordService
 from services.registration_service import RegistrationService
+from services.session_service import SessionService
 from utils.config import settings
 from utils.db import AsyncDbSession
 from utils.request import get_client_ip
@@ -131,9 +137,13 @@ async def refresh(request: Request, response: Response, db: AsyncDbSession = Non
 async def logout(request: Request, response: Response, db: AsyncDbSession = None):
     service = AuthService()
     cookie_token = request.cookies.get("refresh_token")
+    # 可选：携带 Authorization 时一并注销当前 access token
+    authorization = request.headers.get("authorization") or ""
+    scheme, _, access_token = authorization.partition(" ")
     result = await service.logout(
         db=db,
         refresh_token=cookie_token,
+        access_token=access_token if scheme == "Bearer" and access_token else None,
     )
 
     # 无论服务处理结果如何，都清理 Cookie（幂等）
@@ -152,9 +162,56 @@ async def logout(request: Request, response: Response, db: AsyncDbSession = None
     return result
 
 
+@router.get("/auth/jwks.json")
+async def jwks(response: Response) -> dict[str, Any]:
+    """
+    公开签名公钥（RFC 7517 JWKS 格式，不套用 code/message 包装），供网关/旁路服务离线验签。
+    HMAC 密钥不会出现在此列表中。
+    """
+    response.headers["Cache-Control"] = f"public, max-age={max(settings.JWT_KEYS_RELOAD_SECONDS, 60)}"
+    return get_key_ring().jwks()
+
+
+@router.post("/auth/introspect", response_model=BasicResponse, dependencies=[ServiceAuth])
+async def introspect(payload: IntrospectRequest, db: AsyncDbSession = None):
+    """内网服务批量校验 access token（需 X-Service-Token），结果按入参顺序返回。"""
+    service = IntrospectionService()
+    result = await service.introspect(db=db, tokens=payload.tokens)
+    return result
+
+
 @router.get("/auth/me", response_model=BasicResponse)
 async def get_me(current_user: CurrentUser):
-    return {"code": 0, "message": "ok", "data": current_user.to_safe_dict()}
+    data = {**current_user.to_safe_dict(), "permissions": permission_names(current_user.permissions)}
+    return {"code": 0, "message": "ok", "data": data}
+
+
+@router.get("/auth/sessions", response_model=BasicResponse)
+async def list_sessions(
+    request: Request,
+    current_user: CurrentUser,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=64),
+    db: AsyncDbSession = None,
+):
+    """当前用户的有效会话（按最近活跃倒序，keyset 分页：下一页传入上一页返回的 next_cursor）。"""
+    service = SessionService()
+    result = await service.list_sessions(
+        db=db,
+        user_id=current_user.id,
+        limit=limit,
+        cursor=cursor,
+        refresh_token=request.cookies.get("refresh_token"),
+    )
+    return result
+
+
+@router.delete("/auth/sessions/{session_id}", response_model=BasicResponse)
+async def revoke_session(session_id: UUID, current_user: CurrentUser, db: AsyncDbSession = None):
+    """撤销当前用户的某个会话：该会话的刷新令牌立即失效，已签发的 access token 在过期前仍可使用。"""
+    service = SessionService()
+    result = await service.revoke_session(db=db, user_id=current_user.id, session_id=session_id)
+    return result
 
 
 @router.post("/auth/password/change", response_model=BasicResponse)
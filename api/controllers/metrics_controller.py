@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from controllers.docs_controller import verify_docs_credentials
+from core.jwt_keys import get_key_ring
+from core.jwt_tokens import claims_cache
+from core.password_hashing import get_password_hashing_engine
+from services.access_denylist_service import get_access_denylist_service
+from services.refresh_token_purge_service import get_refresh_token_purge_service
+
+router = APIRouter()
+
+
+@router.get("/metrics/auth", include_in_schema=False)
+async def auth_metrics(
+    _: None = Depends(verify_docs_credentials),
+) -> dict[str, Any]:
+    """
+    鉴权链路的进程内指标（当前 worker），与文档共用 Basic Auth 保护。
+    """
+    return {
+        "code": 0,
+        "message": "ok",
+        "data": {
+            "claims_cache": claims_cache.stats(),
+            "signing_keys": get_key_ring().stats(),
+            "access_denylist": get_access_denylist_service().stats(),
+            "password_hashing": get_password_hashing_engine().stats(),
+            "refresh_token_purge": get_refresh_token_purge_service().stats(),
+        },
+    }
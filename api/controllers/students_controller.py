@@ -4,7 +4,7 @@ from typing import Any
 
 from fastapi import APIRouter, Query
 
-from core.rbac import Admin, UserOrAdmin
+from core.rbac import StudentsReader, StudentsWriter
 from schemas.students import StudentCreateRequest, StudentsListResponse
 from services.students_service import StudentsService
 from utils.db import AsyncDbSession
@@ -16,7 +16,7 @@ router = APIRouter()
 async def list_students(
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=1, le=100),
-    _viewer: UserOrAdmin = None,
+    _viewer: StudentsReader = None,
     db: AsyncDbSession = None,
 ) -> dict[str, Any]:
     service = StudentsService()
@@ -26,7 +26,7 @@ async def list_students(
 @router.post("/students")
 async def create_student(
     payload: StudentCreateRequest,
-    _admin: Admin = None,
+    _writer: StudentsWriter = None,
     db: AsyncDbSession = None,
 ) -> dict[str, Any]:
     service = StudentsService()
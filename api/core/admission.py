@@ -0,0 +1,130 @@
+"""
+准入控制：限制昂贵操作（如 Argon2 哈希）的并发数，超出部分进入有界等待队列。
+
+- 并发上限以内直接放行
+- 超出上限时排队等待，等待超过期限则拒绝
+- 队列已满时立即拒绝，不再继续堆积请求
+
+拒绝时抛出 `AdmissionRejectedError`，由全局异常处理器转换为 503 + Retry-After，
+使登录洪峰只会快速失败，而不会拖慢同一 worker 上的其他接口。
+
+控制器只在单个事件循环内使用（每个 worker 各自一份），不做跨线程同步；
+等待用的 Future 在每次排队时按当前事件循环创建，不与特定事件循环绑定。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+WAIT_SAMPLES = 1024
+
+
+class AdmissionRejectedError(Exception):
+    """请求未获准入（队列已满或排队超时）。"""
+
+    def __init__(self, name: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"{name} admission rejected: {reason}")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, name: str, *, max_concurrency: int, max_queue: int, queue_timeout_seconds: float) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after = max(1, math.ceil(queue_timeout_seconds))
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # 最近若干次排队等待耗时（秒），用于计算分位数
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        return AdmissionRejectedError(self.name, reason, self.retry_after)
+
+    async def acquire(self) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise self._reject("queue_full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except TimeoutError:
+            # release() 可能在超时生效的同一轮事件循环中已把名额移交给本请求：此时视为已准入，
+            # 否则名额既没被使用也不会被归还，每发生一次并发上限就永久减一
+            if not waiter.done() or waiter.cancelled():
+                self.rejected_timeout += 1
+                raise self._reject("timeout") from None
+        except asyncio.CancelledError:
+            # 被取消时若名额已移交给本请求，需要归还，避免名额泄漏
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            # 超时/取消的等待者可能仍在队列中（尚未被 release 弹出）
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._waits.append(time.monotonic() - started)
+        self.admitted += 1
+
+    def release(self) -> None:
+        # 名额直接移交给队首等待者（_active 不变），保证先到先得
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        p99 = waits[min(len(waits) - 1, int(0.99 * len(waits)))] if waits else 0.0
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_ms_avg": round(sum(waits) * 1000 / len(waits), 3) if waits else 0.0,
+            "wait_ms_p99": round(p99 * 1000, 3),
+            "wait_ms_max": round(waits[-1] * 1000, 3) if waits else 0.0,
+        }
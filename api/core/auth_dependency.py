@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import dataclasses
+import secrets
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, Header, HTTPException, status
 
-from core.jwt_tokens import TokenError, TokenExpiredError, TokenTypeError, verify_token
-from models import User
+from core.jwt_tokens import TokenError, TokenExpiredError, TokenTypeError, verify_token_cached
+from core.permissions import effective_permission_mask
+from services.access_denylist_service import get_access_denylist_service
+from services.token_version_service import get_token_version_service, is_token_version_current
+from services.user_cache_service import UserSnapshot, get_user_cache_service
+from utils.config import settings
 from utils.db import AsyncDbSession
 
 
@@ -31,19 +37,25 @@ def _extract_bearer_token(authorization: str | None) -> str:
 async def get_current_user(
     authorization: Annotated[str | None, Header(alias="Authorization")] = None,
     db: AsyncDbSession = None,
-) -> User:
-    """基于访问令牌(access)的认证依赖，返回当前活跃用户。
+) -> UserSnapshot:
+    """基于访问令牌(access)的认证依赖，返回当前活跃用户的只读快照。
 
     校验项：
     - Authorization: Bearer <access>
     - token 类型为 access，且未过期
+    - 令牌 jti 不在注销名单中（登出后旧 access token 失效）
+    - 令牌 `ver` 不低于用户当前 token_version（改密后旧令牌立即失效）
     - 用户存在且 is_active 为 True
+
+    用户状态优先取自两级快照缓存，缓存热时整个依赖不访问数据库；
+    需要修改用户记录的接口请自行按 `current_user.id` 加载 ORM 对象。
     """
 
     token = _extract_bearer_token(authorization)
 
     try:
-        claims = verify_token(token, "access")
+        # 同一 access token 重复到达时命中声明缓存，跳过验签与解析
+        claims = verify_token_cached(token, "access")
     except TokenExpiredError as err:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,13 +86,37 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         ) from err
 
-    user = await db.get(User, user_uuid)
+    # 注销名单：布隆过滤器未命中时无网络开销
+    if await get_access_denylist_service().is_revoked(str(claims["jti"])):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"message": "访问令牌已注销"},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # 先查紧凑的版本表（近缓存/Redis），已撤销的令牌无需加载用户
+    current_version = await get_token_version_service().get(user_uuid)
+    if not is_token_version_current(claims, current_version):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"message": "登录状态已失效，请重新登录"},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user = await get_user_cache_service().load(db, user_uuid)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"message": "用户不存在"},
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # 版本表不可用时以用户快照中的版本兜底
+    if not is_token_version_current(claims, user.token_version):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"message": "登录状态已失效，请重新登录"},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -88,10 +124,28 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # 令牌中的 `perm` 只能收窄当前角色的权限：角色变更（快照失效）后旧令牌不再拥有多出的权限
+    permissions = effective_permission_mask(claims.get("perm"), user.role)
+    if permissions != user.permissions:
+        user = dataclasses.replace(user, permissions=permissions)
     return user
 
 
 # 便捷别名：在路由函数中可写作 `current_user: CurrentUser`
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserSnapshot, Depends(get_current_user)]
+
+
+def verify_service_token(
+    x_service_token: Annotated[str | None, Header(alias="X-Service-Token")] = None,
+) -> None:
+    """内网服务凭据校验（用于令牌内省等服务间接口）。未配置凭据时接口视为关闭。"""
+    expected = settings.INTROSPECTION_SERVICE_TOKEN
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail={"message": "接口未启用"})
+    if not x_service_token or not secrets.compare_digest(x_service_token.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"message": "服务凭据无效"})
+
+
+ServiceAuth = Depends(verify_service_token)
 
-__all__ = ["CurrentUser", "get_current_user"]
+__all__ = ["CurrentUser", "ServiceAuth", "get_current_user", "verify_service_token"]
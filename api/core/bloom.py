@@ -0,0 +1,69 @@
+"""进程内布隆过滤器（仅支持添加与查询，不支持删除）。
+
+用于“绝大多数查询结果为不存在”的热路径：未命中即确定不存在，命中时再回源确认。
+位置由 blake2b 摘要拆出的两个 64 位整数经双重哈希（h1 + i * h2）得到。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+
+
+def optimal_size(capacity: int, false_positive_rate: float) -> tuple[int, int]:
+    """按期望容量与误判率计算 (位数 m, 哈希函数个数 k)。"""
+    capacity = max(int(capacity), 1)
+    false_positive_rate = min(max(float(false_positive_rate), 1e-9), 0.5)
+    num_bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001) -> None:
+        self.capacity = max(int(capacity), 1)
+        self.num_bits, self.num_hashes = optimal_size(self.capacity, false_positive_rate)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        # h2 取奇数，避免与位数存在公因子时位置退化
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, item: str) -> bool:
+        """添加元素，返回是否置位了新的比特。
+
+        重复添加（或误判为已存在）不改变任何查询结果，也不计入 count，因此反复同步同一批元素不会虚增占用。
+        """
+        bits = self._bits
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def saturated(self) -> bool:
+        """已添加元素超过设计容量，误判率将高于预期。"""
+        return self.count > self.capacity
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "size_bytes": len(self._bits),
+        }
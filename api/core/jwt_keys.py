@@ -0,0 +1,279 @@
+"""JWT 签名密钥环。
+
+- 每把密钥由 `kid` 标识并固定自身算法（HS256/HS384/HS512/ES256/EdDSA），签发时写入 JWT 头部的 `kid`
+- 密钥在加载时一次性解析为密钥对象，验签时按 `kid` 字典查找（O(1)），不再重复解析 PEM
+- 非对称密钥的公钥以 JWKS 形式对外发布，网关/旁路服务可离线验签 access token，无需回调 API
+
+配置：
+- 未设置 JWT_KEYS_FILE：密钥环仅包含一把 `kid=default` 的 HMAC 密钥（JWT_SECRET + JWT_ALGORITHM）
+- 设置 JWT_KEYS_FILE：从 JSON 文件加载，格式如下（`*_file` 为相对该 JSON 文件的路径）::
+
+    {
+      "active_kid": "ed-2026-10",
+      "keys": [
+        {"kid": "default", "alg": "HS256", "secret": "..."},
+        {"kid": "ed-2026-10", "alg": "EdDSA", "private_key_file": "ed-2026-10.pem"},
+        {"kid": "es-2026-07", "alg": "ES256", "public_key_file": "es-2026-07.pub.pem"}
+      ]
+    }
+
+  只提供公钥的密钥仅用于验签（已退役但仍有未过期令牌）。
+
+轮换（无需全员重新登录）：
+1. 新增密钥但不激活，等待所有 worker 加载（验签方也已拉取新的 JWKS）
+2. 将 `active_kid` 切换为新密钥，新令牌开始使用新密钥签发
+3. 旧令牌全部过期（REFRESH_TOKEN_EXPIRES_MINUTES）后，从文件中移除旧密钥
+
+文件每 JWT_KEYS_RELOAD_SECONDS 秒检查一次修改时间，变化时构建新密钥环后整体替换；
+新文件非法时保留旧密钥环并记录日志。不带 `kid` 的历史令牌按 `kid=default` 验签。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from jwt.algorithms import get_default_algorithms
+
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+# 不带 kid 头部的历史令牌所对应的密钥 ID
+LEGACY_KID = "default"
+
+SUPPORTED_ALGORITHMS = frozenset({"HS256", "HS384", "HS512", "ES256", "EdDSA"})
+
+
+class KeyRingError(Exception):
+    """密钥环配置非法"""
+
+
+@dataclass(frozen=True, slots=True)
+class JwtKey:
+    """已解析的签名密钥：HMAC 为密钥字节；非对称为私钥/公钥对象（仅验签时私钥为 None）。"""
+
+    kid: str
+    algorithm: str
+    signing_key: Any | None
+    verifying_key: Any
+
+    @property
+    def is_symmetric(self) -> bool:
+        return self.algorithm.startswith("HS")
+
+    def public_jwk(self) -> dict[str, Any] | None:
+        """公钥的 JWK 表示；HMAC 密钥不可公开，返回 None。"""
+        if self.is_symmetric:
+            return None
+        jwk = get_default_algorithms()[self.algorithm].to_jwk(self.verifying_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _read_material(entry: dict[str, Any], field: str, base_dir: Path | None) -> str | None:
+    if entry.get(field):
+        return str(entry[field])
+    path = entry.get(f"{field}_file")
+    if not path:
+        return None
+    resolved = Path(path)
+    if not resolved.is_absolute() and base_dir is not None:
+        resolved = base_dir / resolved
+    return resolved.read_text(encoding="utf-8")
+
+
+def parse_key(entry: dict[str, Any], base_dir: Path | None = None) -> JwtKey:
+    """将一条密钥配置解析为 `JwtKey`（文件不可读、PEM 非法等错误统一转为 KeyRingError）。"""
+    try:
+        return _parse_key(entry, base_dir)
+    except KeyRingError:
+        raise
+    except Exception as e:
+        raise KeyRingError(f"密钥 {entry.get('kid')} 解析失败: {e}") from e
+
+
+def _parse_key(entry: dict[str, Any], base_dir: Path | None) -> JwtKey:
+    kid = entry.get("kid")
+    algorithm = entry.get("alg")
+    if not kid or not isinstance(kid, str):
+        raise KeyRingError("密钥缺少 kid")
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise KeyRingError(f"密钥 {kid} 使用了不支持的算法: {algorithm}")
+
+    algorithms = get_default_algorithms()
+    if algorithm not in algorithms:
+        raise KeyRingError(f"密钥 {kid} 需要 cryptography 以支持 {algorithm}")
+    alg_obj = algorithms[algorithm]
+
+    if algorithm.startswith("HS"):
+        secret = _read_material(entry, "secret", base_dir)
+        if not secret:
+            raise KeyRingError(f"HMAC 密钥 {kid} 缺少 secret")
+        prepared = alg_obj.prepare_key(secret)
+        return JwtKey(kid=kid, algorithm=algorithm, signing_key=prepared, verifying_key=prepared)
+
+    private_pem = _read_material(entry, "private_key", base_dir)
+    if private_pem:
+        private_key = alg_obj.prepare_key(private_pem)
+        if not hasattr(private_key, "public_key"):
+            raise KeyRingError(f"密钥 {kid} 的 private_key 不是私钥")
+        public_key = private_key.public_key()
+    else:
+        public_pem = _read_material(entry, "public_key", base_dir)
+        if not public_pem:
+            raise KeyRingError(f"密钥 {kid} 缺少 private_key 或 public_key")
+        private_key = None
+        public_key = alg_obj.prepare_key(public_pem)
+        if hasattr(public_key, "public_key"):
+            raise KeyRingError(f"密钥 {kid} 的 public_key 不应包含私钥")
+
+    if algorithm == "ES256" and getattr(getattr(public_key, "curve", None), "name", None) != "secp256r1":
+        raise KeyRingError(f"ES256 密钥 {kid} 必须使用 P-256 曲线")
+    return JwtKey(kid=kid, algorithm=algorithm, signing_key=private_key, verifying_key=public_key)
+
+
+class KeyRing:
+    """不可变的密钥集合：一把用于签发的活动密钥 + 若干仅验签的密钥。"""
+
+    def __init__(self, keys: Iterable[JwtKey], active_kid: str) -> None:
+        self._keys: dict[str, JwtKey] = {}
+        for key in keys:
+            if key.kid in self._keys:
+                raise KeyRingError(f"重复的 kid: {key.kid}")
+            self._keys[key.kid] = key
+        active = self._keys.get(active_kid)
+        if active is None:
+            raise KeyRingError(f"active_kid 不存在: {active_kid}")
+        if active.signing_key is None:
+            raise KeyRingError(f"活动密钥 {active_kid} 缺少私钥，无法签发")
+        self.active = active
+        # JWKS 在构建时一次性生成，密钥环不可变，可直接复用
+        self._jwks = {"keys": [jwk for key in self._keys.values() if (jwk := key.public_jwk()) is not None]}
+
+    @classmethod
+    def from_config(cls, data: dict[str, Any], base_dir: Path | None = None) -> KeyRing:
+        entries = data.get("keys")
+        if not isinstance(entries, list) or not entries:
+            raise KeyRingError("keys 不能为空")
+        return cls((parse_key(entry, base_dir) for entry in entries), str(data.get("active_kid") or ""))
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> KeyRing:
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise KeyRingError(f"无法读取密钥文件 {path}: {e}") from e
+        return cls.from_config(data, base_dir=path.parent)
+
+    @classmethod
+    def from_settings(cls) -> KeyRing:
+        if settings.JWT_KEYS_FILE:
+            return cls.from_file(settings.JWT_KEYS_FILE)
+        if not settings.JWT_ALGORITHM.startswith("HS"):
+            raise KeyRingError("非对称算法需通过 JWT_KEYS_FILE 配置密钥")
+        entry = {"kid": LEGACY_KID, "alg": settings.JWT_ALGORITHM, "secret": settings.JWT_SECRET}
+        return cls([parse_key(entry)], LEGACY_KID)
+
+    def get(self, kid: str) -> JwtKey | None:
+        return self._keys.get(kid)
+
+    @property
+    def kids(self) -> frozenset[str]:
+        return frozenset(self._keys)
+
+    def all_keys(self) -> list[JwtKey]:
+        return list(self._keys.values())
+
+    def jwks(self) -> dict[str, Any]:
+        return self._jwks
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "active_kid": self.active.kid,
+            "active_algorithm": self.active.algorithm,
+            "kids": sorted(self._keys),
+        }
+
+
+# 全局密钥环：整体替换引用，读取方无需加锁
+_ring: KeyRing | None = None
+_ring_mtime: float | None = None
+_next_check_at = 0.0
+_reload_lock = threading.Lock()
+_retire_listeners: list[Callable[[frozenset[str]], None]] = []
+
+
+def on_keys_retired(callback: Callable[[frozenset[str]], None]) -> None:
+    """注册回调：重新加载后有密钥被移除时调用（参数为被移除的 kid 集合）。"""
+    _retire_listeners.append(callback)
+
+
+def _keys_file_mtime() -> float | None:
+    try:
+        return os.stat(settings.JWT_KEYS_FILE).st_mtime
+    except OSError:
+        return None
+
+
+def _install(ring: KeyRing, mtime: float | None) -> None:
+    global _ring, _ring_mtime
+    previous = _ring
+    _ring, _ring_mtime = ring, mtime
+    if previous is None:
+        return
+    retired = previous.kids - ring.kids
+    if retired:
+        logger.info("jwt keys retired: %s", ", ".join(sorted(retired)))
+        for callback in _retire_listeners:
+            callback(retired)
+
+
+def reload_key_ring() -> KeyRing:
+    """按当前配置重新构建密钥环并替换（构建失败时抛出 KeyRingError，旧密钥环保持不变）。"""
+    with _reload_lock:
+        mtime = _keys_file_mtime() if settings.JWT_KEYS_FILE else None
+        ring = KeyRing.from_settings()
+        _install(ring, mtime)
+        return ring
+
+
+def _maybe_reload() -> None:
+    global _next_check_at, _ring_mtime
+    if not _reload_lock.acquire(blocking=False):
+        # 其他线程正在重新加载，继续使用旧密钥环
+        return
+    try:
+        _next_check_at = time.monotonic() + settings.JWT_KEYS_RELOAD_SECONDS
+        mtime = _keys_file_mtime()
+        if mtime is None or mtime == _ring_mtime:
+            return
+        try:
+            ring = KeyRing.from_settings()
+        except KeyRingError:
+            logger.exception("reload jwt keys failed, keep previous key ring")
+            # 记下该 mtime，避免每个检查周期重复解析同一个坏文件
+            _ring_mtime = mtime
+            return
+        _install(ring, mtime)
+        logger.info("jwt key ring reloaded, active kid: %s", ring.active.kid)
+    finally:
+        _reload_lock.release()
+
+
+def get_key_ring() -> KeyRing:
+    """获取当前密钥环（首次调用时加载；配置了密钥文件时按周期检查更新）。"""
+    ring = _ring
+    if ring is None:
+        return reload_key_ring()
+    if settings.JWT_KEYS_FILE and settings.JWT_KEYS_RELOAD_SECONDS > 0 and time.monotonic() >= _next_check_at:
+        _maybe_reload()
+        ring = _ring or ring
+    return ring
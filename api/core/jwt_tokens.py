@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import json
 import uuid
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from typing import Any, Literal
 
 import jwt
 
+from core.jwt_keys import LEGACY_KID, JwtKey, KeyRing, get_key_ring, on_keys_retired
+from core.permissions import role_permission_mask
+from core.token_cache import VerifiedClaimsCache, token_digest
 from utils.config import settings
 
 
@@ -33,6 +41,16 @@ class TokenInvalidError(TokenError):
     """令牌非法或无法解析"""
 
 
+# 已验证声明缓存（进程内单例，按令牌摘要索引）
+claims_cache = VerifiedClaimsCache(
+    max_entries=settings.ACCESS_CLAIMS_CACHE_MAX_ENTRIES,
+    max_ttl_seconds=settings.ACCESS_CLAIMS_CACHE_TTL_SECONDS,
+)
+# 密钥被移除（如泄露后下线）时，已缓存的声明可能由该密钥签发，需整体清空；
+# 新增或切换活动密钥不影响旧令牌的有效性，缓存保持不变，避免轮换时集中重新验签
+on_keys_retired(lambda _kids: claims_cache.clear())
+
+
 def _now() -> datetime:
     return datetime.now(UTC)
 
@@ -57,6 +75,7 @@ def _build_common_claims(
     token_type: Literal["access", "refresh"],
     expires_delta: timedelta,
     role: str,
+    token_version: int,
 ) -> dict[str, Any]:
     if not role:
         raise TokenMissingClaimError("role 不能为空")
@@ -68,51 +87,211 @@ def _build_common_claims(
         "iat": int(issued_at.timestamp()),
         "exp": int((issued_at + expires_delta).timestamp()),
         "role": role,
+        "ver": int(token_version),
     }
+    if token_type == "access":
+        # 权限位掩码：鉴权时一次整数与运算即可完成权限校验
+        claims["perm"] = role_permission_mask(role)
+    return claims
+
+
+# ---- HMAC 快速编解码 ----
+# 与 PyJWT 逐字节一致：头部按键排序、紧凑分隔符、base64url 去除填充；
+# 区别仅在于头部段与 HMAC 密钥状态预先计算，声明用预构建的 JSONEncoder 序列化。
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+# 快速路径只接受本服务签发的声明集合；出现其他声明（aud/nbf/iss 等）时交给 PyJWT，保持其校验语义
+_FAST_PATH_CLAIMS = frozenset({"sub", "type", "jti", "iat", "exp", "role", "ver", "perm"})
+_REQUIRED_CLAIMS = ("exp", "iat", "sub", "jti", "type")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class _HmacCodec:
+    """单把 HMAC 密钥的编解码器：缓存 base64 头部段与已初始化的 HMAC 对象（每次签名仅 copy）。"""
+
+    __slots__ = ("_mac", "header_segment")
+
+    def __init__(self, key: JwtKey, header: dict[str, Any]) -> None:
+        self.header_segment = _b64encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode())
+        self._mac = hmac.new(key.signing_key, digestmod=_HMAC_DIGESTS[key.algorithm])
+
+    def signature(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return _b64encode(mac.digest())
+
+    def encode(self, payload: dict[str, Any]) -> str:
+        signing_input = self.header_segment + b"." + _b64encode(_json_encoder.encode(payload).encode())
+        return (signing_input + b"." + self.signature(signing_input)).decode()
+
+
+class _HmacCodecs:
+    """某个密钥环下的全部 HMAC 编解码器：签发取活动密钥；验签按头部段原文查找。"""
+
+    def __init__(self, ring: KeyRing) -> None:
+        self.ring = ring
+        self.active: _HmacCodec | None = None
+        self.by_header: dict[str, _HmacCodec] = {}
+        for key in ring.all_keys():
+            if key.algorithm not in _HMAC_DIGESTS:
+                continue
+            codec = _HmacCodec(key, {"typ": "JWT", "alg": key.algorithm, "kid": key.kid})
+            self.by_header[codec.header_segment.decode()] = codec
+            if key is ring.active:
+                self.active = codec
+            if key.kid == LEGACY_KID:
+                # 引入密钥环之前签发的令牌不带 kid 头部
+                legacy = _HmacCodec(key, {"typ": "JWT", "alg": key.algorithm})
+                self.by_header[legacy.header_segment.decode()] = legacy
+
+
+_codecs: _HmacCodecs | None = None
+
+
+def _hmac_codecs() -> _HmacCodecs:
+    """当前密钥环对应的编解码器；密钥环替换后按需重建。"""
+    global _codecs
+    ring = get_key_ring()
+    codecs = _codecs
+    if codecs is None or codecs.ring is not ring:
+        codecs = _codecs = _HmacCodecs(ring)
+    return codecs
+
+
+def _decode_hmac_fast(token: str) -> dict[str, Any] | None:
+    """
+    HMAC 令牌的快速验签与解析。
+
+    仅在“头部段与本服务签发的完全一致、签名匹配、声明均为已知字段”时返回声明；
+    其他任何情况返回 None，由调用方走 PyJWT 完整流程（从而得到与之前完全一致的异常）。
+    """
+    if not token.isascii():
+        return None
+    header_segment, _, rest = token.partition(".")
+    codec = _hmac_codecs().by_header.get(header_segment)
+    if codec is None:
+        return None
+    payload_segment, sep, signature = rest.partition(".")
+    if not sep or "." in signature:
+        return None
+    signing_input = token[: len(header_segment) + 1 + len(payload_segment)].encode()
+    if not hmac.compare_digest(codec.signature(signing_input), signature.encode()):
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload_segment + "=" * (-len(payload_segment) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict) or not claims.keys() <= _FAST_PATH_CLAIMS:
+        return None
+    if any(claims.get(name) is None for name in _REQUIRED_CLAIMS):
+        return None
+    if not isinstance(claims["sub"], str) or not isinstance(claims["jti"], str):
+        return None
     return claims
 
 
-def create_access_token(user_id: Any, role: str) -> str:
+def _encode(payload: dict[str, Any]) -> str:
+    codecs = _hmac_codecs()
+    if codecs.active is not None:
+        return codecs.active.encode(payload)
+    key = codecs.ring.active
+    return jwt.encode(payload, key.signing_key, algorithm=key.algorithm, headers={"typ": "JWT", "kid": key.kid})
+
+
+def _verification_key(token: str) -> JwtKey:
+    """按头部 `kid` 从密钥环中选取验签密钥；无 `kid` 的历史令牌使用默认密钥。"""
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError as e:
+        raise TokenInvalidError("非法令牌或解析失败") from e
+    kid = header.get("kid", LEGACY_KID)
+    if not isinstance(kid, str):
+        raise TokenInvalidError("非法令牌或解析失败")
+    key = get_key_ring().get(kid)
+    if key is None:
+        raise TokenSignatureError("未知的签名密钥")
+    return key
+
+
+def create_access_token(user_id: Any, role: str, token_version: int = 1) -> str:
     """签发访问令牌（有效期：settings.ACCESS_TOKEN_EXPIRES_MINUTES）。
 
-    增加 `role` 声明以支持前端基于角色的 UI 控制。
+    增加 `role` 声明以支持前端基于角色的 UI 控制；
+    `ver` 声明为签发时的用户 token_version，用于“登出所有设备”；
+    `perm` 声明为角色对应的权限位掩码（见 core/permissions.py）。
     """
     expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_MINUTES)
-    payload = _build_common_claims(user_id, "access", expires, role)
-    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM, headers={"typ": "JWT"})
-    return token
+    payload = _build_common_claims(user_id, "access", expires, role, token_version)
+    return _encode(payload)
 
 
-def create_refresh_token(user_id: Any, role: str) -> str:
+def create_refresh_token(user_id: Any, role: str, token_version: int = 1) -> str:
     """签发刷新令牌（有效期：settings.REFRESH_TOKEN_EXPIRES_MINUTES）。
 
     可选地携带 `role`，用于在刷新时减少数据库查询（视配置而定）。
     """
     expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRES_MINUTES)
-    payload = _build_common_claims(user_id, "refresh", expires, role)
-    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM, headers={"typ": "JWT"})
-    return token
+    payload = _build_common_claims(user_id, "refresh", expires, role, token_version)
+    return _encode(payload)
 
 
-def verify_token(token: str, expected_type: Literal["access", "refresh"]) -> dict[str, Any]:
-    """
-    验证并解析令牌。
+@dataclass(frozen=True, slots=True)
+class TokenBundle:
+    """一次签发的 access/refresh 令牌及其声明（声明即签名内容，无需再解码）。"""
 
-    - 校验签名、过期时间（exp）。
-    - 校验 `type` 与 expected_type 一致。
-    - 校验 `sub`/`jti`/`iat`/`exp` 存在且格式正确。
+    access_token: str
+    refresh_token: str
+    access_claims: dict[str, Any]
+    refresh_claims: dict[str, Any]
 
-    Returns: 已验证的 claims 字典
-    Raises: TokenExpiredError, TokenSignatureError, TokenTypeError, TokenMissingClaimError, TokenInvalidError
+    @property
+    def refresh_jti(self) -> str:
+        return str(self.refresh_claims["jti"])
+
+    @property
+    def refresh_issued_at(self) -> datetime:
+        return datetime.fromtimestamp(int(self.refresh_claims["iat"]), UTC)
+
+    @property
+    def refresh_expires_at(self) -> datetime:
+        return datetime.fromtimestamp(int(self.refresh_claims["exp"]), UTC)
+
+
+def issue_token_pair(user_id: Any, role: str, token_version: int = 1) -> TokenBundle:
     """
+    同时签发 access 与 refresh 令牌，并返回各自的声明。
+
+    登录/刷新/注册需要用 refresh 的 jti/iat/exp 持久化记录；直接返回签名前构造的声明，
+    避免签发后再调用 `verify_token` 做一次多余的解码与 HMAC。
+    """
+    access_claims = _build_common_claims(
+        user_id, "access", timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_MINUTES), role, token_version
+    )
+    refresh_claims = _build_common_claims(
+        user_id, "refresh", timedelta(minutes=settings.REFRESH_TOKEN_EXPIRES_MINUTES), role, token_version
+    )
+    return TokenBundle(
+        access_token=_encode(access_claims),
+        refresh_token=_encode(refresh_claims),
+        access_claims=access_claims,
+        refresh_claims=refresh_claims,
+    )
+
+
+def _decode_with_pyjwt(token: str) -> dict[str, Any]:
+    key = _verification_key(token)
     try:
-        # 关闭对 iat/exp 的内建校验，改为在下方进行自定义校验
-        claims = jwt.decode(
+        # 关闭对 iat/exp 的内建校验，改为在 verify_token 中进行自定义校验
+        return jwt.decode(
             token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
+            key.verifying_key,
+            algorithms=[key.algorithm],
             options={
-                "require": ["exp", "iat", "sub", "jti", "type"],
+                "require": list(_REQUIRED_CLAIMS),
                 "verify_exp": False,
                 "verify_iat": False,
             },
@@ -126,6 +305,32 @@ def verify_token(token: str, expected_type: Literal["access", "refresh"]) -> dic
         # 其他解码错误归并为非法令牌
         raise TokenInvalidError("非法令牌或解析失败") from e
 
+
+def verify_token(
+    token: str,
+    expected_type: Literal["access", "refresh"],
+    *,
+    allow_expired: bool = False,
+) -> dict[str, Any]:
+    """
+    验证并解析令牌。
+
+    - JWS 紧凑序列化只含 ASCII 字符，其他输入直接判为非法（base64 解码会静默丢弃非法字符，不能交给它）。
+    - 按头部 `kid` 选取密钥校验签名，算法由密钥本身决定（不信任头部 `alg`）；
+      本服务签发的 HMAC 令牌走快速路径，其余情况交给 PyJWT。
+    - 校验过期时间（exp）；`allow_expired=True` 时跳过（如登出时定位已过期的刷新令牌）。
+    - 校验 `type` 与 expected_type 一致。
+    - 校验 `sub`/`jti`/`iat`/`exp` 存在且格式正确；`ver`/`perm` 可选（旧令牌缺失），存在时须为整数。
+
+    Returns: 已验证的 claims 字典
+    Raises: TokenExpiredError, TokenSignatureError, TokenTypeError, TokenMissingClaimError, TokenInvalidError
+    """
+    if not token.isascii():
+        raise TokenInvalidError("非法令牌或解析失败")
+    claims = _decode_hmac_fast(token)
+    if claims is None:
+        claims = _decode_with_pyjwt(token)
+
     # 类型校验
     token_type = claims.get("type")
     if token_type != expected_type:
@@ -150,9 +355,39 @@ def verify_token(token: str, expected_type: Literal["access", "refresh"]) -> dic
         if not isinstance(value, int):
             raise TokenMissingClaimError(f"声明 {key} 需要为整数时间戳")
 
+    for key in ("ver", "perm"):
+        value = claims.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise TokenMissingClaimError(f"声明 {key} 需要为整数")
+
     # 过期校验（因关闭 verify_exp，需要在此处手动判断）
     now_ts = int(_now().timestamp())
-    if now_ts >= int(claims["exp"]):
+    if not allow_expired and now_ts >= int(claims["exp"]):
         raise TokenExpiredError("令牌已过期")
 
     return claims
+
+
+def verify_token_cached(token: str, expected_type: Literal["access", "refresh"]) -> dict[str, Any]:
+    """
+    带进程内缓存的 `verify_token`，用于每个请求都要执行的鉴权热路径。
+
+    - 命中：跳过验签与解析，仅校验类型与过期时间
+    - 未命中：走完整的 `verify_token`，成功后写入缓存（失败不缓存）
+
+    异常语义与 `verify_token` 完全一致。返回值为 claims 副本，调用方可自由修改。
+    """
+    if not claims_cache.enabled or not token.isascii():
+        return verify_token(token, expected_type)
+
+    key = token_digest(token)
+    now_ts = int(_now().timestamp())
+    cached = claims_cache.get(key, now_ts)
+    if cached is not None:
+        if cached["type"] != expected_type:
+            raise TokenTypeError(f"令牌类型错误：期望 {expected_type}，实际 {cached['type']}")
+        return dict(cached)
+
+    claims = verify_token(token, expected_type)
+    claims_cache.put(key, dict(claims), now_ts)
+    return claims
@@ -0,0 +1,170 @@
+"""
+异步密码哈希引擎：把 Argon2 计算移出事件循环。
+
+Argon2 单次计算需要数十毫秒 CPU，直接在协程中调用会阻塞整个 worker 的事件循环，
+使同一 worker 上无关请求的延迟一同抬高。这里将 `core.security` 中的同步函数提交到
+有界执行器中运行，协程只 await 结果：
+
+- process（默认）：独立进程池，不受 GIL 影响，worker 数即并发计算上限；
+  使用 spawn 启动子进程，避免在已有线程（数据库驱动、Redis 连接等）的进程中 fork
+- thread：线程池（argon2-cffi 计算期间释放 GIL），适合单核或无法创建子进程的环境
+- inline：在事件循环内同步执行，仅用于调试
+
+参数校验仍在调用方进程内同步完成，非法输入不会占用执行器。
+
+所有计算先经过准入控制（见 core/admission.py）：并发上限默认等于 worker 数，超出部分在有界队列中
+限时等待，队列满或等待超时则抛出 `AdmissionRejectedError`（返回 503），避免撞库洪峰下请求无限堆积。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from core.admission import AdmissionController
+from core.security import hash_password, verify_password
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+
+def _noop() -> None:
+    """预热用的空任务（需为模块级函数才能被子进程导入）。"""
+    return None
+
+
+class PasswordHashingEngine:
+    def __init__(
+        self,
+        *,
+        mode: str | None = None,
+        max_workers: int | None = None,
+        max_concurrency: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout_seconds: float | None = None,
+    ) -> None:
+        self.mode = (mode if mode is not None else settings.PASSWORD_HASH_EXECUTOR).strip().lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"unsupported password hash executor: {self.mode}")
+        workers = max_workers if max_workers is not None else settings.PASSWORD_HASH_WORKERS
+        self.max_workers = workers if workers > 0 else (os.cpu_count() or 1)
+        concurrency = max_concurrency if max_concurrency is not None else settings.PASSWORD_HASH_MAX_CONCURRENCY
+        self.admission = AdmissionController(
+            "password_hashing",
+            max_concurrency=concurrency if concurrency > 0 else self.max_workers,
+            max_queue=max_queue if max_queue is not None else settings.PASSWORD_HASH_MAX_QUEUE,
+            queue_timeout_seconds=(
+                queue_timeout_seconds
+                if queue_timeout_seconds is not None
+                else settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+            ),
+        )
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.pool_restarts = 0
+
+    def _get_executor(self) -> Executor | None:
+        if self.mode == "inline":
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="password-hash"
+                        )
+        return self._executor
+
+    def _reset_broken_pool(self, broken: Executor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        async with self.admission.slot():
+            return await self._submit(fn, *args)
+
+    async def _submit(self, fn: Any, *args: Any) -> Any:
+        executor = self._get_executor()
+        if executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # 子进程被杀（OOM 等）后进程池不可再用：重建一次并重试
+            logger.warning("password hashing pool broken, restarting")
+            self._reset_broken_pool(executor)
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        """异步版 `core.security.hash_password`，非法输入同样抛出 ValueError。"""
+        if not isinstance(password, str) or not password:
+            raise ValueError("password must be a non-empty string")
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, password_hash: str) -> bool:
+        """异步版 `core.security.verify_password`。"""
+        if not isinstance(plain_password, str) or not isinstance(password_hash, str):
+            return False
+        if not plain_password or not password_hash:
+            return False
+        return await self._run(verify_password, plain_password, password_hash)
+
+    async def warm_up(self) -> None:
+        """启动时预先拉起执行器，避免首个登录请求承担子进程启动耗时。"""
+        executor = self._get_executor()
+        if executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop) for _ in range(self.max_workers)))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "started": self._executor is not None,
+            "submitted": self.submitted,
+            "pool_restarts": self.pool_restarts,
+            "admission": self.admission.stats(),
+        }
+
+
+_engine: PasswordHashingEngine | None = None
+
+
+def get_password_hashing_engine() -> PasswordHashingEngine:
+    global _engine
+    if _engine is None:
+        _engine = PasswordHashingEngine()
+    return _engine
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_hashing_engine().hash(password)
+
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await get_password_hashing_engine().verify(plain_password, password_hash)
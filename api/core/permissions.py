@@ -0,0 +1,76 @@
+"""权限注册表：权限名 -> 位，角色 -> 位掩码（导入时一次性编译）。
+
+- access token 签发时携带 `perm` 声明（角色对应的位掩码）
+- 路由通过 `require_permissions("students:write")` 声明所需权限，掩码在声明时编译
+- 请求时的校验只是一次整数与运算：`user.permissions & required == required`
+- 生效权限 = 令牌 `perm` & 用户当前角色的掩码：令牌只能收窄权限，不能超出当前角色，
+  因此降级后旧令牌立即失去多出的权限，无需等待令牌过期
+
+注意：
+- 权限位写入已签发的令牌，PERMISSIONS 只能在末尾追加，不能删除或调整顺序
+- 修改用户角色后需调用 UserCacheService.invalidate，使鉴权读到新角色（与禁用账号相同）
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+# 追加新权限时只能加在末尾（位序号即下标）
+PERMISSIONS: tuple[str, ...] = (
+    "students:read",
+    "students:write",
+)
+
+ROLE_PERMISSIONS: dict[str, tuple[str, ...]] = {
+    "user": ("students:read",),
+    "admin": ("students:read", "students:write"),
+}
+
+
+class PermissionRegistry:
+    def __init__(self, permissions: Iterable[str], role_permissions: Mapping[str, Iterable[str]]) -> None:
+        self._bits: dict[str, int] = {}
+        for index, name in enumerate(permissions):
+            if name in self._bits:
+                raise ValueError(f"重复的权限: {name}")
+            self._bits[name] = 1 << index
+        self._role_masks: dict[str, int] = {role: self.mask(*names) for role, names in role_permissions.items()}
+
+    def mask(self, *names: str) -> int:
+        """将权限名编译为位掩码；未注册的权限名直接报错（在启动/声明阶段暴露拼写错误）。"""
+        value = 0
+        for name in names:
+            bit = self._bits.get(name)
+            if bit is None:
+                raise ValueError(f"未注册的权限: {name}")
+            value |= bit
+        return value
+
+    def role_mask(self, role: str | None) -> int:
+        """角色对应的权限掩码；未知角色没有任何权限。"""
+        return self._role_masks.get(role or "", 0)
+
+    def names(self, mask: int) -> list[str]:
+        """位掩码还原为权限名列表（用于接口展示）。"""
+        return [name for name, bit in self._bits.items() if mask & bit]
+
+
+registry = PermissionRegistry(PERMISSIONS, ROLE_PERMISSIONS)
+
+
+def permission_mask(*names: str) -> int:
+    return registry.mask(*names)
+
+
+def role_permission_mask(role: str | None) -> int:
+    return registry.role_mask(role)
+
+
+def effective_permission_mask(token_mask: int | None, role: str | None) -> int:
+    """令牌声明与当前角色共同决定的生效权限；引入掩码之前签发的令牌（无 `perm`）按角色掩码处理。"""
+    role_mask = registry.role_mask(role)
+    return role_mask if token_mask is None else token_mask & role_mask
+
+
+def permission_names(mask: int) -> list[str]:
+    return registry.names(mask)
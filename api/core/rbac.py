@@ -5,16 +5,17 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 
-from models import User
+from core.permissions import permission_mask
+from services.user_cache_service import UserSnapshot
 
 from .auth_dependency import CurrentUser, get_current_user
 
 
-def require_roles(*allowed_roles: str) -> Callable[[User], User]:
+def require_roles(*allowed_roles: str) -> Callable[[UserSnapshot], UserSnapshot]:
     if not allowed_roles:
         raise ValueError("require_roles 至少需要一个角色")
 
-    def _guard(user: CurrentUser) -> User:
+    def _guard(user: CurrentUser) -> UserSnapshot:
         if user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -26,14 +27,36 @@ def require_roles(*allowed_roles: str) -> Callable[[User], User]:
     return Depends(_guard)  # type: ignore[return-value]
 
 
+def require_permissions(*permissions: str) -> Callable[[UserSnapshot], UserSnapshot]:
+    """路由级权限声明：掩码在声明时编译（未注册的权限名在导入阶段即报错），请求时仅做一次与运算。"""
+    if not permissions:
+        raise ValueError("require_permissions 至少需要一个权限")
+    required = permission_mask(*permissions)
+
+    def _guard(user: CurrentUser) -> UserSnapshot:
+        if user.permissions & required != required:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail={"message": f"权限不足，需要权限: {','.join(permissions)}"},
+            )
+        return user
+
+    return Depends(_guard)  # type: ignore[return-value]
+
+
 # 便捷别名
-Admin = Annotated[User, require_roles("admin")]
-UserOrAdmin = Annotated[User, require_roles("user", "admin")]
+Admin = Annotated[UserSnapshot, require_roles("admin")]
+UserOrAdmin = Annotated[UserSnapshot, require_roles("user", "admin")]
+StudentsReader = Annotated[UserSnapshot, require_permissions("students:read")]
+StudentsWriter = Annotated[UserSnapshot, require_permissions("students:write")]
 
 __all__ = [
     "Admin",
     "CurrentUser",
+    "StudentsReader",
+    "StudentsWriter",
     "UserOrAdmin",
     "get_current_user",
+    "require_permissions",
     "require_roles",
 ]
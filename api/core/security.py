@@ -1,10 +1,25 @@
-from typing import Final
+from __future__ import annotations
 
 from argon2 import PasswordHasher
 from argon2 import exceptions as argon2_exceptions
 
-# 采用 argon2id（PasswordHasher 默认即为 argon2id），参数取库默认的安全值
-_HASHER: Final[PasswordHasher] = PasswordHasher()
+# 采用 argon2id（PasswordHasher 默认即为 argon2id）。
+# 时间/内存/并行度来自配置（ARGON2_*，可用 `python -m utils.calibrate_argon2` 按部署机器标定），
+# 首次使用时才读取配置：utils 包会反向导入本模块，模块级读取会形成循环导入。
+_hasher: PasswordHasher | None = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        from utils.config import settings
+
+        _hasher = PasswordHasher(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        )
+    return _hasher
 
 
 def hash_password(password: str) -> str:
@@ -23,7 +38,7 @@ def hash_password(password: str) -> str:
     if not isinstance(password, str) or not password:
         raise ValueError("password must be a non-empty string")
     # Argon2 会自动生成随机盐并编码到返回字符串中
-    return _HASHER.hash(password)
+    return get_password_hasher().hash(password)
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
@@ -42,8 +57,20 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
     if not plain_password or not password_hash:
         return False
     try:
-        return _HASHER.verify(password_hash, plain_password)
+        return get_password_hasher().verify(password_hash, plain_password)
     except (argon2_exceptions.VerifyMismatchError, argon2_exceptions.InvalidHash):
         return False
     except Exception:
         return False
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """
+    判断已存储的哈希是否使用了与当前配置不同的参数（仅解析哈希串，不做计算）。
+
+    无法解析的哈希返回 False：此类哈希本就无法通过校验，无需重算。
+    """
+    try:
+        return get_password_hasher().check_needs_rehash(password_hash)
+    except (argon2_exceptions.InvalidHashError, ValueError):
+        return False
@@ -0,0 +1,99 @@
+"""已验证令牌声明的进程内缓存。
+
+同一个 access token 在有效期内会被前端反复携带，每次都执行 `jwt.decode`（HMAC + base64 + JSON）
+以及 UUID/时间戳校验是纯粹的重复劳动。这里以令牌摘要为键缓存校验通过的 claims：
+
+- 容量有上限（LRU 淘汰），避免被大量一次性令牌撑爆内存
+- 条目过期时间不晚于令牌自身的 `exp`，并受全局 TTL 上限约束
+- 只缓存校验成功的结果，任何失败都不会进入缓存
+- 提供命中/未命中/淘汰等计数，便于观测命中率
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+
+def token_digest(token: str) -> bytes:
+    """计算令牌摘要作为缓存键：定长且不在内存中保留原始令牌。
+
+    必须对完整字符串做单射编码：若丢弃任何字符，夹带额外字符的伪造令牌会与合法令牌共用缓存键，
+    从而命中缓存、绕过验签。
+    """
+    return hashlib.blake2b(token.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class VerifiedClaimsCache:
+    """有界 LRU 缓存：digest -> (过期时间戳, claims)。"""
+
+    def __init__(self, max_entries: int, max_ttl_seconds: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.max_ttl_seconds = max(0, int(max_ttl_seconds))
+        self._entries: OrderedDict[bytes, tuple[int, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_ttl_seconds > 0
+
+    def get(self, key: bytes, now_ts: int) -> dict[str, Any] | None:
+        """读取未过期的 claims；过期条目会被顺带移除并计为未命中。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if now_ts >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, key: bytes, claims: dict[str, Any], now_ts: int) -> None:
+        """写入校验通过的 claims，过期时间取 min(exp, now + max_ttl)。"""
+        if not self.enabled:
+            return
+        expires_at = min(int(claims["exp"]), now_ts + self.max_ttl_seconds)
+        if expires_at <= now_ts:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: bytes) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict[str, Any]:
+        """返回可观测指标（用于 /api/metrics/auth 与基准测试）。"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_ttl_seconds": self.max_ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
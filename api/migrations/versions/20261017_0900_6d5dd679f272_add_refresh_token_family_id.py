@@ -0,0 +1,51 @@
+"""add refresh token family_id
+
+Revision ID: 6d5dd679f272
+Revises: 5df1b2a8056b
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d5dd679f272'
+down_revision = '5df1b2a8056b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.String(length=36), nullable=True, comment='令牌家族ID（根令牌 JTI，轮换时继承）'))
+
+    # 回填：沿 parent_jti 链找到根令牌，家族ID 取根令牌 jti；
+    # 父记录缺失的令牌视为新根（与原先逐层追溯时遇到缺失父记录即停止的行为一致）
+    op.execute(
+        """
+        WITH RECURSIVE chain AS (
+            SELECT t.id, t.jti, t.jti AS root_jti
+            FROM refresh_tokens t
+            WHERE t.parent_jti IS NULL
+               OR NOT EXISTS (SELECT 1 FROM refresh_tokens p WHERE p.jti = t.parent_jti)
+            UNION ALL
+            SELECT c.id, c.jti, chain.root_jti
+            FROM refresh_tokens c
+            JOIN chain ON c.parent_jti = chain.jti
+        )
+        UPDATE refresh_tokens t
+        SET family_id = chain.root_jti
+        FROM chain
+        WHERE t.id = chain.id
+        """
+    )
+    # 兜底：理论上不存在的环状链，各自成为独立家族
+    op.execute("UPDATE refresh_tokens SET family_id = jti WHERE family_id IS NULL")
+
+    op.alter_column('refresh_tokens', 'family_id', existing_type=sa.String(length=36), nullable=False)
+    op.create_index('refresh_tokens_family_id_idx', 'refresh_tokens', ['family_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('refresh_tokens_family_id_idx', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'family_id')
@@ -0,0 +1,132 @@
+"""refresh_tokens partition by expires_at
+
+Revision ID: b71e5c09d4a3
+Revises: 8a3c41f0b9d2
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import os
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e5c09d4a3'
+down_revision = '8a3c41f0b9d2'
+branch_labels = None
+depends_on = None
+
+# 与 services/refresh_token_partition_service.py 的分区规则保持一致（迁移中固化，避免依赖应用代码）
+PARTITION_ANCHOR = datetime(1970, 1, 5)
+PARTITION_DAYS = int(os.getenv('REFRESH_TOKEN_PARTITION_DAYS', '7'))
+PARTITION_PREMAKE = int(os.getenv('REFRESH_TOKEN_PARTITION_PREMAKE', '4'))
+
+COLUMNS = (
+    'id, jti, parent_jti, family_id, user_id, issued_at, expires_at, used_at, '
+    'revoked, revoked_reason, device_id, ip, user_agent'
+)
+INDEXES = (
+    ('refresh_tokens_user_id_idx', 'user_id'),
+    ('refresh_tokens_parent_jti_idx', 'parent_jti'),
+    ('refresh_tokens_family_id_idx', 'family_id'),
+    ('refresh_tokens_expires_at_idx', 'expires_at'),
+)
+CONSTRAINT_INDEXES = ('refresh_tokens_pkey', 'refresh_tokens_jti_key')
+# 原始 DDL 建表不会带上列注释，重建后按此前迁移中的定义补回
+COLUMN_COMMENTS = (
+    ('id', '自增ID'),
+    ('jti', '当前刷新令牌 JTI(唯一)'),
+    ('parent_jti', '父刷新令牌 JTI，用于家族/链追踪'),
+    ('family_id', '令牌家族ID（根令牌 JTI，轮换时继承）'),
+    ('user_id', '用户ID'),
+    ('issued_at', '签发时间'),
+    ('expires_at', '过期时间'),
+    ('used_at', '已使用时间（轮换时置位）'),
+    ('revoked', '是否撤销'),
+    ('revoked_reason', '撤销原因'),
+    ('device_id', '设备ID'),
+    ('ip', 'IP 地址'),
+    ('user_agent', 'User-Agent'),
+)
+# 上一版本（8a3c41f0b9d2）为整表设置的 autovacuum 参数：分区父表不支持存储参数，改为设置在每个分区上
+# （与 services/refresh_token_partition_service.py 的 PARTITION_STORAGE_PARAMS 一致）
+STORAGE_PARAMS = 'autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02'
+
+
+def _partition_start(moment):
+    interval = timedelta(days=PARTITION_DAYS)
+    return PARTITION_ANCHOR + ((moment - PARTITION_ANCHOR) // interval) * interval
+
+
+def _create_table_sql(table, *, partitioned):
+    # 分区表的主键与唯一约束必须包含分区键 expires_at
+    key = 'id, expires_at' if partitioned else 'id'
+    unique = 'jti, expires_at' if partitioned else 'jti'
+    suffix = ' PARTITION BY RANGE (expires_at)' if partitioned else ''
+    return f"""
+        CREATE TABLE {table} (
+            id INTEGER NOT NULL DEFAULT nextval('refresh_tokens_id_seq'),
+            jti VARCHAR(36) NOT NULL,
+            parent_jti VARCHAR(36),
+            family_id VARCHAR(36) NOT NULL,
+            user_id UUID NOT NULL,
+            issued_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            used_at TIMESTAMP WITHOUT TIME ZONE,
+            revoked BOOLEAN DEFAULT '0' NOT NULL,
+            revoked_reason VARCHAR(200),
+            device_id VARCHAR(100),
+            ip VARCHAR(64),
+            user_agent VARCHAR(255),
+            CONSTRAINT refresh_tokens_pkey PRIMARY KEY ({key}),
+            CONSTRAINT refresh_tokens_jti_key UNIQUE ({unique}),
+            CONSTRAINT refresh_tokens_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ){suffix}
+    """
+
+
+def _rebuild(*, partitioned):
+    """把现有表改名为 refresh_tokens_old，按目标结构新建 refresh_tokens 并拷贝数据，最后删除旧表。"""
+    op.execute('ALTER TABLE refresh_tokens RENAME TO refresh_tokens_old')
+    for name in (*CONSTRAINT_INDEXES, *(index for index, _ in INDEXES)):
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_old')
+    # 序列脱离旧表，删除旧表时保留，新表继续沿用（id 不回退）
+    op.execute('ALTER SEQUENCE refresh_tokens_id_seq OWNED BY NONE')
+
+    op.execute(_create_table_sql('refresh_tokens', partitioned=partitioned))
+    for column, comment in COLUMN_COMMENTS:
+        op.execute(f"COMMENT ON COLUMN refresh_tokens.{column} IS '{comment}'")
+    if partitioned:
+        op.execute(f'CREATE TABLE refresh_tokens_default PARTITION OF refresh_tokens DEFAULT WITH ({STORAGE_PARAMS})')
+        bind = op.get_bind()
+        oldest = bind.execute(sa.text('SELECT min(expires_at) FROM refresh_tokens_old')).scalar()
+        now = bind.execute(sa.text("SELECT (now() AT TIME ZONE 'UTC')::timestamp")).scalar()
+        interval = timedelta(days=PARTITION_DAYS)
+        start = _partition_start(min(oldest, now) if oldest is not None else now)
+        last = _partition_start(now) + PARTITION_PREMAKE * interval
+        while start <= last:
+            op.execute(
+                f"CREATE TABLE refresh_tokens_p{start:%Y%m%d} PARTITION OF refresh_tokens "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{start + interval:%Y-%m-%d %H:%M:%S}') "
+                f"WITH ({STORAGE_PARAMS})"
+            )
+            start += interval
+
+    op.execute(f'INSERT INTO refresh_tokens ({COLUMNS}) SELECT {COLUMNS} FROM refresh_tokens_old')
+    op.execute('DROP TABLE refresh_tokens_old')
+    op.execute('ALTER SEQUENCE refresh_tokens_id_seq OWNED BY refresh_tokens.id')
+    for index, column in INDEXES:
+        op.create_index(index, 'refresh_tokens', [column], unique=False)
+
+
+def upgrade():
+    # 按 expires_at 范围分区：过期数据按分区整体 DROP，jti 查询带上 expires_at 只访问一个分区。
+    # 分区父表不支持存储参数，上一版本为整表设置的 autovacuum 参数改为在每个分区上设置（见 STORAGE_PARAMS）。
+    _rebuild(partitioned=True)
+
+
+def downgrade():
+    _rebuild(partitioned=False)
+    op.execute(f'ALTER TABLE refresh_tokens SET ({STORAGE_PARAMS})')
@@ -0,0 +1,53 @@
+"""partial and covering indexes for active refresh tokens
+
+Revision ID: c4f27a9e1b56
+Revises: b71e5c09d4a3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f27a9e1b56'
+down_revision = 'b71e5c09d4a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 分区父表上建索引会自动为每个分区建立对应索引（父表不支持 CONCURRENTLY）
+    # 活跃令牌：按 (jti, expires_at) 唯一，INCLUDE 不变列以支持 index-only 扫描；已撤销令牌单独建小索引
+    op.create_index(
+        'refresh_tokens_active_jti_idx', 'refresh_tokens', ['jti', 'expires_at'], unique=True,
+        postgresql_include=['family_id', 'user_id'], postgresql_where=sa.text('revoked IS false'),
+    )
+    op.create_index(
+        'refresh_tokens_revoked_jti_idx', 'refresh_tokens', ['jti', 'expires_at'], unique=False,
+        postgresql_where=sa.text('revoked IS true'),
+    )
+    # 两个部分索引合起来覆盖全部行，原全量唯一约束不再需要
+    op.drop_constraint('refresh_tokens_jti_key', 'refresh_tokens', type_='unique')
+
+    op.drop_index('refresh_tokens_user_id_idx', table_name='refresh_tokens')
+    op.drop_index('refresh_tokens_parent_jti_idx', table_name='refresh_tokens')
+    op.create_index(
+        'refresh_tokens_active_user_id_idx', 'refresh_tokens', ['user_id'], unique=False,
+        postgresql_where=sa.text('revoked IS false'),
+    )
+    op.create_index(
+        'refresh_tokens_active_parent_jti_idx', 'refresh_tokens', ['parent_jti'], unique=False,
+        postgresql_where=sa.text('revoked IS false'),
+    )
+
+
+def downgrade():
+    op.drop_index('refresh_tokens_active_parent_jti_idx', table_name='refresh_tokens')
+    op.drop_index('refresh_tokens_active_user_id_idx', table_name='refresh_tokens')
+    op.create_index('refresh_tokens_parent_jti_idx', 'refresh_tokens', ['parent_jti'], unique=False)
+    op.create_index('refresh_tokens_user_id_idx', 'refresh_tokens', ['user_id'], unique=False)
+
+    op.create_unique_constraint('refresh_tokens_jti_key', 'refresh_tokens', ['jti', 'expires_at'])
+    op.drop_index('refresh_tokens_revoked_jti_idx', table_name='refresh_tokens')
+    op.drop_index('refresh_tokens_active_jti_idx', table_name='refresh_tokens')
@@ -0,0 +1,87 @@
+"""compact refresh_tokens columns: uuid jti, inet ip, user_agents dictionary
+
+Revision ID: d2e8b4a61f07
+Revises: c4f27a9e1b56
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8b4a61f07'
+down_revision = 'c4f27a9e1b56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 1) User-Agent 字典表，并从现有记录回填
+    op.create_table(
+        'user_agents',
+        sa.Column('id', sa.Integer(), nullable=False, comment='自增ID'),
+        sa.Column('user_agent', sa.String(length=255), nullable=False, comment='User-Agent 原文（超长截断）'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_agent', name='user_agents_user_agent_key'),
+    )
+    op.execute(
+        'INSERT INTO user_agents (user_agent) '
+        'SELECT DISTINCT user_agent FROM refresh_tokens WHERE user_agent IS NOT NULL '
+        'ON CONFLICT (user_agent) DO NOTHING'
+    )
+    op.add_column(
+        'refresh_tokens',
+        sa.Column('user_agent_id', sa.Integer(), nullable=True, comment='User-Agent（user_agents 字典ID）'),
+    )
+    op.execute(
+        'UPDATE refresh_tokens SET user_agent_id = ua.id FROM user_agents ua '
+        'WHERE refresh_tokens.user_agent = ua.user_agent'
+    )
+    op.drop_column('refresh_tokens', 'user_agent')
+    op.create_foreign_key(
+        'refresh_tokens_user_agent_id_fkey', 'refresh_tokens', 'user_agents', ['user_agent_id'], ['id']
+    )
+
+    # 2) jti/parent_jti/family_id 改为原生 uuid，ip 改为 inet；一条 ALTER TABLE 只重写一次表（各分区）与相关索引。
+    # 历史记录中无法解析的 ip（如代理透传的异常头）置为 NULL，不阻塞迁移
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.safe_inet(value text) RETURNS inet AS $$
+        BEGIN
+            RETURN value::inet;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+    op.execute(
+        'ALTER TABLE refresh_tokens '
+        'ALTER COLUMN jti TYPE uuid USING jti::uuid, '
+        'ALTER COLUMN parent_jti TYPE uuid USING parent_jti::uuid, '
+        'ALTER COLUMN family_id TYPE uuid USING family_id::uuid, '
+        'ALTER COLUMN ip TYPE inet USING pg_temp.safe_inet(ip)'
+    )
+
+
+def downgrade():
+    op.execute(
+        'ALTER TABLE refresh_tokens '
+        'ALTER COLUMN jti TYPE varchar(36) USING jti::text, '
+        'ALTER COLUMN parent_jti TYPE varchar(36) USING parent_jti::text, '
+        'ALTER COLUMN family_id TYPE varchar(36) USING family_id::text, '
+        'ALTER COLUMN ip TYPE varchar(64) USING host(ip)'
+    )
+
+    op.add_column(
+        'refresh_tokens',
+        sa.Column('user_agent', sa.String(length=255), nullable=True, comment='User-Agent'),
+    )
+    op.execute(
+        'UPDATE refresh_tokens SET user_agent = ua.user_agent FROM user_agents ua '
+        'WHERE refresh_tokens.user_agent_id = ua.id'
+    )
+    op.drop_constraint('refresh_tokens_user_agent_id_fkey', 'refresh_tokens', type_='foreignkey')
+    op.drop_column('refresh_tokens', 'user_agent_id')
+    op.drop_table('user_agents')
@@ -0,0 +1,36 @@
+"""refresh_tokens user sessions index for session listing and the per-user cap
+
+Revision ID: e6a3f9c27d18
+Revises: d2e8b4a61f07
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3f9c27d18'
+down_revision = 'd2e8b4a61f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (user_id, expires_at, id) 只收录未撤销且未使用的行（每个家族当前有效的令牌）：会话列表按 (expires_at, id)
+    # keyset 分页，登录时的并发会话上限检查走同一索引；以 user_id 开头，取代原 (user_id) 部分索引。
+    # 轮换过的祖先令牌 revoked 仍为 false，由 used_at IS NULL 排除，列表与上限检查不必回表丢弃祖先行
+    # （代价：认领 UPDATE 修改谓词列，不再是 HOT 更新）
+    op.create_index(
+        'refresh_tokens_user_sessions_idx', 'refresh_tokens', ['user_id', 'expires_at', 'id'], unique=False,
+        postgresql_where=sa.text('revoked IS false AND used_at IS NULL'),
+    )
+    op.drop_index('refresh_tokens_active_user_id_idx', table_name='refresh_tokens')
+
+
+def downgrade():
+    op.create_index(
+        'refresh_tokens_active_user_id_idx', 'refresh_tokens', ['user_id'], unique=False,
+        postgresql_where=sa.text('revoked IS false'),
+    )
+    op.drop_index('refresh_tokens_user_sessions_idx', table_name='refresh_tokens')
@@ -1,11 +1,14 @@
 from .base import Base
 from .refresh_tokens import RefreshToken
 from .students import Student
-from .users import User
+from .user_agents import UserAgent
+from .users import User, UserCredentials
 
 __all__ = [
     "Base",
     "RefreshToken",
     "Student",
     "User",
+    "UserAgent",
+    "UserCredentials",
 ]
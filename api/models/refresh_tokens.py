@@ -2,25 +2,39 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, and_
 from sqlalchemy.dialects.postgresql import UUID
 
 from .base import Base
+from .types import InetAddress
+
+
+def _default_family_id(context) -> str:
+    # 未显式指定家族时视为家族根令牌：family_id 即自身 jti
+    return context.get_current_parameters()["jti"]
 
 
 class RefreshToken(Base):
     """刷新令牌持久化记录。
 
     支持令牌家族（parent_jti）、轮换、撤销与审计。
+    family_id 为家族根令牌的 jti：登录时生成，轮换时继承，撤销整个家族只需一条按 family_id 的 UPDATE。
+
+    PostgreSQL 上该表按 expires_at 范围分区（见迁移 refresh_tokens_partition_by_expires_at），
+    分区表的主键与唯一索引必须包含分区键：物理主键为 (id, expires_at)，jti 唯一性由 (jti, expires_at) 上的
+    部分唯一索引保证。ORM 仍以 id 作为标识；按 jti 查询时需同时带上 expires_at（即 JWT 的 exp）才能裁剪到单个分区。
     """
 
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True, comment="自增ID")
 
-    # JWT 唯一 ID 与父链
-    jti = Column(String(36), unique=True, nullable=False, comment="当前刷新令牌 JTI(唯一)")
-    parent_jti = Column(String(36), nullable=True, comment="父刷新令牌 JTI，用于家族/链追踪")
+    # JWT 唯一 ID 与父链（原生 UUID，16 字节；Python 侧仍以字符串读写）
+    jti = Column(UUID(as_uuid=False), nullable=False, comment="当前刷新令牌 JTI(唯一)")
+    parent_jti = Column(UUID(as_uuid=False), nullable=True, comment="父刷新令牌 JTI，用于家族/链追踪")
+    family_id = Column(
+        UUID(as_uuid=False), nullable=False, default=_default_family_id, comment="令牌家族ID（根令牌 JTI，轮换时继承）"
+    )
 
     # 归属用户（PostgreSQL 原生 UUID）
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
@@ -34,13 +48,54 @@ class RefreshToken(Base):
     revoked = Column(Boolean, nullable=False, default=False, server_default="0", comment="是否撤销")
     revoked_reason = Column(String(200), nullable=True, comment="撤销原因")
     device_id = Column(String(100), nullable=True, comment="设备ID")
-    ip = Column(String(64), nullable=True, comment="IP 地址")
-    user_agent = Column(String(255), nullable=True, comment="User-Agent")
+    ip = Column(InetAddress(), nullable=True, comment="IP 地址")
+    user_agent_id = Column(
+        Integer, ForeignKey("user_agents.id"), nullable=True, comment="User-Agent（user_agents 字典ID）"
+    )
 
     __table_args__ = (
         # 常用查询字段索引
-        Index("refresh_tokens_user_id_idx", "user_id"),
-        Index("refresh_tokens_parent_jti_idx", "parent_jti"),
+        # 热路径只关心未撤销的令牌：部分索引只收录 revoked = false 的行，撤销后的历史不再占用热索引。
+        # （“未过期”无法写成索引谓词——now() 不是不可变函数；过期数据由按 expires_at 的分区整体删除）
+        # 认领/宽限校验/登出按 (jti, expires_at) 定位活跃令牌；INCLUDE 不会变化的 family_id/user_id，
+        # 宽限校验与登出可走 index-only 扫描。
+        Index(
+            "refresh_tokens_active_jti_idx",
+            "jti",
+            "expires_at",
+            unique=True,
+            postgresql_include=["family_id", "user_id"],
+            postgresql_where=revoked.is_(False),
+            sqlite_where=revoked.is_(False),
+        ),
+        # 已撤销令牌只在认领失败的慢路径上查询（区分“已撤销”与“不存在”）
+        Index(
+            "refresh_tokens_revoked_jti_idx",
+            "jti",
+            "expires_at",
+            postgresql_where=revoked.is_(True),
+            sqlite_where=revoked.is_(True),
+        ),
+        # 会话列表与并发会话上限：按用户取每个家族当前有效的令牌，(expires_at, id) 倒序即最近活跃倒序，
+        # 兼作 keyset 分页游标。
+        # 轮换过的祖先令牌 revoked 仍为 false，谓词必须同时排除 used_at 已置位的行，否则索引随轮换历史增长，
+        # 列表/上限检查要回表读取并丢弃每一个祖先。代价：used_at 成为索引谓词列，认领 UPDATE 不再是 HOT 更新
+        # （每次轮换需为旧行的新版本写入各索引项）；换来的是会话查询的成本只与活跃会话数有关。
+        Index(
+            "refresh_tokens_user_sessions_idx",
+            "user_id",
+            "expires_at",
+            "id",
+            postgresql_where=and_(revoked.is_(False), used_at.is_(None)),
+            sqlite_where=and_(revoked.is_(False), used_at.is_(None)),
+        ),
+        Index(
+            "refresh_tokens_active_parent_jti_idx",
+            "parent_jti",
+            postgresql_where=revoked.is_(False),
+            sqlite_where=revoked.is_(False),
+        ),
+        Index("refresh_tokens_family_id_idx", "family_id"),
         Index("refresh_tokens_expires_at_idx", "expires_at"),
     )
 
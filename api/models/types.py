@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import ipaddress
+from typing import Any
+
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.types import TypeDecorator
+
+
+class InetAddress(TypeDecorator):
+    """IP 地址列：PostgreSQL 使用原生 INET（IPv4 7 字节、IPv6 19 字节），其他方言（测试用 SQLite）退化为字符串。
+
+    写入前规范化地址；无法解析的值（如代理透传的异常头）按 NULL 存储，不让令牌写入失败。
+    """
+
+    impl = String(45)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Any) -> Any:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(INET())
+        return dialect.type_descriptor(String(45))
+
+    def process_bind_param(self, value: Any, dialect: Any) -> str | None:
+        if value is None:
+            return None
+        try:
+            return str(ipaddress.ip_address(str(value).strip()))
+        except ValueError:
+            return None
+
+    def process_result_value(self, value: Any, dialect: Any) -> str | None:
+        # psycopg 将 INET 解析为 ipaddress 对象，统一返回字符串
+        return None if value is None else str(value)
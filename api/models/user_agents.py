@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer, String
+
+from .base import Base
+
+
+class UserAgent(Base):
+    """User-Agent 字典表。
+
+    refresh_tokens 只保存 user_agent_id（4 字节），相同的 User-Agent 字符串全表只存一份。
+    记录只增不删；写入与进程内缓存见 services/user_agent_service.py。
+    """
+
+    __tablename__ = "user_agents"
+
+    id = Column(Integer, primary_key=True, comment="自增ID")
+    user_agent = Column(String(255), unique=True, nullable=False, comment="User-Agent 原文（超长截断）")
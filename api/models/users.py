@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from uuid import uuid4
+import uuid
+from dataclasses import dataclass
+from typing import Any
 
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Integer, String, bindparam, select
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.ids import uuid7
 
 from .base import Base
 
@@ -13,12 +18,12 @@ class User(Base):
 
     __tablename__ = "users"
 
-    # 使用 PostgreSQL 原生 UUID 作为主键
+    # 使用 PostgreSQL 原生 UUID 作为主键；新用户由应用生成时间有序的 UUIDv7（已有的 v4 主键保持不变）
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
         comment="用户ID(UUID)",
-        default=uuid4,
+        default=uuid7,
     )
 
     # 基本账号信息
@@ -44,3 +49,47 @@ class User(Base):
             "is_active": self.is_active,
             "token_version": self.token_version,
         }
+
+
+_users = User.__table__
+_CREDENTIAL_COLUMNS = (_users.c.id, _users.c.password_hash, _users.c.role, _users.c.is_active, _users.c.token_version)
+# 预构建、参数化的 Core 查询：直接基于表列（不经 ORM 实体属性），执行时命中编译缓存，
+# 也省去每次按列生成缓存键与 ORM 结果加载的开销
+_CREDENTIALS_BY_USERNAME = select(*_CREDENTIAL_COLUMNS).where(_users.c.username == bindparam("username"))
+_CREDENTIALS_BY_ID = select(*_CREDENTIAL_COLUMNS).where(_users.c.id == bindparam("user_id"))
+
+
+@dataclass(frozen=True, slots=True)
+class UserCredentials:
+    """登录、改密等认证路径使用的窄读模型。
+
+    只查询认证所需的列并以普通行加载：不实例化 ORM 对象、不进入 identity map，也不跟踪修改。
+    需要写回时使用按 id 的 UPDATE，而不是修改对象后 flush。
+    """
+
+    id: uuid.UUID
+    password_hash: str
+    role: str
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    async def by_username(cls, db: AsyncSession, username: str) -> UserCredentials | None:
+        return cls.from_row((await db.execute(_CREDENTIALS_BY_USERNAME, {"username": username})).first())
+
+    @classmethod
+    async def by_id(cls, db: AsyncSession, user_id: uuid.UUID) -> UserCredentials | None:
+        return cls.from_row((await db.execute(_CREDENTIALS_BY_ID, {"user_id": user_id})).first())
+
+    @classmethod
+    def from_row(cls, row: Any) -> UserCredentials | None:
+        if row is None:
+            return None
+        user_id, password_hash, role, is_active, token_version = row
+        return cls(
+            id=user_id,
+            password_hash=password_hash,
+            role=role,
+            is_active=bool(is_active),
+            token_version=int(token_version or 1),
+        )
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Annotated, Any
 
 from pydantic import BaseModel, EmailStr, Field
 
+from utils.config import settings
+
 
 class LoginRequest(BaseModel):
     username: str = Field(..., min_length=1, max_length=50)
@@ -50,6 +52,15 @@ class ResetPasswordRequest(BaseModel):
     confirm_password: str = Field(..., min_length=6, max_length=200)
 
 
+# 单个令牌长度上限：正常 access token 远小于该值，超长字符串在校验阶段拒绝，不进入解码与验签
+IntrospectToken = Annotated[str, Field(min_length=1, max_length=4096)]
+
+
+class IntrospectRequest(BaseModel):
+    # 批量上限由 INTROSPECTION_MAX_BATCH 控制：在请求校验阶段拒绝超限批次（422），不进入服务层
+    tokens: list[IntrospectToken] = Field(..., min_length=1, max_length=settings.INTROSPECTION_MAX_BATCH)
+
+
 class BasicResponse(BaseModel):
     code: int
     message: str
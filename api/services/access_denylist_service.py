@@ -0,0 +1,196 @@
+"""access token 注销名单（jti denylist）。
+
+登出时 refresh 家族会被撤销，但已签发的 access token 在过期前仍然可用；
+本服务记录被注销的 access token jti，鉴权依赖据此拒绝。
+
+Redis Key 设计：
+- auth:access:denylist - ZSET，member 为 jti，score 为注销时间（Unix 秒）
+  超过 access 令牌最长有效期的条目不可能再对应有效令牌，注销时顺带清理
+
+进程内布隆过滤器：
+- 每个 worker 的后台任务（随应用生命周期启动）每 ACCESS_DENYLIST_SYNC_SECONDS 秒增量同步一次（按 score 拉取新条目），
+  同步不在请求路径上执行；为容忍时钟偏差，增量同步会回看 CLOCK_SKEW_SECONDS 秒，重复拉到的 jti 不计入占用
+- 查询时布隆未命中即放行（无网络开销）；命中才用 ZSCORE 向 Redis 确认，排除误判
+- 尚未完成首次同步时，查询会等待同步完成（已有同步进行中则等待同一次）；
+  后台任务未运行（同步逾期超过一个周期）时在后台补发一次同步
+- 容量按 ACCESS_TOKEN_EXPIRES_MINUTES × 每分钟注销量估算；每个 access 有效期全量重建一次，
+  以丢弃已过期的条目（布隆过滤器不支持删除）
+- 本进程发起的注销立即写入本地过滤器；其他 worker 最多滞后一个同步周期
+
+Redis 不可用时：同步失败则沿用旧过滤器；布隆命中但无法确认时按已注销处理（拒绝优先）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from redis import asyncio as aioredis
+
+from core.bloom import BloomFilter
+from utils.config import settings
+from utils.logging import get_logger
+from utils.redis_client import RedisBreaker, get_redis
+
+logger = get_logger()
+
+
+class AccessDenylistService:
+    """access token jti 注销名单（Redis ZSET + 进程内布隆过滤器）。"""
+
+    KEY = "auth:access:denylist"
+    # 增量同步时向前回看的秒数，容忍各 worker 之间的时钟偏差
+    CLOCK_SKEW_SECONDS = 5
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None = None,
+        *,
+        sync_interval_seconds: float | None = None,
+        revocations_per_minute: int | None = None,
+        false_positive_rate: float | None = None,
+    ) -> None:
+        """初始化服务。
+
+        Args:
+            redis: 可选的 Redis 客户端，用于测试注入。默认使用全局单例。
+            sync_interval_seconds: 增量同步间隔，默认取配置。
+            revocations_per_minute: 预估的每分钟注销量（用于布隆过滤器容量），默认取配置。
+            false_positive_rate: 布隆过滤器目标误判率，默认取配置。
+        """
+        self._redis = redis
+        self.sync_interval_seconds = (
+            settings.ACCESS_DENYLIST_SYNC_SECONDS if sync_interval_seconds is None else sync_interval_seconds
+        )
+        per_minute = (
+            settings.ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE
+            if revocations_per_minute is None
+            else revocations_per_minute
+        )
+        self.false_positive_rate = (
+            settings.ACCESS_DENYLIST_FALSE_POSITIVE_RATE if false_positive_rate is None else false_positive_rate
+        )
+        self.window_seconds = settings.ACCESS_TOKEN_EXPIRES_MINUTES * 60
+        # 两次全量重建之间最多累积两个有效期窗口的条目
+        self.capacity = max(per_minute * settings.ACCESS_TOKEN_EXPIRES_MINUTES * 2, 1)
+
+        self._filter = BloomFilter(self.capacity, self.false_positive_rate)
+        self._cursor: float | None = None  # 已同步到的最大 score；None 表示需要全量重建
+        self._rebuild_at = 0.0
+        self._next_sync_at = 0.0
+        # 进行中的同步任务：并发调用方共享同一次同步，而不是各自跳过
+        self._sync_task: asyncio.Task[None] | None = None
+        self._breaker = RedisBreaker("access token denylist")
+        self.checks = 0
+        self.bloom_hits = 0
+        self.confirmed = 0
+        self.last_synced_at: float | None = None
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = get_redis()
+        return self._redis
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """注销 access token（`expires_at` 为令牌的 exp，已过期的令牌无需记录）。"""
+        now = time.time()
+        if expires_at <= now:
+            return
+        self._filter.add(jti)
+        try:
+            await self.redis.zadd(self.KEY, {jti: now})
+            await self.redis.zremrangebyscore(self.KEY, "-inf", now - self.window_seconds)
+        except Exception:
+            logger.exception("revoke access token %s failed", jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if self.last_synced_at is None:
+            # 尚未完成首次同步：空过滤器会放行所有已注销的令牌，必须等待（可能由他人发起的）同步完成
+            await self.sync()
+        elif time.monotonic() >= self._next_sync_at + self.sync_interval_seconds:
+            # 后台同步逾期（任务未运行）：在后台补发，不阻塞本次请求
+            self._start_sync()
+        if jti not in self._filter:
+            return False
+
+        self.bloom_hits += 1
+        if not self._breaker.available():
+            return True
+        try:
+            score = await self.redis.zscore(self.KEY, jti)
+        except Exception:
+            self._breaker.record_failure()
+            return True
+        if score is None or float(score) < time.time() - self.window_seconds:
+            return False
+        self.confirmed += 1
+        return True
+
+    async def sync(self) -> None:
+        """从 Redis 拉取新注销的 jti；已有同步进行中时等待其完成，而不是再发起一次。"""
+        # shield：调用方（请求）被取消时不连带取消其他调用方正在等待的同步
+        await asyncio.shield(self._start_sync())
+
+    def _start_sync(self) -> asyncio.Task[None]:
+        if self._sync_task is None or self._sync_task.done():
+            self._next_sync_at = time.monotonic() + self.sync_interval_seconds
+            self._sync_task = asyncio.create_task(self._sync_once())
+        return self._sync_task
+
+    async def _sync_once(self) -> None:
+        """执行一次同步；到达重建时间或过滤器饱和时全量重建。"""
+        if not self._breaker.available():
+            return
+        now = time.time()
+        rebuild = self._cursor is None or now >= self._rebuild_at or self._filter.saturated
+        since = now - self.window_seconds if rebuild else self._cursor - self.CLOCK_SKEW_SECONDS
+        try:
+            entries = await self.redis.zrangebyscore(self.KEY, since, "+inf", withscores=True)
+        except Exception:
+            self._breaker.record_failure()
+            return
+
+        target = BloomFilter(self.capacity, self.false_positive_rate) if rebuild else self._filter
+        cursor = since if rebuild else self._cursor
+        for member, score in entries:
+            target.add(member.decode() if isinstance(member, bytes) else str(member))
+            cursor = max(cursor, float(score))
+        if rebuild:
+            self._filter = target
+            self._rebuild_at = now + self.window_seconds
+        self._cursor = cursor
+        self.last_synced_at = now
+
+    async def run_periodic(self) -> None:
+        """应用内后台同步任务：每 sync_interval_seconds 秒增量同步一次，异常不中断循环。"""
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("access token denylist sync failed")
+            await asyncio.sleep(self.sync_interval_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._filter.stats(),
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+            "confirmed": self.confirmed,
+            "last_synced_at": self.last_synced_at,
+            "redis_available": self._breaker.available(),
+        }
+
+
+# 单例实例
+_service: AccessDenylistService | None = None
+
+
+def get_access_denylist_service() -> AccessDenylistService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = AccessDenylistService()
+    return _service
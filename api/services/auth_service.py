@@ -2,35 +2,92 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 from typing import Any
+from uuid import UUID
 
-import jwt
-from sqlalchemy import select
+from sqlalchemy import Insert, Table, Update, case, insert, literal, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.admission import AdmissionRejectedError
 from core.jwt_tokens import (
+    TokenBundle,
+    TokenError,
     TokenExpiredError,
     TokenInvalidError,
-    create_access_token,
-    create_refresh_token,
+    issue_token_pair,
     verify_token,
 )
-from core.security import verify_password
-from models import RefreshToken, User
+from core.password_hashing import hash_password_async, verify_password_async
+from core.security import password_needs_rehash
+from models import RefreshToken, User, UserCredentials
+from services.access_denylist_service import get_access_denylist_service
 from services.login_rate_limit_service import LoginRateLimitService, get_login_rate_limit_service
-from utils.config import settings
+from services.refresh_grace_service import RefreshGraceService, get_refresh_grace_service
+from services.session_service import SessionService, get_session_service
+from services.token_version_service import get_token_version_service, is_token_version_current
+from services.user_agent_service import UserAgentService, get_user_agent_service
 from utils.logging import get_logger
 
 logger = get_logger()
 
 
+def _refresh_expires_at(exp: Any) -> datetime:
+    """
+    刷新令牌记录的 expires_at 即 JWT 的 exp。
+
+    按 jti 定位记录时一并带上该条件：refresh_tokens 按 expires_at 分区后，规划器据此只访问一个分区。
+    """
+    return datetime.fromtimestamp(int(exp), UTC)
+
+
+def _claim_refresh_token(table: Table, jti: str, expires_at: datetime, now: datetime) -> Update:
+    """条件认领：仅当令牌存在、未使用且未撤销时置位 used_at，并返回继承所需字段。"""
+    return (
+        update(table)
+        .where(
+            table.c.jti == jti,
+            table.c.expires_at == expires_at,
+            table.c.used_at.is_(None),
+            table.c.revoked.is_(False),
+        )
+        .values(used_at=now)
+        .returning(table.c.jti, table.c.family_id, table.c.user_id)
+    )
+
+
+def _new_refresh_row(
+    tokens: TokenBundle, *, device_id: str | None, client_ip: str | None, user_agent_id: int | None
+) -> dict[str, Any]:
+    return {
+        "jti": tokens.refresh_jti,
+        "issued_at": tokens.refresh_issued_at,
+        "expires_at": tokens.refresh_expires_at,
+        "revoked": False,
+        "device_id": device_id,
+        "ip": client_ip,
+        "user_agent_id": user_agent_id,
+    }
+
+
 class AuthService:
-    def __init__(self, rate_limit_service: LoginRateLimitService | None = None) -> None:
+    def __init__(
+        self,
+        rate_limit_service: LoginRateLimitService | None = None,
+        grace_service: RefreshGraceService | None = None,
+        user_agent_service: UserAgentService | None = None,
+        session_service: SessionService | None = None,
+    ) -> None:
         """初始化 AuthService。
 
         Args:
             rate_limit_service: 可选的登录频率限制服务，用于测试注入。
+            grace_service: 可选的并发刷新宽限服务，用于测试注入。
+            user_agent_service: 可选的 User-Agent 字典服务，用于测试注入。
+            session_service: 可选的会话管理服务（并发会话上限），用于测试注入。
         """
         self._rate_limit_service = rate_limit_service
+        self._grace_service = grace_service
+        self._user_agent_service = user_agent_service
+        self._session_service = session_service
 
     @property
     def rate_limit_service(self) -> LoginRateLimitService:
@@ -38,6 +95,24 @@ class AuthService:
             self._rate_limit_service = get_login_rate_limit_service()
         return self._rate_limit_service
 
+    @property
+    def grace_service(self) -> RefreshGraceService:
+        if self._grace_service is None:
+            self._grace_service = get_refresh_grace_service()
+        return self._grace_service
+
+    @property
+    def user_agent_service(self) -> UserAgentService:
+        if self._user_agent_service is None:
+            self._user_agent_service = get_user_agent_service()
+        return self._user_agent_service
+
+    @property
+    def session_service(self) -> SessionService:
+        if self._session_service is None:
+            self._session_service = get_session_service()
+        return self._session_service
+
     @staticmethod
     def _normalize_utc(dt: datetime | None) -> datetime | None:
         """将 datetime 统一规范为 UTC 以便进行安全比较。"""
@@ -47,6 +122,23 @@ class AuthService:
             return dt.replace(tzinfo=UTC)
         return dt.astimezone(UTC)
 
+    @staticmethod
+    async def _upgrade_password_hash(db: AsyncSession, user: UserCredentials, password: str) -> None:
+        """按当前 Argon2 参数重算密码哈希；哈希繁忙时跳过，等下次登录再升级，不影响本次登录。
+
+        仅当存储的哈希仍是本次校验的那一个时才写回，避免覆盖并发的改密/重置。
+        """
+        try:
+            new_hash = await hash_password_async(password)
+        except AdmissionRejectedError:
+            logger.info("skip password rehash for user %s: hashing overloaded", user.id)
+            return
+        await db.execute(
+            update(User)
+            .where(User.id == user.id, User.password_hash == user.password_hash)
+            .values(password_hash=new_hash)
+        )
+
     async def login(
         self,
         *,
@@ -62,6 +154,8 @@ class AuthService:
         - 使用 Redis 检查账号是否锁定（频率限制）
         - 检查用户是否存在、是否启用
         - 验证密码，成功则签发 access/refresh 令牌
+        - 已存储哈希的 Argon2 参数与当前配置不一致时，用本次明文按新参数重算（与令牌记录同一事务提交）
+        - 超出并发会话上限时撤销最旧的会话（与新令牌同一事务）
         - 持久化刷新令牌记录（含 jti/生命周期/客户端信息）
         - 成功后重置 Redis 中的失败计数
         """
@@ -70,9 +164,8 @@ class AuthService:
             if await self.rate_limit_service.is_locked(username):
                 return {"code": 40301, "message": "账号已锁定，请稍后再试"}
 
-            stmt = select(User).filter(User.username == username)
-            result = await db.execute(stmt)
-            user: User | None = result.scalars().first()
+            # 只读取认证所需的列，不实例化 ORM 对象
+            user = await UserCredentials.by_username(db, username)
             if user is None:
                 # 匿名报错，不泄露用户名是否存在
                 # 注意：即使用户不存在也记录失败，防止用户名枚举
@@ -82,34 +175,36 @@ class AuthService:
             if not user.is_active:
                 return {"code": 40302, "message": "账号已禁用"}
 
-            if not verify_password(password, user.password_hash):
+            if not await verify_password_async(password, user.password_hash):
                 # 记录失败，Redis 自动处理窗口和锁定
                 attempts, locked = await self.rate_limit_service.record_failure(username)
                 if locked:
                     return {"code": 40301, "message": "账号已锁定，请稍后再试"}
                 return {"code": 40101, "message": "用户名或密码错误"}
 
-            # 密码通过：签发令牌，access/refresh 均携带角色
-            access_token = create_access_token(user.id, user.role)
-            refresh_token = create_refresh_token(user.id, user.role)
+            if password_needs_rehash(user.password_hash):
+                await self._upgrade_password_hash(db, user, password)
 
-            # 解析刷新令牌以获取 jti/iat/exp（保证与 JWT 完全一致）
-            claims = verify_token(refresh_token, "refresh")
-            issued_at = datetime.fromtimestamp(int(claims["iat"]), UTC)
-            expires_at = datetime.fromtimestamp(int(claims["exp"]), UTC)
+            # 密码通过：签发令牌，access/refresh 均携带角色；声明随令牌一并返回，无需再解码
+            tokens = issue_token_pair(user.id, user.role, user.token_version)
+
+            # 新会话占用一个名额：超出上限时撤销最旧的会话
+            await self.session_service.evict_excess_sessions(db, user.id)
 
-            # 持久化刷新令牌记录
+            # 持久化刷新令牌记录（User-Agent 存为字典 ID）
+            user_agent_id = await self.user_agent_service.resolve(db, user_agent)
             rt = RefreshToken(
-                jti=str(claims["jti"]),
+                jti=tokens.refresh_jti,
                 parent_jti=None,
+                family_id=tokens.refresh_jti,
                 user_id=user.id,
-                issued_at=issued_at,
-                expires_at=expires_at,
+                issued_at=tokens.refresh_issued_at,
+                expires_at=tokens.refresh_expires_at,
                 revoked=False,
                 revoked_reason=None,
                 device_id=device_id,
                 ip=client_ip,
-                user_agent=user_agent,
+                user_agent_id=user_agent_id,
             )
             db.add(rt)
             await db.commit()
@@ -122,59 +217,161 @@ class AuthService:
                 "code": 0,
                 "message": "ok",
                 "data": {
-                    "access_token": access_token,
-                    "refresh_token": refresh_token,
-                    "refresh_expires_at": int(expires_at.timestamp()),
+                    "access_token": tokens.access_token,
+                    "refresh_token": tokens.refresh_token,
+                    "refresh_expires_at": int(tokens.refresh_claims["exp"]),
                 },
             }
+        except AdmissionRejectedError:
+            # 哈希过载：交由全局异常处理器返回 503
+            raise
         except Exception:
             await db.rollback()
             logger.exception("Login failed")
             return {"code": 50010, "message": "登录失败"}
 
     # 刷新令牌：轮换与复用检测
-    async def _find_root_token(self, db: AsyncSession, token: RefreshToken) -> RefreshToken:
-        current = token
-        # 追溯父链直至根（parent_jti 为 None）
-        while current.parent_jti:
-            stmt = select(RefreshToken).filter(RefreshToken.jti == current.parent_jti)
-            result = await db.execute(stmt)
-            parent = result.scalars().first()
-            if parent is None:
-                break
-            current = parent
-        return current
-
-    async def _collect_family_jtis(self, db: AsyncSession, root_jti: str) -> set[str]:
-        # 通过逐层查询 parent_jti 构建家族成员集合（适用于小规模数据与测试场景）
-        family: set[str] = {root_jti}
-        frontier: set[str] = {root_jti}
-        while frontier:
-            stmt = select(RefreshToken).filter(RefreshToken.parent_jti.in_(list(frontier)))
-            result = await db.execute(stmt)
-            children = result.scalars().all()
-            next_frontier: set[str] = set()
-            for child in children:
-                if child.jti not in family:
-                    family.add(child.jti)
-                    next_frontier.add(child.jti)
-            frontier = next_frontier
-        return family
-
-    async def _revoke_family(self, db: AsyncSession, any_member: RefreshToken, reason: str) -> None:
-        root = await self._find_root_token(db, any_member)
-        family_jtis = await self._collect_family_jtis(db, root.jti)
-        stmt = select(RefreshToken).filter(RefreshToken.jti.in_(list(family_jtis)))
-        result = await db.execute(stmt)
-        tokens = result.scalars().all()
+    @staticmethod
+    async def _revoke_family(db: AsyncSession, *, jti: str, family_id: str, reason: str) -> None:
+        """
+        按 family_id 一条 UPDATE 撤销整个家族（命中 refresh_tokens_family_id_idx），不逐层追溯父链、不加载 ORM 对象。
+
+        - 已撤销的令牌保留原撤销原因
+        - 触发撤销的令牌若还未标记使用时间，这里顺带补记，便于审计
+        """
         now = datetime.now(UTC)
-        for t in tokens:
-            if not t.revoked:
-                t.mark_revoked(reason)
-            # 被复用的旧令牌若还未标记使用时间，这里顺带补记，便于审计
-            if t.jti == any_member.jti and t.used_at is None:
-                t.mark_used(now)
-        db.add_all(tokens)
+        presented = (RefreshToken.jti == jti) & RefreshToken.used_at.is_(None)
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.family_id == family_id,
+                or_(RefreshToken.revoked.is_(False), presented),
+            )
+            .values(
+                revoked=True,
+                revoked_reason=case((RefreshToken.revoked.is_(False), reason), else_=RefreshToken.revoked_reason),
+                used_at=case((presented, now), else_=RefreshToken.used_at),
+            )
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    def _build_rotation_statement(
+        *,
+        jti: str,
+        expires_at: datetime,
+        tokens: TokenBundle,
+        now: datetime,
+        device_id: str | None,
+        client_ip: str | None,
+        user_agent_id: int | None,
+    ) -> Insert:
+        """
+        单条语句完成轮换（PostgreSQL 数据修改 CTE）：
+
+            WITH claimed AS (
+                UPDATE refresh_tokens SET used_at = :now
+                WHERE jti = :jti AND expires_at = :exp AND used_at IS NULL AND NOT revoked
+                RETURNING jti, family_id, user_id
+            )
+            INSERT INTO refresh_tokens (...) SELECT :new_jti, claimed.jti, claimed.family_id, claimed.user_id, ...
+            FROM claimed RETURNING id
+
+        旧令牌未被认领（不存在/已撤销/已使用）时 claimed 为空，不插入任何记录。
+        """
+        table = RefreshToken.__table__
+        claimed = _claim_refresh_token(table, jti, expires_at, now).cte("claimed")
+        new_values = _new_refresh_row(tokens, device_id=device_id, client_ip=client_ip, user_agent_id=user_agent_id)
+        columns = ["parent_jti", "family_id", "user_id", *new_values]
+        source = select(
+            claimed.c.jti,
+            claimed.c.family_id,
+            claimed.c.user_id,
+            *(literal(value, table.c[name].type) for name, value in new_values.items()),
+        )
+        return insert(table).from_select(columns, source).returning(table.c.id)
+
+    async def _rotate_refresh_token(
+        self,
+        db: AsyncSession,
+        *,
+        jti: str,
+        expires_at: datetime,
+        tokens: TokenBundle,
+        now: datetime,
+        device_id: str | None,
+        client_ip: str | None,
+        user_agent_id: int | None,
+    ) -> bool:
+        """原子轮换：认领旧令牌并插入新记录，返回是否认领成功。"""
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = self._build_rotation_statement(
+                jti=jti,
+                expires_at=expires_at,
+                tokens=tokens,
+                now=now,
+                device_id=device_id,
+                client_ip=client_ip,
+                user_agent_id=user_agent_id,
+            )
+            return (await db.execute(stmt)).first() is not None
+
+        # 其他方言（如测试用 SQLite）不支持数据修改 CTE：同一事务内 UPDATE ... RETURNING + INSERT，语义一致
+        table = RefreshToken.__table__
+        claimed = (await db.execute(_claim_refresh_token(table, jti, expires_at, now))).first()
+        if claimed is None:
+            return False
+        new_values = _new_refresh_row(tokens, device_id=device_id, client_ip=client_ip, user_agent_id=user_agent_id)
+        await db.execute(
+            insert(table).values(
+                parent_jti=claimed.jti, family_id=claimed.family_id, user_id=claimed.user_id, **new_values
+            )
+        )
+        return True
+
+    async def _replay_rotation(self, db: AsyncSession, jti: str) -> dict[str, Any] | None:
+        """
+        宽限窗口内重复提交同一旧令牌：返回首个请求的轮换结果。
+
+        窗口内家族可能已被撤销（登出、其他复用检测），因此放行前确认新令牌仍然有效
+        （refresh_tokens_active_jti_idx 部分索引上的 index-only 点查）。
+        """
+        cached = await self.grace_service.recall(jti)
+        if cached is None:
+            return None
+        new_jti, data = cached
+        result = await db.execute(
+            select(RefreshToken.family_id).where(
+                RefreshToken.jti == new_jti,
+                RefreshToken.expires_at == _refresh_expires_at(data["refresh_expires_at"]),
+                RefreshToken.revoked.is_(False),
+            )
+        )
+        if result.first() is None:
+            return None
+        return {"code": 0, "message": "ok", "data": data}
+
+    async def _handle_rotation_rejected(self, db: AsyncSession, jti: str, expires_at: datetime) -> dict[str, Any]:
+        # 先查活跃令牌（refresh_tokens_active_jti_idx），未命中再查已撤销令牌（refresh_tokens_revoked_jti_idx）
+        by_jti = (RefreshToken.jti == jti, RefreshToken.expires_at == expires_at)
+        active = select(RefreshToken.family_id).where(*by_jti, RefreshToken.revoked.is_(False))
+        family_id = (await db.execute(active)).scalar_one_or_none()
+        if family_id is None:
+            revoked = select(RefreshToken.jti).where(*by_jti, RefreshToken.revoked.is_(True))
+            if (await db.execute(revoked)).first() is not None:
+                return {"code": 40112, "message": "刷新令牌已撤销"}
+            return {"code": 40110, "message": "刷新令牌不存在"}
+        if expires_at <= datetime.now(UTC):
+            return {"code": 40111, "message": "刷新令牌已过期"}
+
+        # 复用检测：同一刷新令牌再次使用（used_at 已置位）
+        try:
+            await self._revoke_family(db, jti=jti, family_id=family_id, reason="refresh token reuse detected")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("revoke family on reuse failed")
+        return {"code": 40112, "message": "检测到刷新令牌复用，会话已撤销"}
 
     async def refresh(
         self,
@@ -188,8 +385,12 @@ class AuthService:
         """
         刷新接口核心逻辑：
         - 校验 refresh_token（JWT 类型/过期/签名）
-        - 复用检测：若旧 token 已 used_at，则撤销整个家族并返回 401
-        - 轮换：标记旧 token.used_at，签发新 access 与新 refresh，并插入新记录（parent_jti=旧 jti）
+        - 版本校验：令牌 `ver` 低于用户当前 token_version（已改密/登出所有设备）则拒绝
+        - 轮换：一条条件语句认领旧 token（used_at IS NULL 且未撤销时置位 used_at）并插入新记录
+          （parent_jti=旧 jti，继承 family_id）；并发刷新中只有一个请求能认领成功
+        - 认领成功后、提交前以旧 jti 为键缓存轮换结果（REFRESH_REUSE_GRACE_SECONDS 秒），
+          多标签页并发提交同一旧令牌时，后到的请求直接拿到同一份结果，而不是触发复用检测
+        - 认领失败时再查询原因：不存在/已撤销/已过期直接返回，已使用则视为复用，撤销整个家族并返回 401
         """
         if not refresh_token:
             return {"code": 40110, "message": "缺少刷新令牌"}
@@ -204,116 +405,92 @@ class AuthService:
             logger.exception("verify refresh token failed")
             return {"code": 40110, "message": "刷新令牌无效"}
 
-        # 查找 DB 记录
-        jti = str(claims["jti"])
-        stmt = select(RefreshToken).filter(RefreshToken.jti == jti)
-        result = await db.execute(stmt)
-        rt: RefreshToken | None = result.scalars().first()
-        if rt is None:
-            return {"code": 40110, "message": "刷新令牌不存在"}
-
-        # 基本状态校验
-        now = datetime.now(UTC)
-        if rt.revoked:
-            return {"code": 40112, "message": "刷新令牌已撤销"}
-        if rt.is_expired(now):
-            return {"code": 40111, "message": "刷新令牌已过期"}
-
-        # 复用检测：同一刷新令牌再次使用
-        if rt.used_at is not None:
-            try:
-                await self._revoke_family(db, rt, "refresh token reuse detected")
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                logger.exception("revoke family on reuse failed")
-            return {"code": 40112, "message": "检测到刷新令牌复用，会话已撤销"}
+        # 令牌版本校验（版本表未命中时回源数据库）
+        try:
+            current_version = await get_token_version_service().resolve(db, UUID(str(claims["sub"])))
+        except Exception:
+            logger.exception("resolve token version failed")
+            return {"code": 50011, "message": "刷新失败"}
+        if current_version is None:
+            return {"code": 40110, "message": "刷新令牌无效"}
+        if not is_token_version_current(claims, current_version):
+            return {"code": 40112, "message": "登录状态已失效，请重新登录"}
 
-        # 正常轮换流程
+        jti = str(claims["jti"])
+        expires_at = _refresh_expires_at(claims["exp"])
         try:
-            # 标记旧 token 已使用
-            rt.mark_used(now)
-
-            # 签发新令牌
-            user_id = claims["sub"]
-            # 始终信任 refresh token 中的角色（已验签与基础校验）
-            role_value = claims.get("role")
-            access_token = create_access_token(user_id, role_value)
-            new_refresh = create_refresh_token(user_id, role_value)
-
-            new_claims = verify_token(new_refresh, "refresh")
-            issued_at = datetime.fromtimestamp(int(new_claims["iat"]), UTC)
-            expires_at = datetime.fromtimestamp(int(new_claims["exp"]), UTC)
-
-            new_rt = RefreshToken(
-                jti=str(new_claims["jti"]),
-                parent_jti=rt.jti,
-                user_id=rt.user_id,
-                issued_at=issued_at,
+            # 先签发新令牌（纯计算，始终信任已验签 refresh token 中的角色），
+            # 再以一条条件语句原子地“认领”旧令牌并插入新记录：并发刷新只有一个能认领成功
+            tokens = issue_token_pair(claims["sub"], claims.get("role"), current_version)
+            user_agent_id = await self.user_agent_service.resolve(db, user_agent)
+            rotated = await self._rotate_refresh_token(
+                db,
+                jti=jti,
                 expires_at=expires_at,
-                revoked=False,
-                revoked_reason=None,
+                tokens=tokens,
+                now=datetime.now(UTC),
                 device_id=device_id,
-                ip=client_ip,
-                user_agent=user_agent,
+                client_ip=client_ip,
+                user_agent_id=user_agent_id,
             )
+            if rotated:
+                data = {
+                    "access_token": tokens.access_token,
+                    "refresh_token": tokens.refresh_token,
+                    "refresh_expires_at": int(tokens.refresh_claims["exp"]),
+                }
+                # 宽限条目必须在提交前写入：并发的重复刷新阻塞在旧令牌的行锁上，提交释放锁后其认领立即失败
+                # 并读取宽限条目，若此时条目尚未写入就会被误判为复用而撤销整个家族。
+                # 提前写入是安全的：提交失败时新令牌不存在，重放前会确认新令牌记录存在且未撤销
+                await self.grace_service.remember(jti, tokens.refresh_jti, data)
+                await db.commit()
+                return {"code": 0, "message": "ok", "data": dict(data)}
+            await db.rollback()
 
-            db.add(rt)
-            db.add(new_rt)
-            await db.commit()
-
-            return {
-                "code": 0,
-                "message": "ok",
-                "data": {
-                    "access_token": access_token,
-                    "refresh_token": new_refresh,
-                    "refresh_expires_at": int(expires_at.timestamp()),
-                },
-            }
+            # 并发重复提交：宽限窗口内返回首个请求的轮换结果
+            replayed = await self._replay_rotation(db, jti)
+            if replayed is not None:
+                return replayed
         except Exception:
             await db.rollback()
             logger.exception("Refresh failed")
             return {"code": 50011, "message": "刷新失败"}
 
+        # 认领失败（慢路径）：查明原因，复用时撤销整个家族
+        return await self._handle_rotation_rejected(db, jti, expires_at)
+
+    async def _revoke_access_token(self, access_token: str) -> None:
+        try:
+            claims = verify_token(access_token, "access")
+        except TokenError:
+            # 无效或已过期的 access token 无需注销
+            return
+        await get_access_denylist_service().revoke(str(claims["jti"]), int(claims["exp"]))
+
     async def logout(
         self,
         *,
         db: AsyncSession,
         refresh_token: str | None,
+        access_token: str | None = None,
     ) -> dict[str, Any]:
         """
-        登出：撤销当前 refresh 家族（或当前链）。
+        登出：撤销当前 refresh 家族（或当前链），并将当前 access token 加入注销名单。
 
         - 若缺少/无效令牌：视为幂等操作，仍返回成功（仅清 Cookie）。
         - 若令牌有效或仅过期：定位家族并撤销。
         """
+        if access_token:
+            await self._revoke_access_token(access_token)
+
         if not refresh_token:
             return {"code": 0, "message": "ok"}
 
         claims: dict[str, Any] | None = None
         try:
-            # 优先严格校验；若仅过期则尝试解析以获取 jti
-            claims = verify_token(refresh_token, "refresh")
-        except TokenExpiredError:
-            try:
-                # 仅忽略过期进行解析，仍校验签名与必要字段
-                claims = jwt.decode(
-                    refresh_token,
-                    settings.JWT_SECRET,
-                    algorithms=[settings.JWT_ALGORITHM],
-                    options={
-                        "require": ["exp", "iat", "sub", "jti", "type"],
-                        "verify_exp": False,
-                        "verify_iat": False,
-                    },
-                )
-                # 类型保护
-                if claims.get("type") != "refresh":
-                    claims = None
-            except Exception:
-                claims = None
-        except TokenInvalidError:
+            # 忽略过期：已过期的刷新令牌仍需定位家族并撤销，签名与必要字段照常校验
+            claims = verify_token(refresh_token, "refresh", allow_expired=True)
+        except TokenError:
             claims = None
         except Exception:
             logger.exception("verify token in logout failed")
@@ -328,13 +505,18 @@ class AuthService:
             return {"code": 0, "message": "ok"}
 
         try:
-            stmt = select(RefreshToken).filter(RefreshToken.jti == jti)
-            result = await db.execute(stmt)
-            rt: RefreshToken | None = result.scalars().first()
-            if rt is None:
+            # 已撤销的令牌所在家族必然已整体撤销（撤销总是按家族进行），无需再处理；
+            # 只查未撤销记录的 family_id，命中 refresh_tokens_active_jti_idx 的 index-only 扫描
+            stmt = select(RefreshToken.family_id).where(
+                RefreshToken.jti == jti,
+                RefreshToken.expires_at == _refresh_expires_at(claims["exp"]),
+                RefreshToken.revoked.is_(False),
+            )
+            family_id = (await db.execute(stmt)).scalar_one_or_none()
+            if family_id is None:
                 return {"code": 0, "message": "ok"}
 
-            await self._revoke_family(db, rt, "logout")
+            await self._revoke_family(db, jti=jti, family_id=family_id, reason="logout")
             await db.commit()
             return {"code": 0, "message": "ok"}
         except Exception:
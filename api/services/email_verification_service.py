@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import hmac
 import os
 from datetime import UTC, datetime
 from typing import Any
@@ -9,7 +11,7 @@ from pydantic import EmailStr, TypeAdapter, ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.security import hash_password, verify_password
+from core.password_hashing import verify_password_async
 from models import User
 from utils.config import settings
 from utils.email import EmailNotConfiguredError, send_verification_email
@@ -43,6 +45,10 @@ class EmailVerificationService:
     # 验证码最大允许失败次数
     MAX_ATTEMPTS = 5
 
+    # 验证码摘要前缀（HMAC-SHA256）；旧版本写入的 Argon2 哈希以 "$argon2" 开头
+    CODE_DIGEST_PREFIX = "hmac-sha256$"
+    LEGACY_ARGON2_PREFIX = "$argon2"
+
     @classmethod
     def _build_code_key(cls, *, scene: str, email: str) -> str:
         return f"{cls.KEY_PREFIX_CODE}:{scene}:{email}"
@@ -55,6 +61,33 @@ class EmailVerificationService:
     def _build_rate_ip_key(cls, ip: str) -> str:
         return f"{cls.KEY_PREFIX_RATE_IP}:{ip}"
 
+    @classmethod
+    def _code_digest(cls, *, scene: str, email: str, code: str) -> str:
+        """
+        验证码摘要：以服务端密钥对 (场景, 邮箱, 验证码) 做 HMAC-SHA256。
+
+        验证码有效期短且限制了失败次数，无需密码级的慢哈希；绑定场景与邮箱使摘要无法挪用到其他 key，
+        服务端密钥保证即使 Redis 数据泄漏也无法离线枚举 6 位验证码。
+        """
+        secret = settings.EMAIL_VERIFICATION_CODE_SECRET
+        if secret:
+            key = secret.encode("utf-8")
+        else:
+            # 未单独配置时由 JWT_SECRET 派生，避免与签名密钥直接复用
+            key = hmac.new(settings.JWT_SECRET.encode("utf-8"), b"email-verification-code", hashlib.sha256).digest()
+        message = f"{scene}\x00{email}\x00{code}".encode()
+        return cls.CODE_DIGEST_PREFIX + hmac.new(key, message, hashlib.sha256).hexdigest()
+
+    @classmethod
+    async def _code_matches(cls, *, stored: str, scene: str, email: str, code: str) -> bool:
+        if stored.startswith(cls.CODE_DIGEST_PREFIX):
+            return hmac.compare_digest(stored, cls._code_digest(scene=scene, email=email, code=code))
+        if stored.startswith(cls.LEGACY_ARGON2_PREFIX):
+            # 兼容升级前已写入 Redis 的 Argon2 验证码哈希；
+            # 这类记录最多存活 EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES，之后可删除此分支
+            return await verify_password_async(code, stored)
+        return False
+
     @staticmethod
     def _generate_numeric_code(length: int = 6) -> str:
         # 生成指定位数的数字验证码（0-9）
@@ -91,10 +124,9 @@ class EmailVerificationService:
 
         try:
             # 异步查询用户信息
-            stmt = select(User).where(User.username == str(valid_email))
-            result = await db.execute(stmt)
-            existing: User | None = result.scalars().first()
-            if existing and existing.is_active:
+            # 只需判断账号是否存在且启用：单列查询，不加载 ORM 对象
+            is_active = (await db.execute(select(User.is_active).where(User.username == str(valid_email)))).scalar()
+            if is_active:
                 return {"code": 40901, "message": "邮箱已注册"}
         except Exception:
             logger.exception("check existing user for email failed")
@@ -130,8 +162,7 @@ class EmailVerificationService:
 
         # 生成验证码并写入 Redis
         code = self._generate_numeric_code(6)
-        # 复用密码哈希逻辑（argon2），避免自己管理盐值配置
-        code_hash = hash_password(code)
+        code_hash = self._code_digest(scene=self.SCENE_REGISTER, email=str(valid_email), code=code)
 
         ttl_seconds = settings.EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES * 60
         now = datetime.now(UTC)
@@ -195,10 +226,8 @@ class EmailVerificationService:
             return {"code": 42201, "message": "邮箱格式不合法"}
 
         try:
-            stmt = select(User).where(User.username == str(valid_email))
-            result = await db.execute(stmt)
-            existing: User | None = result.scalars().first()
-            if existing is None or not existing.is_active:
+            is_active = (await db.execute(select(User.is_active).where(User.username == str(valid_email)))).scalar()
+            if not is_active:
                 return {"code": 40401, "message": "邮箱不存在"}
         except Exception:
             logger.exception("check existing user for reset password failed")
@@ -230,7 +259,7 @@ class EmailVerificationService:
                 return {"code": 50021, "message": "发送验证码失败"}
 
         code = self._generate_numeric_code(6)
-        code_hash = hash_password(code)
+        code_hash = self._code_digest(scene=self.SCENE_RESET_PASSWORD, email=str(valid_email), code=code)
 
         ttl_seconds = settings.EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES * 60
         now = datetime.now(UTC)
@@ -325,10 +354,13 @@ class EmailVerificationService:
                 logger.exception("delete invalid verification code failed")
             return {"code": 40003, "message": "验证码错误次数过多，请重新获取"}
 
-        # 验证哈希：复用密码校验逻辑
+        # 校验摘要（常量时间比较）
         expected_hash = data.get("code_hash") or ""
+        matched = bool(expected_hash) and await self._code_matches(
+            stored=expected_hash, scene=scene, email=str(valid_email), code=code
+        )
 
-        if not expected_hash or not verify_password(code, expected_hash):
+        if not matched:
             # 验证失败：失败次数 +1
             failed_attempts += 1
             try:
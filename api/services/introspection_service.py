@@ -0,0 +1,87 @@
+"""令牌内省服务 - 供内网服务批量校验用户 access token。
+
+一次请求处理一批令牌（批量与单个令牌的长度上限由 IntrospectRequest 在请求校验阶段保证）：
+- 每个令牌独立验签（命中已验证声明缓存时跳过验签），并检查 access token 注销名单
+- 令牌版本一次 HMGET，用户状态经快照缓存批量读取，未命中部分一次 IN 查询回源
+- 按入参顺序逐个返回结果；单个令牌无效不影响其他令牌
+
+返回结构参考 RFC 7662：`active` 为 True 时附带 sub/username/role/exp 等声明，
+为 False 时仅附带 `reason`（expired/invalid/revoked/user_not_found/user_disabled）。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.jwt_tokens import TokenError, TokenExpiredError, verify_token_cached
+from core.permissions import effective_permission_mask
+from services.access_denylist_service import get_access_denylist_service
+from services.token_version_service import get_token_version_service, is_token_version_current
+from services.user_cache_service import get_user_cache_service
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+class IntrospectionService:
+    async def introspect(self, *, db: AsyncSession, tokens: list[str]) -> dict[str, Any]:
+        # 同一批次中的重复令牌只校验一次
+        claims_by_token: dict[str, dict[str, Any]] = {}
+        results: dict[str, dict[str, Any]] = {}
+        for token in dict.fromkeys(tokens):
+            try:
+                claims = verify_token_cached(token, "access")
+                UUID(str(claims["sub"]))
+            except TokenExpiredError:
+                results[token] = {"active": False, "reason": "expired"}
+                continue
+            except (TokenError, ValueError):
+                results[token] = {"active": False, "reason": "invalid"}
+                continue
+            claims_by_token[token] = claims
+
+        # 注销名单：布隆过滤器未命中时无网络开销
+        denylist = get_access_denylist_service()
+        for token, claims in list(claims_by_token.items()):
+            if await denylist.is_revoked(str(claims["jti"])):
+                results[token] = {"active": False, "reason": "revoked"}
+                del claims_by_token[token]
+
+        if claims_by_token:
+            user_ids = list(dict.fromkeys(UUID(str(c["sub"])) for c in claims_by_token.values()))
+            try:
+                versions = await get_token_version_service().get_many(user_ids)
+                users = await get_user_cache_service().load_many(db, user_ids)
+            except Exception:
+                logger.exception("introspect load users failed")
+                return {"code": 50013, "message": "令牌校验失败"}
+
+            for token, claims in claims_by_token.items():
+                user_id = UUID(str(claims["sub"]))
+                user = users.get(user_id)
+                if user is None:
+                    results[token] = {"active": False, "reason": "user_not_found"}
+                elif not (
+                    is_token_version_current(claims, versions.get(user_id))
+                    and is_token_version_current(claims, user.token_version)
+                ):
+                    results[token] = {"active": False, "reason": "revoked"}
+                elif not user.is_active:
+                    results[token] = {"active": False, "reason": "user_disabled"}
+                else:
+                    results[token] = {
+                        "active": True,
+                        "sub": str(user.id),
+                        "username": user.username,
+                        "role": user.role,
+                        "perm": effective_permission_mask(claims.get("perm"), user.role),
+                        "token_type": claims["type"],
+                        "jti": claims["jti"],
+                        "iat": claims["iat"],
+                        "exp": claims["exp"],
+                    }
+
+        return {"code": 0, "message": "ok", "data": {"results": [results[token] for token in tokens]}}
@@ -3,25 +3,41 @@ from __future__ import annotations
 from typing import Any
 
 from pydantic import EmailStr, TypeAdapter, ValidationError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.security import hash_password, verify_password
-from models import User
+from core.admission import AdmissionRejectedError
+from core.password_hashing import hash_password_async, verify_password_async
+from models import User, UserCredentials
 from services.email_verification_service import EmailVerificationService
+from services.token_version_service import TokenVersionService, get_token_version_service
+from services.user_cache_service import UserSnapshot, get_user_cache_service
 from utils.logging import get_logger
 
 logger = get_logger()
 
 
 class PasswordService:
-    """密码相关业务逻辑：修改密码、忘记密码重置。"""
+    """密码相关业务逻辑：修改密码、忘记密码重置。
+
+    两者都会递增 token_version，使该用户此前签发的所有令牌（含当前会话）立即失效。
+    用户信息以窄读模型（UserCredentials）读取，新密码与版本号以一条按 id 的 UPDATE 写回。
+    """
+
+    @staticmethod
+    async def _set_password(db: AsyncSession, user: UserCredentials, new_password: str) -> None:
+        """写入新密码哈希并原子递增 token_version；提交后广播新版本并失效用户快照。"""
+        password_hash = await hash_password_async(new_password)
+        result = await db.execute(TokenVersionService.bump_statement(user.id, password_hash=password_hash))
+        token_version = int(result.scalar_one())
+        await db.commit()
+        await get_token_version_service().publish(user.id, token_version)
+        await get_user_cache_service().invalidate(user.id)
 
     async def change_password(
         self,
         *,
         db: AsyncSession,
-        user: User,
+        user: User | UserSnapshot,
         old_password: str,
         new_password: str,
         confirm_password: str,
@@ -35,14 +51,20 @@ class PasswordService:
         if len(new_password) < 6:
             return {"code": 42205, "message": "新密码长度至少 6 位"}
 
-        if not verify_password(old_password, user.password_hash):
+        # 鉴权依赖返回的是缓存快照（不含密码哈希），按 id 读取认证所需的列
+        credentials = await UserCredentials.by_id(db, user.id)
+        if credentials is None:
+            return {"code": 40401, "message": "用户不存在"}
+
+        if not await verify_password_async(old_password, credentials.password_hash):
             return {"code": 40010, "message": "旧密码错误"}
 
         try:
-            user.password_hash = hash_password(new_password)
-            db.add(user)
-            await db.commit()
+            await self._set_password(db, credentials, new_password)
             return {"code": 0, "message": "ok"}
+        except AdmissionRejectedError:
+            # 哈希过载：交由全局异常处理器返回 503
+            raise
         except Exception:
             await db.rollback()
             logger.exception("change password failed")
@@ -84,9 +106,7 @@ class PasswordService:
             return otp_result
 
         try:
-            stmt = select(User).where(User.username == str(valid_email))
-            result = await db.execute(stmt)
-            user: User | None = result.scalars().first()
+            user = await UserCredentials.by_username(db, str(valid_email))
             if user is None or not user.is_active:
                 return {"code": 40401, "message": "邮箱不存在"}
         except Exception:
@@ -94,10 +114,11 @@ class PasswordService:
             return {"code": 50031, "message": "重置密码失败"}
 
         try:
-            user.password_hash = hash_password(new_password)
-            db.add(user)
-            await db.commit()
+            await self._set_password(db, user, new_password)
             return {"code": 0, "message": "ok"}
+        except AdmissionRejectedError:
+            # 哈希过载：交由全局异常处理器返回 503
+            raise
         except Exception:
             await db.rollback()
             logger.exception("reset password failed")
@@ -0,0 +1,99 @@
+"""刷新令牌并发宽限窗口：缓存轮换结果，供重复提交同一旧令牌的请求直接复用。
+
+背景：
+- 多标签页、跨进程的前端 single-flight 刷新，会在毫秒级内把同一个 refresh Cookie 提交两次
+- 第二个请求认领失败（used_at 已置位）后会被判定为复用并撤销整个家族，用户被迫重新登录
+
+做法：
+- 轮换成功后，以旧 jti 为键把本次轮换结果（新 access/refresh 令牌）写入 Redis，存活 REFRESH_REUSE_GRACE_SECONDS 秒
+- 认领失败时先读该键：命中且新令牌未被撤销，则返回同一份结果；超出窗口才按复用处理
+- 只有持有旧令牌（已验签）的请求能命中，返回的新令牌与首个请求完全相同，不会派生出新的会话分支
+
+Redis Key 设计：
+- auth:refresh:rotated:{old_jti} - String（JSON），TTL 为宽限秒数
+
+Redis 不可用时读写均静默降级：宽限失效，行为退回“重复提交即视为复用”。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from redis import asyncio as aioredis
+
+from utils.config import settings
+from utils.logging import get_logger
+from utils.redis_client import RedisBreaker, get_redis
+
+logger = get_logger()
+
+
+class RefreshGraceService:
+    """以旧 jti 为键缓存轮换结果（Redis String + TTL）。"""
+
+    KEY_PREFIX = "auth:refresh:rotated:"
+
+    def __init__(self, redis: aioredis.Redis | None = None, *, grace_seconds: int | None = None) -> None:
+        """初始化服务。
+
+        Args:
+            redis: 可选的 Redis 客户端，用于测试注入。默认使用全局单例。
+            grace_seconds: 宽限窗口秒数，默认取配置；0 表示关闭。
+        """
+        self._redis = redis
+        self.grace_seconds = settings.REFRESH_REUSE_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        self._breaker = RedisBreaker("refresh grace window")
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = get_redis()
+        return self._redis
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_seconds > 0
+
+    def _key(self, jti: str) -> str:
+        return f"{self.KEY_PREFIX}{jti}"
+
+    async def remember(self, old_jti: str, new_jti: str, data: dict[str, Any]) -> None:
+        """记录一次轮换结果：old_jti 在宽限窗口内再次出现时返回同一份 data。"""
+        if not self.enabled or not self._breaker.available():
+            return
+        payload = json.dumps({"jti": new_jti, "data": data}, separators=(",", ":"))
+        try:
+            await self.redis.setex(self._key(old_jti), self.grace_seconds, payload)
+        except Exception:
+            self._breaker.record_failure()
+
+    async def recall(self, old_jti: str) -> tuple[str, dict[str, Any]] | None:
+        """读取宽限窗口内的轮换结果，返回 (新 jti, data)；未命中或不可用时返回 None。"""
+        if not self.enabled or not self._breaker.available():
+            return None
+        try:
+            raw = await self.redis.get(self._key(old_jti))
+        except Exception:
+            self._breaker.record_failure()
+            return None
+        if raw is None:
+            return None
+        try:
+            cached = json.loads(raw)
+            return str(cached["jti"]), dict(cached["data"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("malformed refresh grace entry for %s", old_jti)
+            return None
+
+
+# 单例实例
+_service: RefreshGraceService | None = None
+
+
+def get_refresh_grace_service() -> RefreshGraceService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = RefreshGraceService()
+    return _service
@@ -0,0 +1,257 @@
+"""refresh_tokens 按 expires_at 的时间范围分区维护（仅 PostgreSQL）。
+
+分区表结构由迁移 `refresh_tokens_partition_by_expires_at` 建立：
+- 按 expires_at 范围分区，每个分区覆盖 REFRESH_TOKEN_PARTITION_DAYS 天，边界按周一 00:00（UTC）对齐
+- 分区命名 refresh_tokens_pYYYYMMDD（分区起始日期）；另有 refresh_tokens_default 兜底，避免维护滞后时写入失败
+- 主键与唯一索引必须包含分区键：(id, expires_at)、(jti, expires_at)
+- 分区父表不支持存储参数，autovacuum 参数（PARTITION_STORAGE_PARAMS）在每个分区上设置：
+  当前分区承接全部 used_at/revoked 更新，及时 vacuum 才能回收死元组并保持可见性映射，令活跃令牌索引维持 index-only 扫描
+
+按 jti 的查询同时带上 expires_at（即 JWT 的 exp），规划器据此只访问一个分区，旧分区不会被扫描。
+
+维护：
+- 预建：保证当前分区及之后 REFRESH_TOKEN_PARTITION_PREMAKE 个分区存在（新令牌的 expires_at 总在未来）
+- 保留：上界早于清理截止时间的分区直接 DROP，不产生逐行删除的死元组与 WAL
+- refresh_tokens_default 中出现数据说明预建不足：PostgreSQL 不允许创建与 DEFAULT 分区中已有行重叠的分区，
+  因此在同一事务中 DETACH DEFAULT 分区、建新分区、把落入新分区范围的行迁入、再 ATTACH 回去，并记录告警；
+  DEFAULT 分区中超出保留期的行由清理服务分批逐行删除（见 RefreshTokenPurgeService）
+
+分区 DDL（CREATE TABLE ... PARTITION OF / DROP TABLE 分区）都要在热点父表上取 ACCESS EXCLUSIVE 锁
+（有 DEFAULT 分区时不能使用 DETACH PARTITION ... CONCURRENTLY，且它也不能在事务中执行），因此：
+- 每条 DDL 单独一个事务，先 pg_try_advisory_xact_lock(MAINTENANCE_LOCK_KEY)：同一时刻只有一个 worker/CLI 执行维护，
+  取不到锁说明其他进程正在维护，本轮直接放弃，不排队、也不互相竞争同一条 DDL
+- SET LOCAL lock_timeout（REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS）：父表上有长事务时 DDL 不会长时间排队
+  （排队期间会阻塞其后所有读写），超时放弃、下一轮重试；预建有数周余量，保留清理晚一轮无妨
+
+由 `RefreshTokenPurgeService` 在检测到分区表时调用；非 PostgreSQL 或未分区时各方法均为空操作。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+TABLE_NAME = "refresh_tokens"
+DEFAULT_PARTITION = "refresh_tokens_default"
+PARTITION_PREFIX = "refresh_tokens_p"
+# 分区边界的对齐基准：1970-01-05 为周一，7 天分区即自然周
+PARTITION_ANCHOR = datetime(1970, 1, 5)
+
+# 分区维护的咨询锁键（pg_try_advisory_xact_lock），各 worker 与 CLI 共用
+MAINTENANCE_LOCK_KEY = 7_305_871_204
+
+# 与迁移 tune_refresh_tokens_autovacuum 为未分区表设置的参数一致：2% 的行变更即触发 vacuum/analyze
+PARTITION_STORAGE_PARAMS = "autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02"
+
+_PARTITION_NAME_RE = re.compile(r"^refresh_tokens_p\d{8}$")
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # expires_at 为 timestamp without time zone，以 UTC 存储
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(UTC).replace(tzinfo=None)
+
+
+def partition_for(moment: datetime, interval_days: int) -> Partition:
+    """返回包含 moment 的分区（起止时间为 UTC naive）。"""
+    interval = timedelta(days=interval_days)
+    offset = (_naive_utc(moment) - PARTITION_ANCHOR) // interval
+    start = PARTITION_ANCHOR + offset * interval
+    return Partition(name=f"{PARTITION_PREFIX}{start:%Y%m%d}", start=start, end=start + interval)
+
+
+def plan_partitions(now: datetime, *, interval_days: int, premake: int) -> list[Partition]:
+    """当前分区及之后 premake 个分区。"""
+    current = partition_for(now, interval_days)
+    interval = timedelta(days=interval_days)
+    return [partition_for(current.start + i * interval, interval_days) for i in range(premake + 1)]
+
+
+def _literal(moment: datetime) -> str:
+    return f"'{moment:%Y-%m-%d %H:%M:%S}'"
+
+
+class RefreshTokenPartitionService:
+    def __init__(
+        self, *, interval_days: int | None = None, premake: int | None = None, lock_timeout_ms: int | None = None
+    ) -> None:
+        """初始化服务。
+
+        Args:
+            interval_days: 每个分区覆盖的天数，默认取配置（需与迁移建表时一致）。
+            premake: 预建的未来分区个数，默认取配置。
+            lock_timeout_ms: 分区 DDL 等待锁的上限（毫秒），默认取配置。
+        """
+        self.interval_days = max(1, settings.REFRESH_TOKEN_PARTITION_DAYS if interval_days is None else interval_days)
+        self.premake = max(0, settings.REFRESH_TOKEN_PARTITION_PREMAKE if premake is None else premake)
+        self.lock_timeout_ms = max(
+            1, settings.REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS if lock_timeout_ms is None else lock_timeout_ms
+        )
+
+    async def is_partitioned(self, db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        result = await db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+            {"table": TABLE_NAME},
+        )
+        return bool(result.scalar())
+
+    async def list_partitions(self, db: AsyncSession) -> list[Partition]:
+        """按起始时间排序的范围分区（不含 DEFAULT 分区）。"""
+        result = await db.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": TABLE_NAME},
+        )
+        partitions: list[Partition] = []
+        for name, bound in result.all():
+            match = _BOUND_RE.search(bound or "")
+            if match is None:
+                continue
+            partitions.append(
+                Partition(
+                    name=name, start=datetime.fromisoformat(match.group(1)), end=datetime.fromisoformat(match.group(2))
+                )
+            )
+        return sorted(partitions, key=lambda p: p.start)
+
+    async def default_partition_has_rows(self, db: AsyncSession, partition: Partition | None = None) -> bool:
+        """DEFAULT 分区中是否有数据；给定 partition 时只看落在其范围内的行。"""
+        sql = f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION}"
+        if partition is not None:
+            sql += f" WHERE expires_at >= {_literal(partition.start)} AND expires_at < {_literal(partition.end)}"
+        result = await db.execute(text(sql + ")"))
+        return bool(result.scalar())
+
+    async def _run_ddl(self, session_factory: async_sessionmaker[AsyncSession], *statements: str) -> bool | None:
+        """
+        在单独的事务中依次执行分区 DDL：先取维护咨询锁，再限定锁等待时间。
+
+        Returns: True 成功；False 失败（已记录日志，如锁等待超时）；None 其他进程正在维护，调用方应结束本轮。
+        """
+        async with session_factory() as db:
+            try:
+                locked = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+                if not locked.scalar():
+                    await db.rollback()
+                    return None
+                await db.execute(text(f"SET LOCAL lock_timeout = '{self.lock_timeout_ms}ms'"))
+                for statement in statements:
+                    await db.execute(text(statement))
+                await db.commit()
+                return True
+            except Exception:
+                await db.rollback()
+                logger.exception("refresh token partition DDL failed: %s", "; ".join(statements))
+                return False
+
+    async def ensure_partitions(self, session_factory: async_sessionmaker[AsyncSession], now: datetime) -> list[str]:
+        """
+        预建缺失的分区，返回新建的分区名；与已有分区重叠的计划分区跳过（分区粒度变更后不会报错）。
+
+        DEFAULT 分区中已有落入计划分区范围的行时，连同这些行的迁移一起完成（见 _move_from_default）。
+        """
+        async with session_factory() as db:
+            existing = await self.list_partitions(db)
+            missing = [
+                partition
+                for partition in plan_partitions(now, interval_days=self.interval_days, premake=self.premake)
+                if not any(p.start < partition.end and partition.start < p.end for p in existing)
+            ]
+            stranded = {p.name for p in missing if await self.default_partition_has_rows(db, p)}
+
+        created: list[str] = []
+        for partition in missing:
+            ddl = (
+                f"CREATE TABLE IF NOT EXISTS {partition.name} PARTITION OF {TABLE_NAME} "
+                f"FOR VALUES FROM ({_literal(partition.start)}) TO ({_literal(partition.end)}) "
+                f"WITH ({PARTITION_STORAGE_PARAMS})"
+            )
+            if partition.name in stranded:
+                logger.warning(
+                    "%s contains rows for %s; moving them, premake more partitions ahead",
+                    DEFAULT_PARTITION,
+                    partition.name,
+                )
+                outcome = await self._run_ddl(session_factory, *self._move_from_default(partition, ddl))
+            else:
+                outcome = await self._run_ddl(session_factory, ddl)
+            if outcome is None:
+                logger.info("refresh token partition maintenance is running elsewhere; skip this round")
+                break
+            if outcome:
+                created.append(partition.name)
+        if created:
+            logger.info("created refresh token partitions: %s", ", ".join(created))
+        return created
+
+    @staticmethod
+    def _move_from_default(partition: Partition, create_ddl: str) -> list[str]:
+        """
+        DEFAULT 分区含有新分区范围内的行时无法直接建分区：先 DETACH DEFAULT 分区再建分区，
+        把这些行从 DEFAULT 分区移入新分区，最后 ATTACH 回去（同一事务，父表锁一直持有到提交）。
+        """
+        in_range = f"expires_at >= {_literal(partition.start)} AND expires_at < {_literal(partition.end)}"
+        return [
+            f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {DEFAULT_PARTITION}",
+            create_ddl,
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {partition.name} SELECT * FROM moved",
+            f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT",
+        ]
+
+    async def drop_expired_partitions(
+        self, session_factory: async_sessionmaker[AsyncSession], cutoff: datetime
+    ) -> list[str]:
+        """DROP 上界不晚于 cutoff 的分区（整个分区均已超出保留期），返回删除的分区名。"""
+        async with session_factory() as db:
+            partitions = await self.list_partitions(db)
+
+        limit = _naive_utc(cutoff)
+        dropped: list[str] = []
+        for partition in partitions:
+            if partition.end > limit or not _PARTITION_NAME_RE.match(partition.name):
+                continue
+            # 直接 DROP 分区（与 DETACH + DROP 取同样的父表锁，但只需一条语句）；并发删除时 IF EXISTS 保持幂等
+            outcome = await self._run_ddl(session_factory, f"DROP TABLE IF EXISTS {partition.name}")
+            if outcome is None:
+                logger.info("refresh token partition maintenance is running elsewhere; skip this round")
+                break
+            if outcome:
+                dropped.append(partition.name)
+        if dropped:
+            logger.info("dropped expired refresh token partitions: %s", ", ".join(dropped))
+        return dropped
+
+
+# 单例实例
+_service: RefreshTokenPartitionService | None = None
+
+
+def get_refresh_token_partition_service() -> RefreshTokenPartitionService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = RefreshTokenPartitionService()
+    return _service
@@ -0,0 +1,215 @@
+"""过期刷新令牌清理：分批删除超出保留期的 refresh_tokens 记录。
+
+refresh_tokens 只会被标记 revoked/used_at，从不删除；表与索引持续膨胀后，热点页无法常驻缓存。
+本服务按 expires_at（命中 refresh_tokens_expires_at_idx）分批删除过期超过保留期的记录：
+
+- 每批最多 REFRESH_TOKEN_PURGE_BATCH_SIZE 行，单独提交，锁持有时间与单次 WAL 写入量有界
+- 批次选取使用 `FOR UPDATE SKIP LOCKED`：多个 worker/CLI 同时清理时互不等待，也不阻塞正在轮换的行
+- 批次之间休眠 REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS 秒，给 autovacuum 与 WAL 归档留出余量
+
+保留期（REFRESH_TOKEN_RETENTION_DAYS）内的过期记录仍可用于审计；超出保留期的令牌 JWT 早已过期，
+无法再通过刷新/登出校验，删除不影响复用检测与家族撤销。
+
+refresh_tokens 已按 expires_at 分区时（见 services/refresh_token_partition_service.py），
+改为整分区 DROP 上界早于截止时间的分区，并顺带预建未来分区；逐行删除只作用于 refresh_tokens_default
+（预建不足时落入的行不属于任何范围分区，不会随分区 DROP 删除）。
+分区 DDL 由咨询锁保证同一时刻只有一个 worker/CLI 执行，并限定锁等待时间。
+
+运行方式：
+- 应用内周期任务：REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0 时由 app 生命周期启动（每个 worker 一个，启动时随机错峰）
+- 命令行：python -m utils.purge_refresh_tokens
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Delete, Table, column, delete, func, select, table
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models import RefreshToken
+from services.refresh_token_partition_service import (
+    DEFAULT_PARTITION,
+    RefreshTokenPartitionService,
+    get_refresh_token_partition_service,
+)
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+class RefreshTokenPurgeService:
+    def __init__(
+        self,
+        *,
+        retention_days: int | None = None,
+        batch_size: int | None = None,
+        batch_sleep_seconds: float | None = None,
+        partition_service: RefreshTokenPartitionService | None = None,
+    ) -> None:
+        """初始化服务。
+
+        Args:
+            retention_days: 过期后保留的天数，默认取配置。
+            batch_size: 每批删除的最大行数，默认取配置。
+            batch_sleep_seconds: 批次之间的休眠秒数，默认取配置。
+            partition_service: 可选的分区维护服务，用于测试注入。
+        """
+        self.retention_days = settings.REFRESH_TOKEN_RETENTION_DAYS if retention_days is None else retention_days
+        self.batch_size = max(1, settings.REFRESH_TOKEN_PURGE_BATCH_SIZE if batch_size is None else batch_size)
+        self.batch_sleep_seconds = (
+            settings.REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS if batch_sleep_seconds is None else batch_sleep_seconds
+        )
+        self._partition_service = partition_service
+        self.runs = 0
+        self.total_deleted = 0
+        self.last_deleted = 0
+        self.last_run_at: datetime | None = None
+        self.last_duration_ms = 0.0
+        self.dropped_partitions = 0
+
+    @property
+    def partition_service(self) -> RefreshTokenPartitionService:
+        if self._partition_service is None:
+            self._partition_service = get_refresh_token_partition_service()
+        return self._partition_service
+
+    def cutoff(self, now: datetime | None = None) -> datetime:
+        """早于该时间过期的记录可被删除。"""
+        return (now or datetime.now(UTC)) - timedelta(days=self.retention_days)
+
+    def build_batch_statement(self, cutoff: datetime, partition: str | None = None) -> Delete:
+        """
+        单批删除语句：
+
+            DELETE FROM refresh_tokens WHERE id IN (
+                SELECT id FROM refresh_tokens WHERE expires_at < :cutoff
+                LIMIT :batch_size FOR UPDATE SKIP LOCKED
+            )
+
+        给定 partition 时直接作用于该分区（而非父表）。
+        不支持行锁的方言（如测试用 SQLite）编译时会忽略 FOR UPDATE 子句。
+        """
+        target: Table = RefreshToken.__table__
+        if partition is not None:
+            target = table(partition, column("id", target.c.id.type), column("expires_at", target.c.expires_at.type))
+        batch = (
+            select(target.c.id)
+            .where(target.c.expires_at < cutoff)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return delete(target).where(target.c.id.in_(batch))
+
+    async def count_expired(self, db: AsyncSession, cutoff: datetime) -> int:
+        stmt = select(func.count()).select_from(RefreshToken).where(RefreshToken.expires_at < cutoff)
+        result = await db.execute(stmt)
+        return int(result.scalar_one())
+
+    async def purge_batch(self, db: AsyncSession, cutoff: datetime, partition: str | None = None) -> int:
+        """删除一批并立即提交，返回删除行数。"""
+        try:
+            result = await db.execute(self.build_batch_statement(cutoff, partition))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return int(result.rowcount or 0)
+
+    async def purge(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        now: datetime | None = None,
+        max_batches: int | None = None,
+    ) -> int:
+        """
+        分批删除直到某一批不足 batch_size（或达到 max_batches），返回逐行删除的总行数。
+
+        每批使用独立会话与事务；截止时间在开始时确定，清理期间新过期的记录留给下一轮。
+        分区表改为预建未来分区并删除整个过期分区（计入 dropped_partitions），
+        另对 DEFAULT 分区分批逐行删除，返回值为其中删除的行数。
+        """
+        cutoff = self.cutoff(now)
+        started = time.perf_counter()
+        async with session_factory() as db:
+            partitioned = await self.partition_service.is_partitioned(db)
+        if partitioned:
+            await self.partition_service.ensure_partitions(session_factory, now or datetime.now(UTC))
+            dropped = await self.partition_service.drop_expired_partitions(session_factory, cutoff)
+            self.dropped_partitions += len(dropped)
+            deleted, batches = await self._purge_rows(session_factory, cutoff, max_batches, DEFAULT_PARTITION)
+        else:
+            deleted, batches = await self._purge_rows(session_factory, cutoff, max_batches)
+
+        self.runs += 1
+        self.total_deleted += deleted
+        self.last_deleted = deleted
+        self.last_run_at = datetime.now(UTC)
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(
+            "purged %s expired refresh tokens in %s batches (cutoff=%s, %.0fms)",
+            deleted,
+            batches,
+            cutoff.isoformat(),
+            self.last_duration_ms,
+        )
+        return deleted
+
+    async def _purge_rows(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        cutoff: datetime,
+        max_batches: int | None,
+        partition: str | None = None,
+    ) -> tuple[int, int]:
+        deleted = 0
+        batches = 0
+        while True:
+            async with session_factory() as db:
+                count = await self.purge_batch(db, cutoff, partition)
+            deleted += count
+            batches += 1
+            if count < self.batch_size or (max_batches is not None and batches >= max_batches):
+                return deleted, batches
+            if self.batch_sleep_seconds > 0:
+                await asyncio.sleep(self.batch_sleep_seconds)
+
+    async def run_periodic(self, session_factory: async_sessionmaker[AsyncSession], interval_seconds: float) -> None:
+        """应用内周期任务：启动时随机延迟错开各 worker，之后每 interval_seconds 秒清理一轮，异常不中断循环。"""
+        await asyncio.sleep(random.uniform(0, interval_seconds))  # noqa: S311 - 仅用于错峰
+        while True:
+            try:
+                await self.purge(session_factory)
+            except Exception:
+                logger.exception("refresh token purge failed")
+            await asyncio.sleep(interval_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "total_deleted": self.total_deleted,
+            "last_deleted": self.last_deleted,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "dropped_partitions": self.dropped_partitions,
+        }
+
+
+# 单例实例
+_service: RefreshTokenPurgeService | None = None
+
+
+def get_refresh_token_purge_service() -> RefreshTokenPurgeService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = RefreshTokenPurgeService()
+    return _service
@@ -5,10 +5,12 @@ from typing import Any
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.jwt_tokens import create_access_token, create_refresh_token, verify_token
-from core.security import hash_password
+from core.admission import AdmissionRejectedError
+from core.jwt_tokens import issue_token_pair
+from core.password_hashing import hash_password_async
 from models import RefreshToken, User
 from services.email_verification_service import EmailVerificationService
+from services.user_agent_service import get_user_agent_service
 from utils.logging import get_logger
 
 logger = get_logger()
@@ -42,10 +44,8 @@ class RegistrationService:
 
         # 2) 再次检查邮箱是否已被注册（防并发）
         try:
-            stmt = select(User).where(User.username == email)
-            result = await db.execute(stmt)
-            existing: User | None = result.scalars().first()
-            if existing and existing.is_active:
+            is_active = (await db.execute(select(User.is_active).where(User.username == email))).scalar()
+            if is_active:
                 return {"code": 40901, "message": "邮箱已注册"}
         except Exception:
             logger.exception("check existing user before registration failed")
@@ -53,7 +53,7 @@ class RegistrationService:
 
         # 3) 创建新用户记录
         try:
-            password_hash = hash_password(password)
+            password_hash = await hash_password_async(password)
             user = User(
                 username=email,
                 password_hash=password_hash,
@@ -63,6 +63,9 @@ class RegistrationService:
             db.add(user)
             await db.commit()
             await db.refresh(user)
+        except AdmissionRejectedError:
+            # 哈希过载：交由全局异常处理器返回 503
+            raise
         except Exception:
             await db.rollback()
             logger.exception("create user in registration failed")
@@ -70,28 +73,22 @@ class RegistrationService:
 
         # 4) 注册即登录：签发令牌并持久化刷新令牌记录（与登录保持一致数据结构）
         try:
-            from datetime import UTC, datetime
-
-            # 签发 access / refresh 令牌
-            access_token = create_access_token(user.id, user.role)
-            refresh_token = create_refresh_token(user.id, user.role)
-
-            # 从 refresh token 提取 jti/iat/exp
-            claims = verify_token(refresh_token, "refresh")
-            issued_at = datetime.fromtimestamp(int(claims["iat"]), UTC)
-            expires_at = datetime.fromtimestamp(int(claims["exp"]), UTC)
+            # 签发 access / refresh 令牌，jti/iat/exp 直接取自签发时的声明
+            tokens = issue_token_pair(user.id, user.role, user.token_version)
+            user_agent_id = await get_user_agent_service().resolve(db, user_agent)
 
             rt = RefreshToken(
-                jti=str(claims["jti"]),
+                jti=tokens.refresh_jti,
                 parent_jti=None,
+                family_id=tokens.refresh_jti,
                 user_id=user.id,
-                issued_at=issued_at,
-                expires_at=expires_at,
+                issued_at=tokens.refresh_issued_at,
+                expires_at=tokens.refresh_expires_at,
                 revoked=False,
                 revoked_reason=None,
                 device_id=None,
                 ip=client_ip,
-                user_agent=user_agent,
+                user_agent_id=user_agent_id,
             )
             db.add(rt)
             await db.commit()
@@ -100,9 +97,9 @@ class RegistrationService:
                 "code": 0,
                 "message": "ok",
                 "data": {
-                    "access_token": access_token,
-                    "refresh_token": refresh_token,
-                    "refresh_expires_at": int(expires_at.timestamp()),
+                    "access_token": tokens.access_token,
+                    "refresh_token": tokens.refresh_token,
+                    "refresh_expires_at": int(tokens.refresh_claims["exp"]),
                 },
             }
         except Exception:
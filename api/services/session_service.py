@@ -0,0 +1,203 @@
+"""登录会话管理：以刷新令牌家族为单位列出、撤销用户的会话，并限制每个用户的并发会话数。
+
+会话即一个令牌家族（family_id：登录时生成，轮换时继承）。家族当前有效的令牌是未撤销、未使用且未过期的那一条，
+轮换过的祖先令牌 used_at 已置位，不计入会话。
+
+列表与淘汰都走 refresh_tokens_user_sessions_idx：(user_id, expires_at, id) 上的部分索引，只收录未撤销且未使用的行，
+即每个家族当前有效的那一条（轮换过的祖先 revoked 仍为 false，靠 used_at IS NULL 谓词排除，索引不随轮换历史增长；
+代价是认领 UPDATE 修改了索引谓词列，不再是 HOT 更新）。
+- expires_at 即最近一次签发时间 + 固定有效期，按 expires_at 倒序就是按最近活跃倒序
+- keyset 分页：游标为上一页最后一行的 (expires_at, id)，每页都是一次索引定位 + 顺序读取，与页码无关
+- 已过期的行落在索引区间之外，不会被扫描
+
+并发会话上限（MAX_SESSIONS_PER_USER）在登录时执行：与新令牌同一事务撤销最旧的家族，只保留最近活跃的
+MAX_SESSIONS_PER_USER - 1 个。同一用户的并发登录可能短暂多出一个会话，下次登录时收敛。
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Select, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.jwt_tokens import TokenError, verify_token
+from models import RefreshToken, UserAgent
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # expires_at 为 timestamp without time zone，以 UTC 存储
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC)
+
+
+def encode_cursor(expires_at: datetime, row_id: int) -> str:
+    """把 (expires_at, id) 编码为不透明的分页游标（微秒精度，避免浮点误差）。"""
+    micros = (_as_utc(expires_at) - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """解析分页游标，格式不合法时返回 None。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, row_id = raw.split(":")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        return None
+
+
+def _active_sessions(user_id: UUID, now: datetime, *columns: Any) -> Select:
+    """用户当前有效的会话（每个家族一行），按最近活跃倒序。"""
+    return (
+        select(*columns)
+        .select_from(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked.is_(False),
+            RefreshToken.expires_at > now,
+            RefreshToken.used_at.is_(None),
+        )
+        .order_by(RefreshToken.expires_at.desc(), RefreshToken.id.desc())
+    )
+
+
+class SessionService:
+    def __init__(self, *, max_sessions: int | None = None) -> None:
+        """初始化服务。
+
+        Args:
+            max_sessions: 每个用户的最大并发会话数，默认取配置；0 表示不限制。
+        """
+        self.max_sessions = settings.MAX_SESSIONS_PER_USER if max_sessions is None else max_sessions
+
+    @staticmethod
+    def _current_jti(refresh_token: str | None) -> UUID | None:
+        if not refresh_token:
+            return None
+        try:
+            return UUID(str(verify_token(refresh_token, "refresh")["jti"]))
+        except (TokenError, ValueError):
+            return None
+
+    async def list_sessions(
+        self,
+        *,
+        db: AsyncSession,
+        user_id: UUID,
+        limit: int = 20,
+        cursor: str | None = None,
+        refresh_token: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        列出用户的有效会话（keyset 分页）：
+        - cursor 为上一页返回的 next_cursor；没有更多数据时 next_cursor 为 None
+        - 传入当前请求的 refresh_token 时，标记对应的会话为 current
+        """
+        limit = max(1, min(limit, 100))
+        stmt = _active_sessions(
+            user_id,
+            datetime.now(UTC),
+            RefreshToken.id,
+            RefreshToken.jti,
+            RefreshToken.family_id,
+            RefreshToken.issued_at,
+            RefreshToken.expires_at,
+            RefreshToken.device_id,
+            RefreshToken.ip,
+            UserAgent.user_agent,
+        ).outerjoin(UserAgent, UserAgent.id == RefreshToken.user_agent_id)
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                return {"code": 42206, "message": "分页游标无效"}
+            stmt = stmt.where(tuple_(RefreshToken.expires_at, RefreshToken.id) < position)
+
+        try:
+            # 多取一行判断是否还有下一页
+            rows = (await db.execute(stmt.limit(limit + 1))).all()
+        except Exception:
+            logger.exception("List sessions failed")
+            return {"code": 50014, "message": "查询会话失败"}
+
+        page = rows[:limit]
+        current_jti = self._current_jti(refresh_token)
+        items = [
+            {
+                "id": str(UUID(str(row.family_id))),
+                "last_active_at": _as_utc(row.issued_at).isoformat(),
+                "expires_at": _as_utc(row.expires_at).isoformat(),
+                "device_id": row.device_id,
+                "ip": row.ip,
+                "user_agent": row.user_agent,
+                "current": UUID(str(row.jti)) == current_jti,
+            }
+            for row in page
+        ]
+        next_cursor = encode_cursor(page[-1].expires_at, page[-1].id) if len(rows) > limit else None
+        return {"code": 0, "message": "ok", "data": {"items": items, "next_cursor": next_cursor}}
+
+    async def revoke_session(self, *, db: AsyncSession, user_id: UUID, session_id: UUID) -> dict[str, Any]:
+        """撤销用户自己的某个会话（整个家族）；会话不存在、已撤销或属于他人时返回 40402。"""
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.family_id == str(session_id),
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked.is_(False),
+            )
+            .values(revoked=True, revoked_reason="session_revoked")
+        )
+        try:
+            result = await db.execute(stmt)
+            if not result.rowcount:
+                await db.rollback()
+                return {"code": 40402, "message": "会话不存在或已失效"}
+            await db.commit()
+            return {"code": 0, "message": "ok"}
+        except Exception:
+            await db.rollback()
+            logger.exception("Revoke session failed")
+            return {"code": 50015, "message": "撤销会话失败"}
+
+    async def evict_excess_sessions(self, db: AsyncSession, user_id: UUID, *, now: datetime | None = None) -> list[str]:
+        """
+        为即将创建的新会话腾出名额：保留最近活跃的 max_sessions - 1 个会话，撤销其余家族，返回被撤销的 family_id。
+
+        不提交事务，由调用方与新令牌记录一并提交。
+        """
+        if self.max_sessions <= 0:
+            return []
+        stmt = _active_sessions(user_id, now or datetime.now(UTC), RefreshToken.family_id).offset(self.max_sessions - 1)
+        evicted = [str(family_id) for family_id in (await db.execute(stmt)).scalars()]
+        if evicted:
+            await db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.family_id.in_(evicted), RefreshToken.revoked.is_(False))
+                .values(revoked=True, revoked_reason="session_limit")
+            )
+            logger.info("evicted %s sessions of user %s over the session limit", len(evicted), user_id)
+        return evicted
+
+
+# 单例实例
+_service: SessionService | None = None
+
+
+def get_session_service() -> SessionService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = SessionService()
+    return _service
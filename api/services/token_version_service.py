@@ -0,0 +1,175 @@
+"""令牌版本服务 - 基于 `User.token_version` 实现“一键登出所有设备”。
+
+设计原理：
+- 签发的 access/refresh 令牌均携带 `ver` 声明（签发时用户的 token_version）
+- 改密/重置密码时递增 token_version，并写入 Redis 的版本表
+- 鉴权与刷新时比较 `ver` 与当前版本，低于当前版本即视为已撤销
+
+Redis Key 设计：
+- auth:user:token_version - 单个 Hash，field 为用户 ID，value 为当前版本（紧凑，无需扫描 refresh_tokens）
+
+进程内近缓存（near-cache）：
+- 版本表读取结果在本进程缓存 TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS 秒（默认 2 秒）
+- 即跨 worker 的撤销最多滞后该秒数；本进程内 bump 后立即生效
+- Redis 故障或版本表缺失时返回 None，由调用方回退到数据库/用户快照中的版本
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+from uuid import UUID
+
+from redis import asyncio as aioredis
+from sqlalchemy import Update, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User
+from utils.config import settings
+from utils.logging import get_logger
+from utils.redis_client import RedisBreaker, get_redis
+
+logger = get_logger()
+
+
+class TokenVersionService:
+    """用户令牌版本表（Redis Hash + 进程内近缓存）。"""
+
+    HASH_KEY = "auth:user:token_version"
+    # 近缓存容量上限：超出时整体清空（条目 TTL 极短，清空的代价只是一次 HGET）
+    NEAR_CACHE_MAX_ENTRIES = 10000
+
+    def __init__(self, redis: aioredis.Redis | None = None, *, near_cache_ttl_seconds: float | None = None) -> None:
+        """初始化服务。
+
+        Args:
+            redis: 可选的 Redis 客户端，用于测试注入。默认使用全局单例。
+            near_cache_ttl_seconds: 近缓存存活秒数，默认取配置。
+        """
+        self._redis = redis
+        self.near_cache_ttl_seconds = (
+            settings.TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS if near_cache_ttl_seconds is None else near_cache_ttl_seconds
+        )
+        self._near: dict[UUID, tuple[float, int]] = {}
+        self._breaker = RedisBreaker("token version map")
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = get_redis()
+        return self._redis
+
+    def _remember(self, user_id: UUID, version: int) -> None:
+        if self.near_cache_ttl_seconds > 0:
+            if len(self._near) >= self.NEAR_CACHE_MAX_ENTRIES:
+                self._near.clear()
+            self._near[user_id] = (time.monotonic() + self.near_cache_ttl_seconds, version)
+
+    async def get(self, user_id: UUID) -> int | None:
+        """读取当前版本：近缓存 -> Redis；未知时返回 None（不访问数据库）。"""
+        entry = self._near.get(user_id)
+        if entry is not None:
+            expires_at, version = entry
+            if time.monotonic() < expires_at:
+                return version
+            self._near.pop(user_id, None)
+
+        if not self._breaker.available():
+            return None
+        try:
+            raw = await self.redis.hget(self.HASH_KEY, str(user_id))
+        except Exception:
+            self._breaker.record_failure()
+            return None
+        if raw is None:
+            return None
+        version = int(raw)
+        self._remember(user_id, version)
+        return version
+
+    async def get_many(self, user_ids: list[UUID]) -> dict[UUID, int | None]:
+        """批量读取当前版本：近缓存未命中的部分通过一次 HMGET 获取。"""
+        versions: dict[UUID, int | None] = {}
+        missing: list[UUID] = []
+        now = time.monotonic()
+        for user_id in user_ids:
+            entry = self._near.get(user_id)
+            if entry is not None and now < entry[0]:
+                versions[user_id] = entry[1]
+            else:
+                versions[user_id] = None
+                missing.append(user_id)
+
+        if not missing or not self._breaker.available():
+            return versions
+        try:
+            raws = await self.redis.hmget(self.HASH_KEY, [str(user_id) for user_id in missing])
+        except Exception:
+            self._breaker.record_failure()
+            return versions
+        for user_id, raw in zip(missing, raws, strict=True):
+            if raw is not None:
+                versions[user_id] = int(raw)
+                self._remember(user_id, int(raw))
+        return versions
+
+    async def publish(self, user_id: UUID, version: int) -> None:
+        """写入版本表（登录时预热、bump 后广播）。"""
+        self._remember(user_id, version)
+        try:
+            await self.redis.hset(self.HASH_KEY, mapping={str(user_id): str(version)})
+        except Exception:
+            # 版本表写失败时，数据库中的 token_version 仍是权威来源（经用户快照校验）
+            logger.exception("publish token version failed for %s", user_id)
+
+    async def resolve(self, db: AsyncSession, user_id: UUID) -> int | None:
+        """读取当前版本，版本表未命中时回源数据库并回填。用户不存在返回 None。"""
+        version = await self.get(user_id)
+        if version is not None:
+            return version
+        result = await db.execute(select(User.token_version).where(User.id == user_id))
+        db_version = result.scalar_one_or_none()
+        if db_version is None:
+            return None
+        if self._breaker.available():
+            await self.publish(user_id, int(db_version))
+        return int(db_version)
+
+    @staticmethod
+    def bump_statement(user_id: UUID, **values: Any) -> Update:
+        """
+        原子递增用户 token_version 的 UPDATE（RETURNING 新版本），values 为同时更新的其他列。
+
+        由调用方执行并提交事务后，再以返回的新版本调用 publish。
+        """
+        return (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1, **values)
+            .returning(User.token_version)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "near_cache_size": len(self._near),
+            "redis_available": self._breaker.available(),
+        }
+
+
+def is_token_version_current(claims: dict[str, Any], current_version: int | None) -> bool:
+    """令牌声明中的版本是否仍然有效；旧令牌缺少 `ver` 时按初始版本 1 处理。"""
+    if current_version is None:
+        return True
+    return int(claims.get("ver", 1)) >= current_version
+
+
+# 单例实例
+_service: TokenVersionService | None = None
+
+
+def get_token_version_service() -> TokenVersionService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = TokenVersionService()
+    return _service
@@ -0,0 +1,123 @@
+"""User-Agent 字典服务：把 User-Agent 字符串解析为 user_agents 表的 ID。
+
+refresh_tokens 每行只保存 4 字节的 user_agent_id，相同的 User-Agent 全表只存一份。
+
+解析顺序：
+- 进程内 LRU 缓存（最近使用的 USER_AGENT_CACHE_MAX_ENTRIES 个 User-Agent -> ID），命中时不访问数据库
+- 未命中时按值查询；仍不存在则 `INSERT ... ON CONFLICT DO NOTHING RETURNING id`，并发插入同一值时再查询一次
+
+只缓存查询到的（已提交的）ID：本事务新插入的 ID 若随事务回滚，缓存后会让后续写入违反外键。
+字典记录只增不删，缓存无需失效。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import UserAgent
+from utils.config import settings
+from utils.logging import get_logger
+
+logger = get_logger()
+
+MAX_USER_AGENT_LENGTH = 255
+
+
+def normalize_user_agent(user_agent: str | None) -> str | None:
+    """去除首尾空白并截断到列宽；空值返回 None。"""
+    if user_agent is None:
+        return None
+    value = user_agent.strip()[:MAX_USER_AGENT_LENGTH]
+    return value or None
+
+
+class UserAgentService:
+    def __init__(self, *, cache_size: int | None = None) -> None:
+        """初始化服务。
+
+        Args:
+            cache_size: 进程内缓存的最大条目数，默认取配置；0 表示关闭。
+        """
+        self.cache_size = settings.USER_AGENT_CACHE_MAX_ENTRIES if cache_size is None else cache_size
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self.cache_hits = 0
+        self.db_lookups = 0
+        self.inserts = 0
+
+    def _get_cached(self, value: str) -> int | None:
+        agent_id = self._cache.get(value)
+        if agent_id is not None:
+            self._cache.move_to_end(value)
+        return agent_id
+
+    def _set_cached(self, value: str, agent_id: int) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[value] = agent_id
+        self._cache.move_to_end(value)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _select_id(self, db: AsyncSession, value: str) -> int | None:
+        self.db_lookups += 1
+        result = await db.execute(select(UserAgent.id).where(UserAgent.user_agent == value))
+        return result.scalar()
+
+    async def resolve(self, db: AsyncSession, user_agent: str | None) -> int | None:
+        """返回 User-Agent 对应的字典 ID，不存在时在当前事务内插入；user_agent 为空时返回 None。"""
+        value = normalize_user_agent(user_agent)
+        if value is None:
+            return None
+
+        agent_id = self._get_cached(value)
+        if agent_id is not None:
+            self.cache_hits += 1
+            return agent_id
+
+        agent_id = await self._select_id(db, value)
+        if agent_id is not None:
+            self._set_cached(value, agent_id)
+            return agent_id
+
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = (
+            dialect.insert(UserAgent)
+            .values(user_agent=value)
+            .on_conflict_do_nothing(index_elements=["user_agent"])
+            .returning(UserAgent.id)
+        )
+        agent_id = (await db.execute(stmt)).scalar()
+        if agent_id is not None:
+            self.inserts += 1
+            return agent_id
+
+        # 并发请求已插入同一值（冲突时 RETURNING 为空）：其事务已提交，可安全缓存
+        agent_id = await self._select_id(db, value)
+        if agent_id is not None:
+            self._set_cached(value, agent_id)
+        return agent_id
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "db_lookups": self.db_lookups,
+            "inserts": self.inserts,
+        }
+
+
+# 单例实例
+_service: UserAgentService | None = None
+
+
+def get_user_agent_service() -> UserAgentService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = UserAgentService()
+    return _service
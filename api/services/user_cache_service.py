@@ -0,0 +1,317 @@
+"""用户快照缓存服务 - 鉴权依赖按用户 ID 读取用户状态时避免每次请求都访问 PostgreSQL。
+
+两级缓存：
+- L1 进程内：短 TTL（默认 5 秒）+ 容量上限，命中时零网络开销
+- L2 Redis：较长 TTL（默认 300 秒），多个 worker 共享，命中时一次 GET
+- 均未命中时回源数据库，并回填两级缓存
+
+一致性：
+- 改密、重置密码、禁用账号等会改变鉴权结果的写操作，必须显式调用 `invalidate(user_id)`
+- invalidate 会清理本进程 L1 与 Redis L2；其他 worker 的 L1 最多滞后 L1 TTL 秒
+- 回源与失效并发时防止旧快照被写回：每个用户在 Redis 中有一个失效代数（invalidate 时 INCR），
+  L2 条目记录写入时读到的代数，读取时与当前代数一并 MGET，不一致即视为未命中。
+  回源期间本进程发生过失效时，本次结果也不写入 L1
+- Redis 故障时自动降级为“L1 + 数据库”，不影响鉴权可用性（此时不回填 L2）
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from redis import asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.permissions import role_permission_mask
+from models import User
+from utils.config import settings
+from utils.logging import get_logger
+from utils.redis_client import RedisBreaker, get_redis
+
+logger = get_logger()
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """鉴权所需的用户只读快照（不含密码哈希等敏感字段）。
+
+    `permissions` 为权限位掩码：缓存中的快照取角色默认掩码，
+    `get_current_user` 返回的快照再与 access token 中的 `perm` 声明取交集（不写入缓存）。
+    """
+
+    id: UUID
+    username: str
+    role: str
+    is_active: bool
+    token_version: int
+    permissions: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> UserSnapshot:
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=bool(user.is_active),
+            token_version=int(user.token_version or 1),
+            permissions=role_permission_mask(user.role),
+        )
+
+    def to_cache_value(self, generation: int) -> str:
+        return json.dumps(
+            [str(self.id), self.username, self.role, self.is_active, self.token_version, generation],
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_cache_value(cls, raw: str) -> tuple[int, UserSnapshot]:
+        """解析 L2 条目，返回 (写入时的失效代数, 快照)。"""
+        user_id, username, role, is_active, token_version, generation = json.loads(raw)
+        snapshot = cls(
+            id=UUID(user_id),
+            username=username,
+            role=role,
+            is_active=bool(is_active),
+            token_version=int(token_version),
+            permissions=role_permission_mask(role),
+        )
+        return int(generation), snapshot
+
+    def to_safe_dict(self) -> dict[str, str | int | bool | None]:
+        """与 `User.to_safe_dict` 保持一致的脱敏字典。"""
+        return {
+            "id": str(self.id),
+            "username": self.username,
+            "role": self.role,
+            "is_active": self.is_active,
+            "token_version": self.token_version,
+        }
+
+
+class UserCacheService:
+    """用户快照两级缓存。"""
+
+    KEY_PREFIX = "auth:user:snapshot:"
+    GENERATION_KEY_PREFIX = "auth:user:snapshot-gen:"
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None = None,
+        *,
+        local_ttl_seconds: float | None = None,
+        redis_ttl_seconds: int | None = None,
+        local_max_entries: int | None = None,
+    ) -> None:
+        """初始化服务。
+
+        Args:
+            redis: 可选的 Redis 客户端，用于测试注入。默认使用全局单例。
+            local_ttl_seconds: L1 条目存活秒数，默认取配置。
+            redis_ttl_seconds: L2 条目存活秒数，默认取配置。
+            local_max_entries: L1 最大条目数，默认取配置。
+        """
+        self._redis = redis
+        self.local_ttl_seconds = (
+            settings.USER_SNAPSHOT_LOCAL_TTL_SECONDS if local_ttl_seconds is None else local_ttl_seconds
+        )
+        self.redis_ttl_seconds = (
+            settings.USER_SNAPSHOT_REDIS_TTL_SECONDS if redis_ttl_seconds is None else redis_ttl_seconds
+        )
+        self.local_max_entries = (
+            settings.USER_SNAPSHOT_LOCAL_MAX_ENTRIES if local_max_entries is None else local_max_entries
+        )
+        self._local: OrderedDict[UUID, tuple[float, UserSnapshot]] = OrderedDict()
+        self._breaker = RedisBreaker("user snapshot cache")
+        # 本进程的失效计数：回源前后不一致说明期间有失效，结果不写入 L1
+        self._local_invalidations = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.db_loads = 0
+        self.stale_fills_skipped = 0
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = get_redis()
+        return self._redis
+
+    def _key(self, user_id: UUID) -> str:
+        return f"{self.KEY_PREFIX}{user_id}"
+
+    def _generation_key(self, user_id: UUID) -> str:
+        return f"{self.GENERATION_KEY_PREFIX}{user_id}"
+
+    def _get_local(self, user_id: UUID) -> UserSnapshot | None:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if time.monotonic() >= expires_at:
+            self._local.pop(user_id, None)
+            return None
+        return snapshot
+
+    def _set_local(self, snapshot: UserSnapshot) -> None:
+        if self.local_ttl_seconds <= 0 or self.local_max_entries <= 0:
+            return
+        self._local[snapshot.id] = (time.monotonic() + self.local_ttl_seconds, snapshot)
+        self._local.move_to_end(snapshot.id)
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+    def _decode(self, user_id: UUID, raw: Any, generation: int) -> UserSnapshot | None:
+        """解析 L2 条目；写入时的代数与当前代数不一致（期间发生过失效）时视为未命中。"""
+        if not raw:
+            return None
+        try:
+            written_generation, snapshot = UserSnapshot.from_cache_value(raw)
+        except Exception:
+            logger.warning("drop malformed user snapshot for %s", user_id)
+            return None
+        if written_generation != generation:
+            return None
+        return snapshot
+
+    async def _get_many_remote(self, user_ids: list[UUID]) -> list[tuple[UserSnapshot | None, int | None]]:
+        """一次 MGET 读取 L2 条目与当前失效代数；Redis 不可用时代数为 None（此后不回填 L2）。"""
+        if not self._breaker.available():
+            return [(None, None)] * len(user_ids)
+        keys = [key for user_id in user_ids for key in (self._key(user_id), self._generation_key(user_id))]
+        try:
+            values = await self.redis.mget(keys)
+        except Exception:
+            self._breaker.record_failure()
+            return [(None, None)] * len(user_ids)
+        result: list[tuple[UserSnapshot | None, int | None]] = []
+        for index, user_id in enumerate(user_ids):
+            generation = int(values[2 * index + 1] or 0)
+            result.append((self._decode(user_id, values[2 * index], generation), generation))
+        return result
+
+    async def get(self, user_id: UUID) -> UserSnapshot | None:
+        """依次查询 L1 与 L2，未命中返回 None（不访问数据库）。"""
+        snapshot = self._get_local(user_id)
+        if snapshot is not None:
+            self.local_hits += 1
+            return snapshot
+        ((snapshot, _generation),) = await self._get_many_remote([user_id])
+        if snapshot is not None:
+            self.redis_hits += 1
+            self._set_local(snapshot)
+        return snapshot
+
+    async def _fill(self, snapshot: UserSnapshot, generation: int | None, local_invalidations: int) -> None:
+        """回填数据库读到的快照。
+
+        Args:
+            generation: 回源前读到的失效代数，写入 L2 条目；None 表示 Redis 不可用，不回填 L2。
+            local_invalidations: 回源前本进程的失效计数；期间发生过失效则不写入 L1。
+        """
+        if local_invalidations == self._local_invalidations:
+            self._set_local(snapshot)
+        else:
+            self.stale_fills_skipped += 1
+        if generation is None or self.redis_ttl_seconds <= 0 or not self._breaker.available():
+            return
+        try:
+            await self.redis.setex(self._key(snapshot.id), self.redis_ttl_seconds, snapshot.to_cache_value(generation))
+        except Exception:
+            self._breaker.record_failure()
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """显式失效：改密/重置密码/禁用账号后调用。
+
+        先递增失效代数再删除 L2 条目：并发回源即使随后写回旧快照，也带着旧代数，读取时会被丢弃。
+        代数键的存活时间为 L2 TTL 的两倍，长于任何在失效前开始的回源所写条目的寿命。
+        """
+        self._local_invalidations += 1
+        self._local.pop(user_id, None)
+        try:
+            generation_key = self._generation_key(user_id)
+            await self.redis.incr(generation_key)
+            await self.redis.expire(generation_key, max(2 * self.redis_ttl_seconds, 1))
+            await self.redis.delete(self._key(user_id))
+        except Exception:
+            # 失效必须尽力而为：即使熔断中也尝试一次；失败时依赖 L2 TTL 兜底
+            logger.exception("invalidate user snapshot failed for %s", user_id)
+
+    async def load(self, db: AsyncSession, user_id: UUID) -> UserSnapshot | None:
+        """读取用户快照：缓存未命中时回源数据库并回填。用户不存在返回 None。"""
+        snapshot = self._get_local(user_id)
+        if snapshot is not None:
+            self.local_hits += 1
+            return snapshot
+        ((snapshot, generation),) = await self._get_many_remote([user_id])
+        if snapshot is not None:
+            self.redis_hits += 1
+            self._set_local(snapshot)
+            return snapshot
+
+        local_invalidations = self._local_invalidations
+        user = await db.get(User, user_id)
+        self.db_loads += 1
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        await self._fill(snapshot, generation, local_invalidations)
+        return snapshot
+
+    async def load_many(self, db: AsyncSession, user_ids: list[UUID]) -> dict[UUID, UserSnapshot]:
+        """批量读取用户快照：L1 -> 一次 MGET -> 一次 IN 查询，返回存在的用户（不存在的用户不在结果中）。"""
+        snapshots: dict[UUID, UserSnapshot] = {}
+        missing: list[UUID] = []
+        for user_id in dict.fromkeys(user_ids):
+            snapshot = self._get_local(user_id)
+            if snapshot is not None:
+                self.local_hits += 1
+                snapshots[user_id] = snapshot
+            else:
+                missing.append(user_id)
+        if not missing:
+            return snapshots
+
+        generations: dict[UUID, int | None] = {}
+        for user_id, (snapshot, generation) in zip(missing, await self._get_many_remote(missing), strict=True):
+            if snapshot is None:
+                generations[user_id] = generation
+                continue
+            self.redis_hits += 1
+            self._set_local(snapshot)
+            snapshots[user_id] = snapshot
+
+        if generations:
+            local_invalidations = self._local_invalidations
+            result = await db.execute(select(User).where(User.id.in_(list(generations))))
+            self.db_loads += 1
+            for user in result.scalars().all():
+                snapshot = UserSnapshot.from_user(user)
+                await self._fill(snapshot, generations[snapshot.id], local_invalidations)
+                snapshots[snapshot.id] = snapshot
+        return snapshots
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "local_size": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "db_loads": self.db_loads,
+            "stale_fills_skipped": self.stale_fills_skipped,
+            "redis_available": self._breaker.available(),
+        }
+
+
+# 单例实例
+_service: UserCacheService | None = None
+
+
+def get_user_cache_service() -> UserCacheService:
+    """获取全局单例实例。"""
+    global _service
+    if _service is None:
+        _service = UserCacheService()
+    return _service
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from tests.benchmarks.harness import RESULTS, compare_to_baseline, env_settings, write_results
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """会话结束时按环境变量输出 JSON 结果，并与基线对比（见 harness 模块说明）。"""
+    if not RESULTS:
+        return
+    json_path, baseline_path, tolerance = env_settings()
+    if json_path:
+        write_results(json_path, RESULTS)
+    if baseline_path:
+        lines, regressions = compare_to_baseline(RESULTS, baseline_path, tolerance)
+        reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+        if reporter is not None:
+            reporter.write_line(f"benchmark comparison against {baseline_path} (tolerance {tolerance:.0%}):")
+            for line in lines:
+                reporter.write_line(line)
+        if regressions and exitstatus == 0:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
@@ -0,0 +1,206 @@
+"""微基准测试的计时工具。
+
+基准测试默认不随 `pytest` 运行（pytest.ini 中 `-m "not benchmark"`），需显式执行 `python -m pytest -q -m benchmark`。
+迭代次数保持较小，只断言“相对”性能关系（如缓存命中快于完整校验），绝对耗时通过 `-s` 输出供人工对比。
+
+每个场景统计：
+- ns_per_op / ops_per_sec：整体计时得到的吞吐（不含逐次计时开销）
+- p50_ns / p99_ns：逐次计时的延迟分布
+- peak_alloc_bytes：单次调用期间 tracemalloc 观测到的峰值分配字节数（CPython 无累计分配计数，以此近似）
+
+机器可读输出与基线对比（通过环境变量开启，见 tests/benchmarks/conftest.py）：
+- BENCH_JSON=path：会话结束时将全部结果写入 JSON
+- BENCH_BASELINE=path：与之前保存的 JSON 对比，ns_per_op 超出基线 BENCH_TOLERANCE（默认 0.2，即 20%）视为退化
+  并令本次测试会话失败
+
+示例：
+    BENCH_JSON=bench/baseline.json python -m pytest -q -m benchmark
+    BENCH_BASELINE=bench/baseline.json python -m pytest -q -m benchmark
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+# 本次会话内的全部结果（按场景名索引，同名后者覆盖前者）
+RESULTS: dict[str, BenchResult] = {}
+
+ALLOCATION_SAMPLES = 200
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    name: str
+    iterations: int
+    ns_per_op: float
+    p50_ns: float = 0.0
+    p99_ns: float = 0.0
+    peak_alloc_bytes: float = 0.0
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1e9 / self.ns_per_op if self.ns_per_op else float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "ops_per_sec": round(self.ops_per_sec, 1)}
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.ns_per_op / 1000:.2f} us/op ({self.ops_per_sec:,.0f} ops/s, "
+            f"p50 {self.p50_ns / 1000:.2f} us, p99 {self.p99_ns / 1000:.2f} us, "
+            f"peak alloc {self.peak_alloc_bytes:,.0f} B)"
+        )
+
+
+def _percentile(sorted_samples: list[int], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return float(sorted_samples[index])
+
+
+def _record(name: str, iterations: int, elapsed: int, timings: list[int], peak_alloc: float) -> BenchResult:
+    timings.sort()
+    result = BenchResult(
+        name=name,
+        iterations=iterations,
+        ns_per_op=elapsed / iterations,
+        p50_ns=_percentile(timings, 0.50),
+        p99_ns=_percentile(timings, 0.99),
+        peak_alloc_bytes=peak_alloc,
+    )
+    RESULTS[name] = result
+    print(result)
+    return result
+
+
+class _AllocationProbe:
+    """单次调用的峰值分配统计；若外部已开启 tracemalloc 则复用，不重复启停。"""
+
+    def __enter__(self) -> _AllocationProbe:
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        self.total = 0
+        return self
+
+    def before(self) -> None:
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def after(self) -> None:
+        self.total += tracemalloc.get_traced_memory()[1] - self._base
+
+    def __exit__(self, *exc: object) -> None:
+        if self._started:
+            tracemalloc.stop()
+
+
+def measure(name: str, fn: Callable[[], object], *, iterations: int = 2000, warmup: int = 50) -> BenchResult:
+    for _ in range(warmup):
+        fn()
+
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter_ns() - start
+
+    timings: list[int] = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        t0 = clock()
+        fn()
+        timings.append(clock() - t0)
+
+    samples = min(iterations, ALLOCATION_SAMPLES)
+    with _AllocationProbe() as probe:
+        for _ in range(samples):
+            probe.before()
+            fn()
+            probe.after()
+
+    return _record(name, iterations, elapsed, timings, probe.total / samples)
+
+
+async def measure_async(
+    name: str, fn: Callable[[], Awaitable[object]], *, iterations: int = 1000, warmup: int = 20
+) -> BenchResult:
+    """`measure` 的协程版本：在同一事件循环内连续 await，避免把事件循环启动开销计入。"""
+    for _ in range(warmup):
+        await fn()
+
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        await fn()
+    elapsed = time.perf_counter_ns() - start
+
+    timings: list[int] = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        t0 = clock()
+        await fn()
+        timings.append(clock() - t0)
+
+    samples = min(iterations, ALLOCATION_SAMPLES)
+    with _AllocationProbe() as probe:
+        for _ in range(samples):
+            probe.before()
+            await fn()
+            probe.after()
+
+    return _record(name, iterations, elapsed, timings, probe.total / samples)
+
+
+def write_results(path: str | Path, results: dict[str, BenchResult]) -> None:
+    payload = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "created_at": int(time.time()),
+        },
+        "results": {name: result.to_dict() for name, result in sorted(results.items())},
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def compare_to_baseline(
+    results: dict[str, BenchResult], baseline_path: str | Path, tolerance: float
+) -> tuple[list[str], list[str]]:
+    """与基线对比，返回 (报告行, 退化场景名)。基线中没有的场景只报告不判定。"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8")).get("results", {})
+    lines: list[str] = []
+    regressions: list[str] = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or not base.get("ns_per_op"):
+            lines.append(f"  {name}: {result.ns_per_op / 1000:.2f} us/op (new)")
+            continue
+        ratio = result.ns_per_op / float(base["ns_per_op"])
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append(
+            f"  {name}: {float(base['ns_per_op']) / 1000:.2f} -> {result.ns_per_op / 1000:.2f} us/op "
+            f"({(ratio - 1) * 100:+.1f}%){flag}"
+        )
+    return lines, regressions
+
+
+def env_settings() -> tuple[str | None, str | None, float]:
+    return (
+        os.getenv("BENCH_JSON") or None,
+        os.getenv("BENCH_BASELINE") or None,
+        float(os.getenv("BENCH_TOLERANCE", "0.2")),
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+import jwt
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import services.access_denylist_service as access_denylist_module
+import services.token_version_service as token_version_module
+import services.user_cache_service as user_cache_module
+from core import jwt_tokens as jwt_mod
+from core.auth_dependency import _extract_bearer_token, get_current_user
+from core.jwt_tokens import TokenError, create_access_token, verify_token
+from core.token_cache import VerifiedClaimsCache
+from services.access_denylist_service import AccessDenylistService
+from services.token_version_service import TokenVersionService
+from services.user_cache_service import UserCacheService
+from tests.benchmarks.harness import measure, measure_async
+from tests.helpers import FakeRedis, async_create_user
+from utils.config import settings
+
+
+def _expect_error(fn) -> None:
+    try:
+        fn()
+    except TokenError:
+        return
+    raise AssertionError("expected TokenError")
+
+
+@pytest.mark.benchmark
+def test_bench_token_primitives() -> None:
+    user_id = uuid.uuid4()
+    token = create_access_token(user_id, "user")
+
+    claims = verify_token(token, "access")
+    claims["exp"] = int(datetime.now(UTC).timestamp()) - 1
+    expired = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    bad_signature = token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB")
+    header = f"Bearer {token}"
+
+    sign = measure("create_access_token", lambda: create_access_token(user_id, "user"))
+    valid = measure("verify_token (valid)", lambda: verify_token(token, "access"))
+    measure("verify_token (expired)", lambda: _expect_error(lambda: verify_token(expired, "access")))
+    measure("verify_token (bad signature)", lambda: _expect_error(lambda: verify_token(bad_signature, "access")))
+    extract = measure("_extract_bearer_token", lambda: _extract_bearer_token(header))
+
+    # 解析请求头只是字符串切分，应远低于签发/验签
+    assert extract.ns_per_op < valid.ns_per_op
+    assert extract.ns_per_op < sign.ns_per_op
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_bench_get_current_user(async_db_session: AsyncSession, monkeypatch) -> None:
+    redis = FakeRedis()
+    monkeypatch.setattr(token_version_module, "_service", TokenVersionService(redis=redis))
+    monkeypatch.setattr(access_denylist_module, "_service", AccessDenylistService(redis=redis))
+    user = await async_create_user(async_db_session, "bench-user", "pw")
+    authorization = f"Bearer {create_access_token(user.id, user.role)}"
+
+    async def _call() -> None:
+        await get_current_user(authorization=authorization, db=async_db_session)
+
+    # 稳态：声明缓存与用户快照均已命中，不访问数据库
+    monkeypatch.setattr(jwt_mod, "claims_cache", VerifiedClaimsCache(max_entries=1000, max_ttl_seconds=300))
+    monkeypatch.setattr(user_cache_module, "_service", UserCacheService(redis=redis))
+    warm = await measure_async("get_current_user (warm caches)", _call)
+
+    # 冷路径：关闭声明缓存与用户快照缓存，每次完整验签并查询内存数据库
+    monkeypatch.setattr(jwt_mod, "claims_cache", VerifiedClaimsCache(max_entries=0, max_ttl_seconds=300))
+    monkeypatch.setattr(
+        user_cache_module, "_service", UserCacheService(redis=redis, local_ttl_seconds=0, redis_ttl_seconds=0)
+    )
+    cold = await measure_async("get_current_user (no caches, DB load)", _call, iterations=300)
+
+    assert warm.ns_per_op < cold.ns_per_op
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+
+from core.security import hash_password, verify_password
+from services.email_verification_service import EmailVerificationService
+from tests.benchmarks.harness import measure, measure_async
+
+SCENE = EmailVerificationService.SCENE_REGISTER
+EMAIL = "bench@example.com"
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_bench_email_code_digest_vs_argon2() -> None:
+    digest = EmailVerificationService._code_digest(scene=SCENE, email=EMAIL, code="123456")
+    legacy = hash_password("123456")
+
+    async def _check() -> None:
+        await EmailVerificationService._code_matches(stored=digest, scene=SCENE, email=EMAIL, code="123456")
+
+    sign = measure(
+        "email code digest (send)", lambda: EmailVerificationService._code_digest(scene=SCENE, email=EMAIL, code="1")
+    )
+    check = await measure_async("email code digest (verify)", _check)
+    argon2 = measure(
+        "email code argon2 (legacy verify)", lambda: verify_password("123456", legacy), iterations=5, warmup=1
+    )
+
+    # 发送与校验均应为亚毫秒级，且远快于旧的 Argon2 校验
+    assert sign.ns_per_op < 1_000_000
+    assert check.ns_per_op < 1_000_000
+    assert check.ns_per_op < argon2.ns_per_op
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from core import jwt_keys
+from core.jwt_keys import KeyRing
+from core.jwt_tokens import create_access_token, verify_token
+from tests.benchmarks.harness import measure
+
+
+def _pem(key) -> str:
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+@pytest.mark.benchmark
+def test_bench_sign_and_verify_per_algorithm(monkeypatch) -> None:
+    keys = [
+        {"kid": "hs", "alg": "HS256", "secret": "bench-secret-" + "x" * 32},
+        {"kid": "es", "alg": "ES256", "private_key": _pem(ec.generate_private_key(ec.SECP256R1()))},
+        {"kid": "ed", "alg": "EdDSA", "private_key": _pem(ed25519.Ed25519PrivateKey.generate())},
+    ]
+    user_id = uuid.uuid4()
+    results = {}
+    for entry in keys:
+        monkeypatch.setattr(jwt_keys, "_ring", KeyRing.from_config({"active_kid": entry["kid"], "keys": keys}))
+        token = create_access_token(user_id, "user")
+        sign = measure(f"{entry['alg']} sign", lambda: create_access_token(user_id, "user"), iterations=500)
+        verify = measure(f"{entry['alg']} verify", lambda token=token: verify_token(token, "access"), iterations=500)
+        results[entry["alg"]] = (sign, verify)
+
+    # HMAC 验签远快于非对称算法；非对称算法的价值在于验签方无需持有签名密钥
+    assert results["HS256"][1].ns_per_op < results["ES256"][1].ns_per_op
+    assert results["HS256"][1].ns_per_op < results["EdDSA"][1].ns_per_op
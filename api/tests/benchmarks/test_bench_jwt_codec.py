@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import uuid
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from core.jwt_keys import get_key_ring
+from core.jwt_tokens import _build_common_claims, _decode_hmac_fast, _encode
+from tests.benchmarks.harness import measure
+
+
+@pytest.mark.benchmark
+def test_bench_fast_hmac_codec_vs_pyjwt() -> None:
+    key = get_key_ring().active
+    claims = _build_common_claims(uuid.uuid4(), "access", timedelta(minutes=60), "user", 1)
+    headers = {"typ": "JWT", "kid": key.kid}
+    token = _encode(claims)
+
+    pyjwt_sign = measure(
+        "pyjwt encode", lambda: jwt.encode(claims, key.signing_key, algorithm=key.algorithm, headers=headers)
+    )
+    fast_sign = measure("fast encode", lambda: _encode(claims))
+    pyjwt_verify = measure(
+        "pyjwt decode",
+        lambda: jwt.decode(token, key.verifying_key, algorithms=[key.algorithm], options={"verify_exp": False}),
+    )
+    fast_verify = measure("fast decode", lambda: _decode_hmac_fast(token))
+
+    print(f"encode speedup: {pyjwt_sign.ns_per_op / fast_sign.ns_per_op:.2f}x")
+    print(f"decode speedup: {pyjwt_verify.ns_per_op / fast_verify.ns_per_op:.2f}x")
+    assert fast_sign.ns_per_op < pyjwt_sign.ns_per_op
+    assert fast_verify.ns_per_op < pyjwt_verify.ns_per_op
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from core.jwt_tokens import create_access_token, create_refresh_token, issue_token_pair, verify_token
+from tests.benchmarks.harness import measure
+
+
+@pytest.mark.benchmark
+def test_bench_issue_token_pair_vs_sign_then_verify() -> None:
+    user_id = uuid.uuid4()
+
+    def _sign_then_verify() -> None:
+        # 旧流程：签发后立即解码 refresh 以读取 jti/iat/exp
+        create_access_token(user_id, "user")
+        refresh = create_refresh_token(user_id, "user")
+        verify_token(refresh, "refresh")
+
+    def _issue_pair() -> None:
+        issue_token_pair(user_id, "user")
+
+    legacy = measure("sign access+refresh, verify refresh", _sign_then_verify, iterations=1000)
+    bundle = measure("issue_token_pair", _issue_pair, iterations=1000)
+
+    print(f"saving per login/refresh/register: {(legacy.ns_per_op - bundle.ns_per_op) / 1000:.2f} us")
+    assert bundle.ns_per_op < legacy.ns_per_op
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models import Base, User, UserCredentials
+from models.users import _CREDENTIALS_BY_USERNAME
+from tests.benchmarks.harness import measure
+
+USERNAME = "bench-login@example.com"
+
+
+# 使用同步内存库：aiosqlite 每次查询的线程切换（数百微秒）会淹没查询构建与结果加载本身的差异
+@pytest.fixture
+def sync_session() -> Iterator[Session]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username=USERNAME, password_hash="hashed:pw"))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _orm_lookup(session: Session) -> User:
+    user = session.execute(select(User).where(User.username == USERNAME)).scalars().first()
+    assert user.password_hash
+    # 每次调用后清空 identity map，模拟每个登录请求使用新会话
+    session.expunge_all()
+    return user
+
+
+@pytest.mark.benchmark
+def test_bench_login_lookup_orm_vs_projection(sync_session: Session) -> None:
+    def _projection() -> None:
+        row = sync_session.execute(_CREDENTIALS_BY_USERNAME, {"username": USERNAME}).first()
+        assert UserCredentials.from_row(row).password_hash
+        sync_session.expunge_all()
+
+    orm = measure("login lookup: select(User) ORM entity", lambda: _orm_lookup(sync_session), iterations=2000)
+    narrow = measure("login lookup: UserCredentials projection", _projection, iterations=2000)
+
+    print(
+        f"saving per login: {(orm.ns_per_op - narrow.ns_per_op) / 1000:.1f} us, "
+        f"{orm.peak_alloc_bytes - narrow.peak_alloc_bytes:,.0f} B peak allocation"
+    )
+    assert narrow.ns_per_op < orm.ns_per_op
+    assert narrow.peak_alloc_bytes < orm.peak_alloc_bytes
+
+
+@pytest.mark.benchmark
+def test_bench_email_exists_check_orm_vs_single_column(sync_session: Session) -> None:
+    def _single_column() -> None:
+        assert sync_session.execute(select(User.is_active).where(User.username == USERNAME)).scalar()
+        sync_session.expunge_all()
+
+    orm = measure("email check: select(User) ORM entity", lambda: _orm_lookup(sync_session), iterations=2000)
+    narrow = measure("email check: select(User.is_active)", _single_column, iterations=2000)
+
+    assert narrow.peak_alloc_bytes < orm.peak_alloc_bytes
@@ -28,6 +28,7 @@ _ensure_api_dir_on_syspath()
 # 现在可以安全导入 api 包内模块
 from app import app as fastapi_app  # noqa: E402
 from models.base import Base  # noqa: E402
+from services import user_agent_service  # noqa: E402
 from utils.db import get_async_db  # noqa: E402
 
 
@@ -47,6 +48,8 @@ async def async_test_engine():
     )
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # 每个测试都是全新的库：丢弃上个测试缓存的 User-Agent 字典 ID
+    user_agent_service._service = None
     try:
         yield engine
     finally:
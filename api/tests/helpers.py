@@ -37,7 +37,7 @@ async def async_persist_refresh(db: AsyncSession, user: User) -> tuple[str, Refr
         revoked_reason=None,
         device_id=None,
         ip=None,
-        user_agent=None,
+        user_agent_id=None,
     )
     db.add(rt)
     await db.commit()
@@ -67,7 +67,7 @@ async def async_create_expired_refresh_token(db: AsyncSession, user: User) -> tu
         revoked_reason=None,
         device_id=None,
         ip=None,
-        user_agent=None,
+        user_agent_id=None,
     )
     db.add(rt)
     await db.commit()
@@ -77,7 +77,8 @@ async def async_create_expired_refresh_token(db: AsyncSession, user: User) -> tu
 class FakeRedis:
     """
     简单的内存版 Redis 实现，用于测试：
-    - 支持 incr/expire/hset/hgetall/delete/get/set/setex/exists/ttl
+    - 支持 incr/expire/hset/hget/hmget/hgetall/delete/get/mget/set/setex/exists/ttl
+      以及 zadd/zscore/zrangebyscore/zremrangebyscore
     - 忽略 TTL，仅用于逻辑校验（除非明确设置 _ttl 字典）
     """
 
@@ -100,6 +101,9 @@ class FakeRedis:
             return None
         return str(value)
 
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [await self.get(key) for key in keys]
+
     async def set(self, key: str, value: str) -> None:
         self._store[key] = value
 
@@ -123,12 +127,60 @@ class FakeRedis:
             self._store[key] = {}
         self._store[key].update(mapping)
 
+    async def hget(self, key: str, field: str) -> str | None:
+        value = self._store.get(key)
+        if isinstance(value, dict):
+            return value.get(field)
+        return None
+
+    async def hmget(self, key: str, fields: list[str]) -> list[str | None]:
+        return [await self.hget(key, field) for field in fields]
+
     async def hgetall(self, key: str) -> dict[str, str]:
         value = self._store.get(key)
         if isinstance(value, dict):
             return dict(value)
         return {}
 
+    def _zset(self, key: str) -> dict[str, float]:
+        value = self._store.get(key)
+        if not isinstance(value, dict):
+            value = {}
+            self._store[key] = value
+        return value
+
+    @staticmethod
+    def _score_bound(bound: float | str) -> float:
+        if bound == "-inf":
+            return float("-inf")
+        if bound == "+inf":
+            return float("inf")
+        return float(bound)
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        zset = self._zset(key)
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    async def zscore(self, key: str, member: str) -> float | None:
+        return self._zset(key).get(member)
+
+    async def zrangebyscore(self, key: str, min: float | str, max: float | str, withscores: bool = False) -> list:
+        low, high = self._score_bound(min), self._score_bound(max)
+        items = sorted((score, member) for member, score in self._zset(key).items() if low <= score <= high)
+        if withscores:
+            return [(member, score) for score, member in items]
+        return [member for _, member in items]
+
+    async def zremrangebyscore(self, key: str, min: float | str, max: float | str) -> int:
+        low, high = self._score_bound(min), self._score_bound(max)
+        zset = self._zset(key)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
     async def delete(self, *keys: str) -> None:
         for key in keys:
             self._store.pop(key, None)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+import jwt
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import services.token_version_service as token_version_module
+import services.user_cache_service as user_cache_module
+from core.jwt_tokens import create_access_token, create_refresh_token
+from services.token_version_service import TokenVersionService
+from services.user_cache_service import UserCacheService
+from tests.helpers import FakeRedis, async_create_user
+from utils.config import settings
+
+SERVICE_HEADERS = {"X-Service-Token": "svc-secret"}
+
+
+@pytest.fixture
+def introspection_enabled(monkeypatch) -> tuple[TokenVersionService, UserCacheService]:
+    redis = FakeRedis()
+    versions = TokenVersionService(redis=redis)
+    users = UserCacheService(redis=redis)
+    monkeypatch.setattr(token_version_module, "_service", versions)
+    monkeypatch.setattr(user_cache_module, "_service", users)
+    monkeypatch.setattr(settings, "INTROSPECTION_SERVICE_TOKEN", "svc-secret")
+    return versions, users
+
+
+def _expired_access_token(user_id: uuid.UUID) -> str:
+    now = int(datetime.now(UTC).timestamp())
+    payload = {
+        "sub": str(user_id),
+        "type": "access",
+        "jti": str(uuid.uuid4()),
+        "iat": now - 100,
+        "exp": now - 1,
+        "role": "user",
+    }
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+@pytest.mark.asyncio
+async def test_introspect_requires_service_credential(async_client: AsyncClient, introspection_enabled) -> None:
+    body = {"tokens": ["x"]}
+
+    resp = await async_client.post("/api/auth/introspect", json=body)
+    assert resp.status_code == 401
+
+    resp = await async_client.post("/api/auth/introspect", json=body, headers={"X-Service-Token": "wrong"})
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_introspect_disabled_without_configured_credential(async_client: AsyncClient) -> None:
+    resp = await async_client.post("/api/auth/introspect", json={"tokens": ["x"]}, headers=SERVICE_HEADERS)
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_introspect_batch_returns_per_token_results(
+    async_client: AsyncClient, async_db_session: AsyncSession, introspection_enabled
+) -> None:
+    versions, users = introspection_enabled
+    alice = await async_create_user(async_db_session, "intro-alice", "pw", role="admin")
+    bob = await async_create_user(async_db_session, "intro-bob", "pw")
+    carol = await async_create_user(async_db_session, "intro-carol", "pw", is_active=False)
+    dave = await async_create_user(async_db_session, "intro-dave", "pw")
+    await versions.publish(dave.id, 2)
+
+    alice_token = create_access_token(alice.id, alice.role)
+    tokens = [
+        alice_token,
+        create_access_token(bob.id, bob.role),
+        create_access_token(carol.id, carol.role),
+        create_access_token(dave.id, dave.role, 1),
+        create_access_token(uuid.uuid4(), "user"),
+        _expired_access_token(bob.id),
+        create_refresh_token(bob.id, bob.role),
+        "not-a-jwt",
+        alice_token,
+    ]
+
+    resp = await async_client.post("/api/auth/introspect", json={"tokens": tokens}, headers=SERVICE_HEADERS)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["code"] == 0
+    results = body["data"]["results"]
+
+    assert len(results) == len(tokens)
+    assert results[0]["active"] is True
+    assert results[0]["sub"] == str(alice.id)
+    assert results[0]["role"] == "admin"
+    assert results[0]["username"] == "intro-alice"
+    assert results[1]["active"] is True
+    assert [r.get("reason") for r in results[2:8]] == [
+        "user_disabled",
+        "revoked",
+        "user_not_found",
+        "expired",
+        "invalid",
+        "invalid",
+    ]
+    assert results[8] == results[0]
+
+    # 所有用户通过一次 IN 查询加载
+    assert users.db_loads == 1
+
+
+@pytest.mark.asyncio
+async def test_introspect_rejects_oversized_batch(async_client: AsyncClient, introspection_enabled) -> None:
+    tokens = ["t"] * (settings.INTROSPECTION_MAX_BATCH + 1)
+    resp = await async_client.post("/api/auth/introspect", json={"tokens": tokens}, headers=SERVICE_HEADERS)
+    # 在请求校验阶段拒绝，不进入服务层
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_introspect_rejects_oversized_token(async_client: AsyncClient, introspection_enabled) -> None:
+    resp = await async_client.post("/api/auth/introspect", json={"tokens": ["t" * 4097]}, headers=SERVICE_HEADERS)
+    # 超长令牌在请求校验阶段拒绝，不进入解码与验签
+    assert resp.status_code == 422
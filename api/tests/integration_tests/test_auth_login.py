@@ -61,6 +61,8 @@ async def test_login_success_sets_refresh_cookie_and_returns_access(
     result = await async_db_session.execute(stmt)
     tokens = result.scalars().all()
     assert len(tokens) == 1
+    # 登录开启新家族：family_id 即根令牌自身 jti
+    assert tokens[0].family_id == tokens[0].jti
 
     # access_token 与 refresh_token 均应包含 role
     access_token = (body.get("data") or {}).get("access_token")
@@ -189,3 +191,59 @@ async def test_login_disabled_user_returns_403(
     result = await async_db_session.execute(stmt)
     count = len(result.scalars().all())
     assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hashing_is_saturated(
+    async_client: AsyncClient, async_db_session: AsyncSession, fake_redis_for_rate_limit: FakeRedis, monkeypatch
+) -> None:
+    """哈希并发已满且不允许排队时，登录快速返回 503 与 Retry-After，而不是堆积等待。"""
+    import core.password_hashing as password_hashing_module
+    from core.password_hashing import PasswordHashingEngine
+
+    await _create_user(async_db_session, "flood", "pw")
+    engine = PasswordHashingEngine(mode="inline", max_concurrency=1, max_queue=0, queue_timeout_seconds=3)
+    monkeypatch.setattr(password_hashing_module, "_engine", engine)
+    await engine.admission.acquire()
+
+    resp = await async_client.post("/api/auth/login", json={"username": "flood", "password": "pw"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "3"
+    assert resp.json()["code"] == 50301
+    assert engine.stats()["admission"]["rejected_queue_full"] == 1
+
+    # 名额释放后恢复正常
+    engine.admission.release()
+    resp = await async_client.post("/api/auth/login", json={"username": "flood", "password": "pw"})
+    assert resp.json()["code"] == 0
+
+
+@pytest.mark.asyncio
+async def test_login_upgrades_outdated_password_hash(
+    async_client: AsyncClient, async_db_session: AsyncSession, fake_redis_for_rate_limit: FakeRedis
+) -> None:
+    """存储的哈希参数与当前配置不一致时，登录成功后按当前参数重算。"""
+    from argon2 import PasswordHasher, extract_parameters
+
+    from core.security import password_needs_rehash
+    from utils.config import settings
+
+    weak_hash = PasswordHasher(time_cost=1, memory_cost=64, parallelism=1).hash("pw")
+    user = User(username="legacy", password_hash=weak_hash, role="user", is_active=True)
+    async_db_session.add(user)
+    await async_db_session.commit()
+
+    resp = await async_client.post("/api/auth/login", json={"username": "legacy", "password": "pw"})
+    assert resp.json()["code"] == 0
+
+    await async_db_session.refresh(user)
+    assert user.password_hash != weak_hash
+    assert password_needs_rehash(user.password_hash) is False
+    params = extract_parameters(user.password_hash)
+    assert params.time_cost == settings.ARGON2_TIME_COST
+    assert params.memory_cost == settings.ARGON2_MEMORY_COST
+    assert params.parallelism == settings.ARGON2_PARALLELISM
+
+    # 升级后的哈希仍可正常登录
+    resp = await async_client.post("/api/auth/login", json={"username": "legacy", "password": "pw"})
+    assert resp.json()["code"] == 0
@@ -5,8 +5,10 @@ from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import services.access_denylist_service as access_denylist_module
 from models import RefreshToken, User
-from tests.helpers import async_create_user
+from services.access_denylist_service import AccessDenylistService
+from tests.helpers import FakeRedis, async_create_user
 
 
 async def _create_user(db: AsyncSession, username: str, password: str, *, is_active: bool = True) -> User:
@@ -71,3 +73,23 @@ async def test_logout_endpoint_revokes_family_then_old_cookie_refresh_fails(
     tokens = result.scalars().all()
     assert len(tokens) >= 1
     assert all(t.revoked for t in tokens)
+
+
+# 登出时携带 Authorization：当前 access token 进入注销名单，随后访问受保护接口返回 401。
+@pytest.mark.asyncio
+async def test_logout_with_bearer_revokes_access_token(
+    async_client: AsyncClient, async_db_session: AsyncSession, monkeypatch
+) -> None:
+    monkeypatch.setattr(access_denylist_module, "_service", AccessDenylistService(redis=FakeRedis()))
+    await _create_user(async_db_session, "low", "pw")
+
+    r1 = await async_client.post("/api/auth/login", json={"username": "low", "password": "pw"})
+    headers = {"Authorization": f"Bearer {r1.json()['data']['access_token']}"}
+    assert (await async_client.get("/api/auth/me", headers=headers)).status_code == 200
+
+    async_client.cookies.set("refresh_token", r1.cookies.get("refresh_token"))
+    r2 = await async_client.post("/api/auth/logout", headers=headers)
+    assert r2.json()["code"] == 0
+
+    r3 = await async_client.get("/api/auth/me", headers=headers)
+    assert r3.status_code == 401
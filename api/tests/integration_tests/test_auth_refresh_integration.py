@@ -5,8 +5,10 @@ from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import services.refresh_grace_service as refresh_grace_module
 from models import RefreshToken, User
-from tests.helpers import async_create_expired_refresh_token, async_create_user
+from services.refresh_grace_service import RefreshGraceService
+from tests.helpers import FakeRedis, async_create_expired_refresh_token, async_create_user
 
 
 async def _create_user(db: AsyncSession, username: str, password: str, *, is_active: bool = True) -> User:
@@ -50,10 +52,14 @@ async def test_refresh_endpoint_success_sets_new_cookie(
     assert child is not None
 
 
-# 复用检测：同一旧 refresh 再次使用，服务应撤销该家族全部刷新令牌，
+# 复用检测：超出宽限窗口后同一旧 refresh 再次使用，服务应撤销该家族全部刷新令牌，
 # 接口返回 40112；随后即便携带较新的 refresh 也应失败。
 @pytest.mark.asyncio
-async def test_refresh_endpoint_reuse_revokes_family(async_client: AsyncClient, async_db_session: AsyncSession) -> None:
+async def test_refresh_endpoint_reuse_revokes_family(
+    async_client: AsyncClient, async_db_session: AsyncSession, monkeypatch
+) -> None:
+    # 宽限窗口关闭：等价于重复提交发生在窗口之外
+    monkeypatch.setattr(refresh_grace_module, "_service", RefreshGraceService(redis=FakeRedis(), grace_seconds=0))
     await _create_user(async_db_session, "frank", "pw")
 
     r1 = await async_client.post("/api/auth/login", json={"username": "frank", "password": "pw"})
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.helpers import async_create_user
+
+
+async def _login(async_client: AsyncClient, username: str) -> tuple[str, str]:
+    resp = await async_client.post("/api/auth/login", json={"username": username, "password": "pw"})
+    assert resp.json()["code"] == 0
+    return resp.json()["data"]["access_token"], resp.cookies.get("refresh_token")
+
+
+# 列出会话（标记当前会话），撤销其他设备上的会话后不再出现在列表中。
+@pytest.mark.asyncio
+async def test_list_and_revoke_sessions(async_client: AsyncClient, async_db_session: AsyncSession) -> None:
+    await async_create_user(async_db_session, "sess@example.com", "pw")
+    await _login(async_client, "sess@example.com")
+    access_token, cookie = await _login(async_client, "sess@example.com")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    async_client.cookies.set("refresh_token", cookie)
+
+    listed = (await async_client.get("/api/auth/sessions", headers=headers)).json()
+    assert listed["code"] == 0
+    items = listed["data"]["items"]
+    assert len(items) == 2
+    assert [item["current"] for item in items] == [True, False]
+    assert items[0]["user_agent"]
+
+    other_id = items[1]["id"]
+    revoked = await async_client.delete(f"/api/auth/sessions/{other_id}", headers=headers)
+    assert revoked.json()["code"] == 0
+
+    listed = (await async_client.get("/api/auth/sessions", headers=headers, params={"limit": 1})).json()
+    assert [item["id"] for item in listed["data"]["items"]] == [items[0]["id"]]
+    assert listed["data"]["next_cursor"] is None
+
+    missing = await async_client.delete(f"/api/auth/sessions/{other_id}", headers=headers)
+    assert missing.json()["code"] == 40402
+
+
+@pytest.mark.asyncio
+async def test_sessions_require_authentication_and_valid_id(
+    async_client: AsyncClient, async_db_session: AsyncSession
+) -> None:
+    await async_create_user(async_db_session, "sess2@example.com", "pw")
+    access_token, _cookie = await _login(async_client, "sess2@example.com")
+
+    assert (await async_client.get("/api/auth/sessions")).status_code == 401
+    assert (await async_client.delete(f"/api/auth/sessions/{uuid.uuid4()}")).status_code == 401
+
+    bad_id = await async_client.delete(
+        "/api/auth/sessions/not-a-uuid", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert bad_id.status_code == 422
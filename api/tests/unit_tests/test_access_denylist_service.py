@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from core.bloom import BloomFilter, optimal_size
+from services.access_denylist_service import AccessDenylistService
+from tests.helpers import FakeRedis
+from utils.config import settings
+
+
+class _CountingRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.zscore_calls = 0
+        self.sync_calls = 0
+
+    async def zscore(self, key: str, member: str) -> float | None:
+        self.zscore_calls += 1
+        return await super().zscore(key, member)
+
+    async def zrangebyscore(self, key: str, min, max, withscores: bool = False) -> list:
+        self.sync_calls += 1
+        # 让出事件循环，使并发调用方在同步进行中到达
+        await asyncio.sleep(0.01)
+        return await super().zrangebyscore(key, min, max, withscores=withscores)
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives() -> None:
+    bloom = BloomFilter(5000, 0.01)
+    members = [str(uuid.uuid4()) for _ in range(5000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(20000))
+    assert false_positives / 20000 < 0.03
+    assert not bloom.saturated
+
+
+def test_bloom_sizing_follows_capacity() -> None:
+    bits, hashes = optimal_size(1000, 0.001)
+    assert 14000 < bits < 15000
+    assert hashes == 10
+
+
+def test_capacity_sized_from_access_token_lifetime(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EXPIRES_MINUTES", 30)
+    service = AccessDenylistService(redis=FakeRedis(), revocations_per_minute=10)
+    assert service.capacity == 600
+    assert service.window_seconds == 1800
+
+
+@pytest.mark.asyncio
+async def test_revocation_visible_locally_and_on_other_workers_after_sync() -> None:
+    redis = _CountingRedis()
+    worker_a = AccessDenylistService(redis=redis, sync_interval_seconds=3600)
+    worker_b = AccessDenylistService(redis=redis, sync_interval_seconds=3600)
+    jti = str(uuid.uuid4())
+
+    assert await worker_b.is_revoked(jti) is False  # 首次调用完成初始同步
+    await worker_a.revoke(jti, int(time.time()) + 60)
+
+    assert await worker_a.is_revoked(jti) is True
+    # 另一 worker 在下次同步前仍使用旧过滤器
+    assert await worker_b.is_revoked(jti) is False
+    await worker_b.sync()
+    assert await worker_b.is_revoked(jti) is True
+
+
+@pytest.mark.asyncio
+async def test_bloom_miss_skips_redis() -> None:
+    redis = _CountingRedis()
+    service = AccessDenylistService(redis=redis, sync_interval_seconds=3600)
+    await service.revoke(str(uuid.uuid4()), int(time.time()) + 60)
+
+    for _ in range(100):
+        assert await service.is_revoked(str(uuid.uuid4())) is False
+    assert redis.zscore_calls == service.bloom_hits
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_not_recorded_and_old_entries_pruned() -> None:
+    redis = FakeRedis()
+    service = AccessDenylistService(redis=redis)
+    await service.revoke(str(uuid.uuid4()), int(time.time()) - 1)
+    assert await redis.zrangebyscore(service.KEY, "-inf", "+inf") == []
+
+    await redis.zadd(service.KEY, {"stale": time.time() - service.window_seconds - 10})
+    await service.revoke(str(uuid.uuid4()), int(time.time()) + 60)
+    assert "stale" not in await redis.zrangebyscore(service.KEY, "-inf", "+inf")
+
+
+# 增量同步每次都回看时钟偏差窗口：重复拉到的 jti 不能虚增占用，否则会触发提前全量重建
+@pytest.mark.asyncio
+async def test_incremental_sync_does_not_recount_skew_window_entries() -> None:
+    redis = FakeRedis()
+    worker_a = AccessDenylistService(redis=redis, revocations_per_minute=1)
+    worker_b = AccessDenylistService(redis=redis, revocations_per_minute=1)
+    await worker_b.sync()
+    rebuild_at = worker_b._rebuild_at
+    await worker_a.revoke(str(uuid.uuid4()), int(time.time()) + 60)
+
+    for _ in range(worker_b.capacity + 5):
+        await worker_b.sync()
+
+    assert worker_b.stats()["count"] == 1
+    assert worker_b._rebuild_at == rebuild_at
+
+
+@pytest.mark.asyncio
+async def test_sync_runs_off_the_request_path() -> None:
+    redis = _CountingRedis()
+    service = AccessDenylistService(redis=redis, sync_interval_seconds=60)
+
+    # 首次查询完成初始同步；此后即使到期也由后台任务同步，查询本身不访问 Redis
+    await service.is_revoked(str(uuid.uuid4()))
+    service._next_sync_at = time.monotonic()
+    for _ in range(10):
+        await service.is_revoked(str(uuid.uuid4()))
+    assert redis.sync_calls == 1
+
+    # 后台任务未运行、同步逾期超过一个周期时，在后台补发一次同步
+    service._next_sync_at = time.monotonic() - 2 * service.sync_interval_seconds
+    await service.is_revoked(str(uuid.uuid4()))
+    assert service._sync_task is not None
+    await service._sync_task
+    assert redis.sync_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_checks_wait_for_the_in_flight_sync() -> None:
+    redis = _CountingRedis()
+    jti = str(uuid.uuid4())
+    await AccessDenylistService(redis=redis, sync_interval_seconds=3600).revoke(jti, int(time.time()) + 60)
+
+    # 新 worker 尚未同步：第二个请求在第一次同步进行中到达，也必须等待同一次同步，而不是查空过滤器
+    worker = AccessDenylistService(redis=redis, sync_interval_seconds=3600)
+    assert await asyncio.gather(worker.is_revoked(jti), worker.is_revoked(jti)) == [True, True]
+    assert redis.sync_calls == 1
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, AdmissionRejectedError
+
+
+def _controller(**overrides) -> AdmissionController:
+    params = {"max_concurrency": 2, "max_queue": 2, "queue_timeout_seconds": 1.0}
+    params.update(overrides)
+    return AdmissionController("test", **params)
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_concurrency_without_queueing() -> None:
+    controller = _controller()
+    await controller.acquire()
+    await controller.acquire()
+    stats = controller.stats()
+    assert stats["active"] == 2
+    assert stats["queued"] == 0
+    controller.release()
+    controller.release()
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_fifo_order() -> None:
+    controller = _controller(max_concurrency=1, max_queue=3)
+    order: list[int] = []
+    await controller.acquire()
+
+    async def worker(i: int) -> None:
+        async with controller.slot():
+            order.append(i)
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    assert controller.queue_depth == 3
+    controller.release()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2]
+    stats = controller.stats()
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] == 3
+    assert stats["admitted"] == 4
+    assert stats["wait_ms_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately() -> None:
+    controller = _controller(max_concurrency=1, max_queue=1, queue_timeout_seconds=5)
+    await controller.acquire()
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "queue_full"
+    assert exc_info.value.retry_after == 5
+    assert controller.stats()["rejected_queue_full"] == 1
+
+    controller.release()
+    await queued
+    controller.release()
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_deadline_rejects_and_frees_the_queue_slot() -> None:
+    controller = _controller(max_concurrency=1, max_queue=1, queue_timeout_seconds=0.01)
+    await controller.acquire()
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "timeout"
+    assert exc_info.value.retry_after == 1
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queue_depth"] == 0
+
+    controller.release()
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slots() -> None:
+    controller = _controller(max_concurrency=1, max_queue=2)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    controller.release()
+    stats = controller.stats()
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+    # 名额已全部归还：可再次立即获取
+    await asyncio.wait_for(controller.acquire(), 0.1)
+
+
+@pytest.mark.asyncio
+async def test_slot_handed_over_at_timeout_is_not_leaked(monkeypatch) -> None:
+    controller = _controller(max_concurrency=1, max_queue=1)
+    await controller.acquire()
+
+    async def _wait_for_racing_release(future, timeout):
+        # 强制竞态：release() 把名额移交给等待者的同时，wait_for 判定超时
+        controller.release()
+        assert future.done()
+        raise TimeoutError
+
+    monkeypatch.setattr(asyncio, "wait_for", _wait_for_racing_release)
+    await controller.acquire()
+    monkeypatch.undo()
+
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 0
+    assert stats["active"] == 1
+    controller.release()
+    assert controller.stats()["active"] == 0
+    await asyncio.wait_for(controller.acquire(), 0.1)
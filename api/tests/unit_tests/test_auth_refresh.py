@@ -5,13 +5,24 @@ from sqlalchemy import select
 
 from models import RefreshToken, User
 from services.auth_service import AuthService
-from tests.helpers import async_create_expired_refresh_token, async_create_user, async_persist_refresh
+from services.refresh_grace_service import RefreshGraceService
+from tests.helpers import FakeRedis, async_create_expired_refresh_token, async_create_user, async_persist_refresh
 
 
 async def _create_user(db, username: str, password: str) -> User:  # 兼容旧调用签名
     return await async_create_user(db, username, password)
 
 
+def _refresh_token_statement_recorder(statements: list[str]):
+    """记录访问 refresh_tokens 的 SQL 语句类型（SELECT/UPDATE/INSERT...），用于断言数据库往返次数。"""
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "refresh_tokens" in statement:
+            statements.append(statement.split()[0].upper())
+
+    return _record
+
+
 # 服务层：刷新成功的轮换流程——旧刷新令牌 used_at 置位；
 # 新刷新令牌插入且 parent_jti 指向旧 jti，同时返回新的 access_token。
 @pytest.mark.asyncio
@@ -40,7 +51,7 @@ async def test_refresh_rotate_success(async_db_session) -> None:
     assert len(children) == 1
 
 
-# 服务层：复用检测——同一刷新令牌第二次使用将被识别为复用；
+# 服务层：复用检测——超出宽限窗口后同一刷新令牌第二次使用将被识别为复用；
 # 服务撤销整个家族的刷新令牌（全部 revoked=true）。
 @pytest.mark.asyncio
 async def test_refresh_reuse_detects_and_revokes_family(async_db_session) -> None:
@@ -48,7 +59,8 @@ async def test_refresh_reuse_detects_and_revokes_family(async_db_session) -> Non
     token, rt = await async_persist_refresh(async_db_session, user)
     rt_jti = rt.jti  # 在 expire_all 前保存 jti
 
-    service = AuthService()
+    # 宽限窗口关闭：等价于重复提交发生在窗口之外
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=0))
     first = await service.refresh(db=async_db_session, refresh_token=token)
     assert first["code"] == 0
 
@@ -78,3 +90,243 @@ async def test_refresh_expired_returns_401(async_db_session) -> None:
     service = AuthService()
     result = await service.refresh(db=async_db_session, refresh_token=expired_token)
     assert result["code"] == 40111
+
+
+# 服务层：family_id 在登录时确定、轮换时继承；撤销整个家族只需一条 UPDATE，与链长无关，且不影响其他家族。
+@pytest.mark.asyncio
+async def test_family_revocation_is_single_update_regardless_of_chain_length(async_db_session) -> None:
+    from sqlalchemy import event
+
+    user = await _create_user(async_db_session, "r-chain", "pw")
+    token, root = await async_persist_refresh(async_db_session, user)
+    root_jti = root.jti
+    _other_token, other = await async_persist_refresh(async_db_session, user)
+    other_jti = other.jti
+
+    service = AuthService()
+    for _ in range(20):
+        result = await service.refresh(db=async_db_session, refresh_token=token)
+        assert result["code"] == 0
+        token = result["data"]["refresh_token"]
+
+    async_db_session.expire_all()
+    family = (await async_db_session.execute(select(RefreshToken).filter(RefreshToken.family_id == root_jti))).scalars()
+    assert len(family.all()) == 21
+
+    statements: list[str] = []
+    recorder = _refresh_token_statement_recorder(statements)
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", recorder)
+    try:
+        assert (await service.logout(db=async_db_session, refresh_token=token))["code"] == 0
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", recorder)
+
+    # 一次按 jti 定位 + 一次按 family_id 的 UPDATE（不再逐代查询）
+    assert statements.count("UPDATE") == 1
+    assert statements.count("SELECT") <= 1
+
+    async_db_session.expire_all()
+    tokens = (await async_db_session.execute(select(RefreshToken))).scalars().all()
+    assert all(t.revoked for t in tokens if t.family_id == root_jti)
+    assert all(t.revoked_reason == "logout" for t in tokens if t.family_id == root_jti)
+    # 另一登录会话（另一家族）不受影响
+    untouched = next(t for t in tokens if t.jti == other_jti)
+    assert untouched.family_id == other_jti
+    assert untouched.revoked is False
+
+
+# 服务层：正常轮换不先 SELECT 旧记录，只有条件认领 UPDATE 与新记录 INSERT（PostgreSQL 上合并为一条语句）。
+@pytest.mark.asyncio
+async def test_refresh_happy_path_claims_without_select(async_db_session) -> None:
+    from sqlalchemy import event
+
+    user = await _create_user(async_db_session, "r-atomic", "pw")
+    token, _rt = await async_persist_refresh(async_db_session, user)
+
+    statements: list[str] = []
+    recorder = _refresh_token_statement_recorder(statements)
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", recorder)
+    try:
+        result = await AuthService().refresh(db=async_db_session, refresh_token=token)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", recorder)
+
+    assert result["code"] == 0
+    assert statements == ["UPDATE", "INSERT"]
+
+
+# 服务层：同一旧令牌只能被认领一次——模拟两个并发刷新同时通过 JWT 校验后竞争认领。
+@pytest.mark.asyncio
+async def test_rotation_claim_is_exclusive(async_db_session) -> None:
+    from datetime import UTC, datetime
+
+    from core.jwt_tokens import issue_token_pair
+
+    user = await _create_user(async_db_session, "r-race", "pw")
+    _token, rt = await async_persist_refresh(async_db_session, user)
+    rt_jti, family_id, expires_at = rt.jti, rt.family_id, rt.expires_at
+    service = AuthService()
+
+    outcomes = []
+    for _ in range(2):
+        tokens = issue_token_pair(user.id, user.role, 1)
+        outcomes.append(
+            await service._rotate_refresh_token(
+                async_db_session,
+                jti=rt_jti,
+                expires_at=expires_at,
+                tokens=tokens,
+                now=datetime.now(UTC),
+                device_id=None,
+                client_ip=None,
+                user_agent_id=None,
+            )
+        )
+    await async_db_session.commit()
+
+    assert outcomes == [True, False]
+    async_db_session.expire_all()
+    children = (
+        (await async_db_session.execute(select(RefreshToken).filter(RefreshToken.parent_jti == rt_jti))).scalars().all()
+    )
+    assert len(children) == 1
+    assert children[0].family_id == family_id
+
+
+def test_postgresql_rotation_is_a_single_statement() -> None:
+    import uuid
+    from datetime import UTC, datetime
+
+    from sqlalchemy.dialects import postgresql
+
+    from core.jwt_tokens import issue_token_pair
+
+    tokens = issue_token_pair(uuid.uuid4(), "user", 1)
+    stmt = AuthService._build_rotation_statement(
+        jti="old-jti",
+        expires_at=datetime.now(UTC),
+        tokens=tokens,
+        now=datetime.now(UTC),
+        device_id=None,
+        client_ip="127.0.0.1",
+        user_agent_id=1,
+    )
+    sql = " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+    assert sql.startswith("WITH claimed AS (UPDATE refresh_tokens SET used_at=")
+    assert "refresh_tokens.expires_at = " in sql
+    assert "refresh_tokens.used_at IS NULL AND refresh_tokens.revoked IS false" in sql
+    assert "INSERT INTO refresh_tokens" in sql
+    assert "FROM claimed RETURNING refresh_tokens.id" in sql
+
+
+# 服务层：并发刷新宽限窗口——窗口内重复提交同一旧令牌，返回首个请求的轮换结果，家族不被撤销。
+@pytest.mark.asyncio
+async def test_duplicate_refresh_within_grace_window_replays_result(async_db_session) -> None:
+    from sqlalchemy import event
+
+    user = await _create_user(async_db_session, "r-grace", "pw")
+    token, rt = await async_persist_refresh(async_db_session, user)
+    rt_jti = rt.jti
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=10))
+
+    first = await service.refresh(db=async_db_session, refresh_token=token)
+    assert first["code"] == 0
+
+    statements: list[str] = []
+    recorder = _refresh_token_statement_recorder(statements)
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", recorder)
+    try:
+        second = await service.refresh(db=async_db_session, refresh_token=token)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", recorder)
+
+    assert second == first
+    # 认领失败的 UPDATE + 新令牌有效性点查，不再撤销家族
+    assert statements == ["UPDATE", "SELECT"]
+
+    async_db_session.expire_all()
+    tokens = (await async_db_session.execute(select(RefreshToken))).scalars().all()
+    assert len(tokens) == 2
+    assert not any(t.revoked for t in tokens)
+    assert len([t for t in tokens if t.parent_jti == rt_jti]) == 1
+
+    # 两个标签页拿到的是同一个新 refresh 令牌，后续可正常轮换
+    third = await service.refresh(db=async_db_session, refresh_token=second["data"]["refresh_token"])
+    assert third["code"] == 0
+
+
+# 服务层：两个刷新交错——重复请求阻塞在旧令牌的行锁上，首个请求提交（释放锁）的瞬间立即认领失败并读取宽限条目。
+# 宽限条目必须在提交前就已写入，否则重复请求会被误判为复用而撤销整个家族。
+@pytest.mark.asyncio
+async def test_duplicate_refresh_right_after_commit_replays_result(async_db_session, monkeypatch) -> None:
+    user = await _create_user(async_db_session, "r-grace-race", "pw")
+    token, _rt = await async_persist_refresh(async_db_session, user)
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=10))
+
+    commit = async_db_session.commit
+    duplicates: list[dict] = []
+
+    async def _commit_then_run_duplicate() -> None:
+        await commit()
+        if not duplicates:
+            duplicates.append({})
+            duplicates[0] = await service.refresh(db=async_db_session, refresh_token=token)
+
+    monkeypatch.setattr(async_db_session, "commit", _commit_then_run_duplicate)
+    first = await service.refresh(db=async_db_session, refresh_token=token)
+    monkeypatch.undo()
+
+    assert first["code"] == 0
+    assert duplicates == [first]
+    async_db_session.expire_all()
+    tokens = (await async_db_session.execute(select(RefreshToken))).scalars().all()
+    assert len(tokens) == 2
+    assert not any(t.revoked for t in tokens)
+
+
+# 服务层：窗口内家族已被撤销（如登出）时，重放旧令牌不再返回缓存结果。
+@pytest.mark.asyncio
+async def test_grace_window_does_not_resurrect_revoked_family(async_db_session) -> None:
+    user = await _create_user(async_db_session, "r-grace-logout", "pw")
+    token, _rt = await async_persist_refresh(async_db_session, user)
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=10))
+
+    first = await service.refresh(db=async_db_session, refresh_token=token)
+    assert first["code"] == 0
+    assert (await service.logout(db=async_db_session, refresh_token=first["data"]["refresh_token"]))["code"] == 0
+
+    replay = await service.refresh(db=async_db_session, refresh_token=token)
+    assert replay["code"] == 40112
+
+
+# 服务层：按 jti 定位刷新令牌的语句都带上 expires_at（= JWT exp），分区表上只访问一个分区。
+@pytest.mark.asyncio
+async def test_jti_lookups_carry_partition_key(async_db_session) -> None:
+    from sqlalchemy import event
+
+    user = await _create_user(async_db_session, "r-partition", "pw")
+    token, _rt = await async_persist_refresh(async_db_session, user)
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=0))
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        # 按 family_id 撤销整个家族的 UPDATE 不属于按 jti 的定位查询
+        if "refresh_tokens.jti =" in statement and "refresh_tokens.family_id =" not in statement:
+            statements.append(" ".join(statement.split()))
+
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        first = await service.refresh(db=async_db_session, refresh_token=token)
+        assert (await service.refresh(db=async_db_session, refresh_token=token))["code"] == 40112  # 复用慢路径
+        await service.logout(db=async_db_session, refresh_token=first["data"]["refresh_token"])
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+    # 认领 UPDATE、复用慢路径 SELECT、登出 SELECT
+    assert len(statements) >= 3
+    assert all("refresh_tokens.expires_at =" in sql for sql in statements)
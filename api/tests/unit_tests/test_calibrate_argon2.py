@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from argon2 import PasswordHasher
+
+from utils.calibrate_argon2 import calibrate, main
+
+
+def test_generous_target_uses_max_memory_and_caps_time_cost() -> None:
+    result = calibrate(10_000, max_memory_kib=256, min_memory_kib=64, samples=1, max_time_cost=4)
+    assert result.memory_cost == 256
+    assert result.time_cost == 4
+    assert result.parallelism == 1
+
+
+def test_unreachable_target_falls_back_to_weakest_parameters() -> None:
+    result = calibrate(0.000_001, max_memory_kib=1024, min_memory_kib=256, samples=1)
+    assert result.memory_cost == 256
+    assert result.time_cost == 1
+    # 如实报告实测耗时（超过目标）
+    assert result.verify_ms > 0
+
+
+def test_env_lines_produce_a_usable_hasher(capsys) -> None:
+    main(["--target-ms", "5", "--max-memory-mib", "1", "--min-memory-mib", "1", "--samples", "1"])
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("ARGON2_")]
+    params = dict(line.split("=", 1) for line in lines)
+    assert set(params) == {"ARGON2_TIME_COST", "ARGON2_MEMORY_COST", "ARGON2_PARALLELISM"}
+    hasher = PasswordHasher(
+        time_cost=int(params["ARGON2_TIME_COST"]),
+        memory_cost=int(params["ARGON2_MEMORY_COST"]),
+        parallelism=int(params["ARGON2_PARALLELISM"]),
+    )
+    assert hasher.verify(hasher.hash("pw"), "pw")
@@ -297,3 +297,54 @@ async def test_verify_and_consume_code_exceed_max_attempts(async_db_session, fak
             # 验证 key 已被删除
             stored = await fake_redis.hgetall(code_key)
             assert stored == {}
+
+
+@pytest.mark.asyncio
+async def test_code_stored_as_hmac_digest_and_consumed(async_db_session, fake_redis: FakeRedis, noop_email_sender):
+    service = EmailVerificationService()
+    email = "digest@example.com"
+    resp = await service.send_register_code(db=async_db_session, email=email, client_ip=None)
+    assert resp["code"] == 0
+    _email, real_code, _expires = noop_email_sender[0]
+
+    code_key = f"{EmailVerificationService.KEY_PREFIX_CODE}:{EmailVerificationService.SCENE_REGISTER}:{email}"
+    stored = await fake_redis.hgetall(code_key)
+    assert stored["code_hash"].startswith(EmailVerificationService.CODE_DIGEST_PREFIX)
+    assert real_code not in stored["code_hash"]
+
+    result = await service.verify_and_consume_code(email=email, code=real_code)
+    assert result["code"] == 0
+    assert await fake_redis.hgetall(code_key) == {}
+
+
+@pytest.mark.asyncio
+async def test_code_digest_is_bound_to_scene(async_db_session, fake_redis: FakeRedis, noop_email_sender):
+    service = EmailVerificationService()
+    email = "scene@example.com"
+    await service.send_register_code(db=async_db_session, email=email, client_ip=None)
+    _email, real_code, _expires = noop_email_sender[0]
+
+    # 把注册场景的记录原样挪到重置密码场景的 key 下，不应通过校验
+    prefix = EmailVerificationService.KEY_PREFIX_CODE
+    stored = await fake_redis.hgetall(f"{prefix}:{EmailVerificationService.SCENE_REGISTER}:{email}")
+    await fake_redis.hset(f"{prefix}:{EmailVerificationService.SCENE_RESET_PASSWORD}:{email}", mapping=stored)
+
+    result = await service.verify_and_consume_code(
+        email=email, code=real_code, scene=EmailVerificationService.SCENE_RESET_PASSWORD
+    )
+    assert result["code"] == 40004
+
+
+@pytest.mark.asyncio
+async def test_legacy_argon2_code_hash_still_verifies(fake_redis: FakeRedis):
+    """升级前写入 Redis 的 Argon2 验证码哈希在过期前仍可使用。"""
+    from core.security import hash_password
+
+    service = EmailVerificationService()
+    email = "legacy-code@example.com"
+    code_key = f"{EmailVerificationService.KEY_PREFIX_CODE}:{EmailVerificationService.SCENE_REGISTER}:{email}"
+    mapping = {"code_hash": hash_password("246810"), "used": "0", "failed_attempts": "0"}
+    await fake_redis.hset(code_key, mapping=mapping)
+
+    assert (await service.verify_and_consume_code(email=email, code="135790"))["code"] == 40004
+    assert (await service.verify_and_consume_code(email=email, code="246810"))["code"] == 0
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+import pytest
+
+from core import ids
+from core.ids import uuid7, uuid7_timestamp_ms
+from models import User
+from tests.helpers import async_create_user
+
+
+def test_uuid7_layout() -> None:
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert before <= uuid7_timestamp_ms(value) <= after + 1
+    assert uuid7_timestamp_ms(uuid.uuid4()) is None
+
+
+def test_uuid7_is_strictly_increasing_within_a_millisecond_burst() -> None:
+    values = [uuid7() for _ in range(20000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_stays_monotonic_when_clock_goes_backwards(monkeypatch) -> None:
+    first = uuid7()
+    monkeypatch.setattr(ids.time, "time_ns", lambda: (uuid7_timestamp_ms(first) - 5000) * 1_000_000)
+
+    assert uuid7() > first
+
+
+@pytest.mark.asyncio
+async def test_new_users_get_uuid7_and_existing_v4_ids_stay_valid(async_db_session) -> None:
+    legacy_id = uuid.uuid4()
+    async_db_session.add(User(id=legacy_id, username="legacy", password_hash="hashed:pw"))
+    await async_db_session.commit()
+
+    user = await async_create_user(async_db_session, "fresh", "pw")
+
+    assert user.id.version == 7
+    assert (await async_db_session.get(User, legacy_id)).username == "legacy"
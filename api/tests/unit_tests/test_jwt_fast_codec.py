@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random
+import uuid
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from core import jwt_keys
+from core.jwt_keys import KeyRing
+from core.jwt_tokens import (
+    TokenInvalidError,
+    TokenSignatureError,
+    _decode_hmac_fast,
+    _encode,
+    create_access_token,
+    verify_token,
+)
+from utils.config import settings
+
+ROLES = ["user", "admin", "审计员", 'r"quote\\', ""]
+
+
+def _random_claims(rng: random.Random) -> dict:
+    claims = {
+        "sub": str(uuid.UUID(int=rng.getrandbits(128))),
+        "type": rng.choice(["access", "refresh"]),
+        "jti": str(uuid.UUID(int=rng.getrandbits(128))),
+        "iat": rng.randrange(0, 2**31),
+        "exp": rng.randrange(0, 2**40),
+        "role": rng.choice(ROLES),
+        "ver": rng.randrange(1, 10**6),
+    }
+    if rng.random() < 0.5:
+        claims["perm"] = rng.randrange(0, 2**20)
+    return claims
+
+
+@pytest.fixture(params=["HS256", "HS384", "HS512"])
+def hmac_ring(request, monkeypatch) -> KeyRing:
+    secret = "fast-codec-" + request.param
+    ring = KeyRing.from_config({"active_kid": "k1", "keys": [{"kid": "k1", "alg": request.param, "secret": secret}]})
+    monkeypatch.setattr(jwt_keys, "_ring", ring)
+    return ring
+
+
+def test_encode_is_byte_identical_to_pyjwt(hmac_ring: KeyRing) -> None:
+    rng = random.Random(20261017)  # noqa: S311 - 固定种子的测试数据
+    key = hmac_ring.active
+    for _ in range(300):
+        claims = _random_claims(rng)
+        expected = jwt.encode(claims, key.signing_key, algorithm=key.algorithm, headers={"typ": "JWT", "kid": "k1"})
+        assert _encode(claims) == expected
+
+
+def test_fast_decode_matches_pyjwt(hmac_ring: KeyRing) -> None:
+    rng = random.Random(7)  # noqa: S311 - 固定种子的测试数据
+    key = hmac_ring.active
+    for _ in range(300):
+        claims = _random_claims(rng)
+        token = _encode(claims)
+        decoded = _decode_hmac_fast(token)
+        assert decoded == jwt.decode(
+            token, key.verifying_key, algorithms=[key.algorithm], options={"verify_exp": False, "verify_iat": False}
+        )
+        assert decoded == claims
+
+
+def test_legacy_tokens_without_kid_use_fast_path() -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    claims = verify_token(token, "access")
+    legacy = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    assert _decode_hmac_fast(legacy) == claims
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda t: t[:-2] + ("AA" if not t.endswith("AA") else "BB"),  # 签名被篡改
+        lambda t: t + ".extra",  # 段数错误
+        lambda t: t.replace(".", "", 1),  # 段数错误
+        lambda t: t[:-1] + "é",  # 非 ASCII
+    ],
+)
+def test_fast_path_defers_malformed_tokens(mutate) -> None:
+    token = mutate(create_access_token(uuid.uuid4(), "user"))
+    assert _decode_hmac_fast(token) is None
+    with pytest.raises((TokenSignatureError, TokenInvalidError)):
+        verify_token(token, "access")
+
+
+def test_unknown_claims_defer_to_pyjwt_semantics() -> None:
+    claims = verify_token(create_access_token(uuid.uuid4(), "user"), "access")
+    claims["aud"] = "other-service"
+    token = _encode(claims)
+
+    # 签名有效但含 aud：快速路径不接管，PyJWT 按原有语义拒绝
+    assert _decode_hmac_fast(token) is None
+    with pytest.raises(TokenInvalidError):
+        verify_token(token, "access")
+
+
+def test_non_hmac_active_key_falls_back_to_pyjwt(monkeypatch) -> None:
+    pem = (
+        ed25519.Ed25519PrivateKey.generate()
+        .private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        .decode()
+    )
+    ring = KeyRing.from_config(
+        {
+            "active_kid": "ed",
+            "keys": [
+                {"kid": "ed", "alg": "EdDSA", "private_key": pem},
+                {"kid": "default", "alg": "HS256", "secret": settings.JWT_SECRET},
+            ],
+        }
+    )
+    monkeypatch.setattr(jwt_keys, "_ring", ring)
+    token = create_access_token(uuid.uuid4(), "user")
+    assert jwt.get_unverified_header(token)["alg"] == "EdDSA"
+    assert _decode_hmac_fast(token) is None
+    assert verify_token(token, "access")["type"] == "access"
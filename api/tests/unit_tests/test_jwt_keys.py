@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from httpx import AsyncClient
+
+from core import jwt_keys
+from core.jwt_keys import KeyRing, KeyRingError
+from core.jwt_tokens import (
+    TokenInvalidError,
+    TokenSignatureError,
+    claims_cache,
+    create_access_token,
+    verify_token,
+    verify_token_cached,
+)
+from utils.config import settings
+
+
+def _private_pem(key) -> str:
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _public_pem(key) -> str:
+    return (
+        key.public_key()
+        .public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        .decode()
+    )
+
+
+@pytest.fixture
+def ed_key() -> ed25519.Ed25519PrivateKey:
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+@pytest.fixture
+def es_key() -> ec.EllipticCurvePrivateKey:
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+@pytest.fixture
+def use_ring(monkeypatch):
+    def _install(ring: KeyRing) -> KeyRing:
+        monkeypatch.setattr(jwt_keys, "_ring", ring)
+        return ring
+
+    return _install
+
+
+def test_default_ring_signs_with_kid_and_accepts_legacy_tokens() -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    assert jwt.get_unverified_header(token)["kid"] == jwt_keys.LEGACY_KID
+
+    # 引入密钥环之前签发的令牌没有 kid 头部
+    claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    legacy = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    assert "kid" not in jwt.get_unverified_header(legacy)
+    assert verify_token(legacy, "access")["sub"] == claims["sub"]
+
+
+def test_eddsa_tokens_verifiable_with_published_public_key(use_ring, ed_key) -> None:
+    ring = use_ring(
+        KeyRing.from_config(
+            {"active_kid": "ed-1", "keys": [{"kid": "ed-1", "alg": "EdDSA", "private_key": _private_pem(ed_key)}]}
+        )
+    )
+    token = create_access_token(uuid.uuid4(), "admin")
+    assert verify_token(token, "access")["role"] == "admin"
+
+    # 验签方只持有 JWKS 中的公钥
+    (jwk,) = ring.jwks()["keys"]
+    assert jwk["kid"] == "ed-1"
+    assert jwk["alg"] == "EdDSA"
+    assert "d" not in jwk
+    public_key = jwt.PyJWK(jwk).key
+    claims = jwt.decode(token, public_key, algorithms=["EdDSA"])
+    assert claims["type"] == "access"
+
+
+def test_rotation_keeps_tokens_from_previous_key_valid(use_ring, es_key, ed_key) -> None:
+    use_ring(
+        KeyRing.from_config(
+            {"active_kid": "es-1", "keys": [{"kid": "es-1", "alg": "ES256", "private_key": _private_pem(es_key)}]}
+        )
+    )
+    old_token = create_access_token(uuid.uuid4(), "user")
+
+    use_ring(
+        KeyRing.from_config(
+            {
+                "active_kid": "ed-2",
+                "keys": [
+                    {"kid": "es-1", "alg": "ES256", "public_key": _public_pem(es_key)},
+                    {"kid": "ed-2", "alg": "EdDSA", "private_key": _private_pem(ed_key)},
+                ],
+            }
+        )
+    )
+    new_token = create_access_token(uuid.uuid4(), "user")
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "ed-2"
+    assert verify_token(old_token, "access")["type"] == "access"
+    assert verify_token(new_token, "access")["type"] == "access"
+
+
+def test_unknown_kid_and_algorithm_confusion_rejected(use_ring, ed_key) -> None:
+    use_ring(
+        KeyRing.from_config(
+            {"active_kid": "ed-1", "keys": [{"kid": "ed-1", "alg": "EdDSA", "private_key": _private_pem(ed_key)}]}
+        )
+    )
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "type": "access",
+        "jti": str(uuid.uuid4()),
+        "iat": 1,
+        "exp": 2**31,
+        "role": "user",
+    }
+
+    unknown = jwt.encode(claims, "x" * 32, algorithm="HS256", headers={"kid": "nope"})
+    with pytest.raises(TokenSignatureError):
+        verify_token(unknown, "access")
+
+    # 头部声明 HS256 但指向 EdDSA 密钥：算法由密钥决定，直接拒绝
+    confused = jwt.encode(claims, "x" * 32, algorithm="HS256", headers={"kid": "ed-1"})
+    with pytest.raises(TokenInvalidError):
+        verify_token(confused, "access")
+
+    # 默认密钥不在密钥环中时，无 kid 的历史令牌同样无法通过
+    legacy = jwt.encode(claims, settings.JWT_SECRET, algorithm="HS256")
+    with pytest.raises(TokenSignatureError):
+        verify_token(legacy, "access")
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"active_kid": "a", "keys": []},
+        {"active_kid": "a", "keys": [{"kid": "a", "alg": "none"}]},
+        {"active_kid": "a", "keys": [{"kid": "a", "alg": "HS256"}]},
+        {"active_kid": "b", "keys": [{"kid": "a", "alg": "HS256", "secret": "s"}]},
+        {
+            "active_kid": "a",
+            "keys": [{"kid": "a", "alg": "HS256", "secret": "s"}, {"kid": "a", "alg": "HS256", "secret": "t"}],
+        },
+        {"active_kid": "a", "keys": [{"kid": "a", "alg": "EdDSA", "private_key": "not a pem"}]},
+    ],
+)
+def test_invalid_config_rejected(config) -> None:
+    with pytest.raises(KeyRingError):
+        KeyRing.from_config(config)
+
+
+def test_verify_only_key_cannot_be_active(es_key) -> None:
+    with pytest.raises(KeyRingError):
+        KeyRing.from_config(
+            {"active_kid": "es-1", "keys": [{"kid": "es-1", "alg": "ES256", "public_key": _public_pem(es_key)}]}
+        )
+
+
+def test_es256_requires_p256_curve() -> None:
+    p384 = ec.generate_private_key(ec.SECP384R1())
+    with pytest.raises(KeyRingError):
+        KeyRing.from_config(
+            {"active_kid": "es", "keys": [{"kid": "es", "alg": "ES256", "private_key": _private_pem(p384)}]}
+        )
+
+
+def test_file_reload_swaps_ring_and_retiring_a_key_drops_cached_claims(
+    monkeypatch, tmp_path: Path, ed_key, es_key
+) -> None:
+    (tmp_path / "ed.pem").write_text(_private_pem(ed_key))
+    (tmp_path / "es.pem").write_text(_private_pem(es_key))
+    keys_file = tmp_path / "keys.json"
+    keys_file.write_text(
+        json.dumps(
+            {
+                "active_kid": "ed",
+                "keys": [
+                    {"kid": "ed", "alg": "EdDSA", "private_key_file": "ed.pem"},
+                    {"kid": "es", "alg": "ES256", "private_key_file": "es.pem"},
+                ],
+            }
+        )
+    )
+    monkeypatch.setattr(settings, "JWT_KEYS_FILE", str(keys_file))
+    monkeypatch.setattr(settings, "JWT_KEYS_RELOAD_SECONDS", 1)
+    monkeypatch.setattr(jwt_keys, "_ring", None)
+    monkeypatch.setattr(jwt_keys, "_ring_mtime", None)
+    monkeypatch.setattr(jwt_keys, "_next_check_at", 0.0)
+
+    assert jwt_keys.get_key_ring().active.kid == "ed"
+    token = create_access_token(uuid.uuid4(), "user")
+    verify_token_cached(token, "access")
+    assert claims_cache.stats()["size"] >= 1
+
+    # 切换活动密钥：新增/切换不清空声明缓存
+    keys_file.write_text(
+        json.dumps(
+            {
+                "active_kid": "es",
+                "keys": [
+                    {"kid": "ed", "alg": "EdDSA", "private_key_file": "ed.pem"},
+                    {"kid": "es", "alg": "ES256", "private_key_file": "es.pem"},
+                ],
+            }
+        )
+    )
+    stat = keys_file.stat()
+    os.utime(keys_file, (stat.st_atime, stat.st_mtime + 10))
+    monkeypatch.setattr(jwt_keys, "_next_check_at", 0.0)
+    assert jwt_keys.get_key_ring().active.kid == "es"
+    assert claims_cache.stats()["size"] >= 1
+
+    # 非法文件：保留旧密钥环
+    keys_file.write_text("{broken")
+    os.utime(keys_file, (stat.st_atime, stat.st_mtime + 20))
+    monkeypatch.setattr(jwt_keys, "_next_check_at", 0.0)
+    assert jwt_keys.get_key_ring().active.kid == "es"
+
+    # 移除旧密钥：其签发的令牌立即失效（包括已缓存的声明）
+    keys_file.write_text(
+        json.dumps({"active_kid": "es", "keys": [{"kid": "es", "alg": "ES256", "private_key_file": "es.pem"}]})
+    )
+    os.utime(keys_file, (stat.st_atime, stat.st_mtime + 30))
+    monkeypatch.setattr(jwt_keys, "_next_check_at", 0.0)
+    assert jwt_keys.get_key_ring().kids == {"es"}
+    assert claims_cache.stats()["size"] == 0
+    with pytest.raises(TokenSignatureError):
+        verify_token_cached(token, "access")
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_publishes_only_public_keys(async_client: AsyncClient, use_ring, ed_key) -> None:
+    use_ring(
+        KeyRing.from_config(
+            {
+                "active_kid": "ed-1",
+                "keys": [
+                    {"kid": "ed-1", "alg": "EdDSA", "private_key": _private_pem(ed_key)},
+                    {"kid": "default", "alg": "HS256", "secret": settings.JWT_SECRET},
+                ],
+            }
+        )
+    )
+    resp = await async_client.get("/api/auth/jwks.json")
+    assert resp.status_code == 200
+    assert [k["kid"] for k in resp.json()["keys"]] == ["ed-1"]
+    assert "public" in resp.headers["cache-control"]
@@ -14,6 +14,7 @@ from core.jwt_tokens import (
     TokenTypeError,
     create_access_token,
     create_refresh_token,
+    issue_token_pair,
     verify_token,
 )
 from utils.config import settings
@@ -47,6 +48,20 @@ def test_create_and_verify_access_refresh_tokens() -> None:
     assert refresh_claims["exp"] - refresh_claims["iat"] == settings.REFRESH_TOKEN_EXPIRES_MINUTES * 60
 
 
+def test_issue_token_pair_returns_signed_claims() -> None:
+    user_id = uuid.uuid4()
+    bundle = issue_token_pair(user_id, "admin", 2)
+
+    # 返回的声明与令牌中实际签名的内容完全一致
+    assert verify_token(bundle.access_token, "access") == bundle.access_claims
+    assert verify_token(bundle.refresh_token, "refresh") == bundle.refresh_claims
+    assert bundle.access_claims["jti"] != bundle.refresh_claims["jti"]
+    assert bundle.refresh_claims["ver"] == 2
+    assert bundle.refresh_jti == bundle.refresh_claims["jti"]
+    assert int(bundle.refresh_expires_at.timestamp()) == bundle.refresh_claims["exp"]
+    assert int(bundle.refresh_issued_at.timestamp()) == bundle.refresh_claims["iat"]
+
+
 def test_verify_token_type_mismatch_raises() -> None:
     token = create_access_token(uuid.uuid4(), "user")
     with pytest.raises(TokenTypeError):
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+import core.security as security_module
+from core import password_hashing
+from utils import login_capacity
+from utils.config import settings
+
+
+@pytest.fixture
+def restore_hashing_state(monkeypatch):
+    """CLI 会改写 Argon2 配置与全局哈希引擎，测试结束后恢复。"""
+    for name in ("ARGON2_TIME_COST", "ARGON2_MEMORY_COST", "ARGON2_PARALLELISM"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+        monkeypatch.setenv(name, str(getattr(settings, name)))
+    monkeypatch.setattr(security_module, "_hasher", None)
+    monkeypatch.setattr(password_hashing, "_engine", None)
+
+
+def test_capacity_report_covers_each_concurrency_level(restore_hashing_state, capsys) -> None:
+    login_capacity.main(
+        [
+            "--concurrency",
+            "1,3",
+            "--logins",
+            "6",
+            "--samples",
+            "1",
+            "--executor",
+            "thread",
+            "--hash-workers",
+            "2",
+            "--time-cost",
+            "1",
+            "--memory-cost",
+            "256",
+            "--parallelism",
+            "1",
+        ]
+    )
+    out = capsys.readouterr().out
+    assert "# argon2 t=1 m=256 p=1; executor=thread hash_workers=2" in out
+    rows = [line.split() for line in out.splitlines() if line.strip() and line.split()[0].isdigit()]
+    assert [int(row[0]) for row in rows] == [1, 3]
+    for row in rows:
+        assert float(row[1]) > 0  # logins/s
+        assert row[-1] == "0"  # 无失败/拒绝
+    assert "# sustainable within p99" in out
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from core.password_hashing import PasswordHashingEngine
+from core.security import hash_password, verify_password
+
+
+@pytest.fixture(params=["process", "thread", "inline"])
+def engine(request):
+    engine = PasswordHashingEngine(mode=request.param, max_workers=2)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_roundtrip(engine: PasswordHashingEngine) -> None:
+    hashed = await engine.hash("S3cure-P@ssw0rd")
+    assert await engine.verify("S3cure-P@ssw0rd", hashed) is True
+    assert await engine.verify("wrong-password", hashed) is False
+    # 与同步实现生成的哈希互通
+    assert verify_password("S3cure-P@ssw0rd", hashed) is True
+    assert await engine.verify("legacy", hash_password("legacy")) is True
+
+
+@pytest.mark.asyncio
+async def test_invalid_input_is_rejected_without_submitting(engine: PasswordHashingEngine) -> None:
+    with pytest.raises(ValueError, match="password must be a non-empty string"):
+        await engine.hash("")
+    assert await engine.verify("", "x") is False
+    assert await engine.verify("x", "") is False
+    assert engine.stats()["submitted"] == 0
+
+
+def test_unknown_mode_rejected() -> None:
+    with pytest.raises(ValueError, match="unsupported"):
+        PasswordHashingEngine(mode="gpu")
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_ticking_while_hashing() -> None:
+    engine = PasswordHashingEngine(mode="thread", max_workers=2)
+    hashed = hash_password("pw")
+    gaps: list[float] = []
+    stop = asyncio.Event()
+
+    async def heartbeat() -> None:
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(heartbeat())
+    try:
+        single = time.perf_counter()
+        await engine.verify("pw", hashed)
+        single = time.perf_counter() - single
+        await asyncio.gather(*(engine.verify("pw", hashed) for _ in range(6)))
+    finally:
+        stop.set()
+        await task
+        engine.shutdown()
+
+    # 计算期间事件循环仍能调度其他协程：最大停顿远小于一次完整的 Argon2 计算
+    assert len(gaps) > 10
+    assert max(gaps) < single * 3
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_restarted() -> None:
+    engine = PasswordHashingEngine(mode="process", max_workers=1)
+    try:
+        hashed = await engine.hash("pw")
+        executor = engine._get_executor()
+        # 模拟子进程被系统杀死
+        for pid in list(executor._processes):
+            os.kill(pid, 9)
+        await asyncio.sleep(0.2)
+        assert await engine.verify("pw", hashed) is True
+        assert engine.stats()["pool_restarts"] == 1
+    finally:
+        engine.shutdown()
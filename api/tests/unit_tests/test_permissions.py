@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import uuid
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import services.user_cache_service as user_cache_module
+from core.auth_dependency import get_current_user
+from core.jwt_tokens import create_access_token, create_refresh_token, verify_token
+from core.permissions import PermissionRegistry, permission_mask, permission_names, role_permission_mask
+from core.rbac import require_permissions
+from models import User
+from services.user_cache_service import UserCacheService
+from tests.helpers import FakeRedis, async_create_user
+from utils.config import settings
+
+
+def _guard_callable_for(*permissions: str):
+    return require_permissions(*permissions).dependency  # type: ignore[attr-defined]
+
+
+def test_role_masks_compiled_from_registry() -> None:
+    read, write = permission_mask("students:read"), permission_mask("students:write")
+    assert read & write == 0
+    assert role_permission_mask("user") == read
+    assert role_permission_mask("admin") == read | write
+    assert role_permission_mask("unknown") == 0
+    assert permission_names(read | write) == ["students:read", "students:write"]
+
+
+def test_unknown_or_duplicate_permissions_rejected() -> None:
+    with pytest.raises(ValueError, match="未注册的权限"):
+        require_permissions("students:delete")
+    with pytest.raises(ValueError, match="重复的权限"):
+        PermissionRegistry(["a", "a"], {})
+    with pytest.raises(ValueError, match="未注册的权限"):
+        PermissionRegistry(["a"], {"user": ["b"]})
+
+
+def test_access_token_carries_permission_mask() -> None:
+    claims = verify_token(create_access_token(uuid.uuid4(), "admin"), "access")
+    assert claims["perm"] == role_permission_mask("admin")
+    assert "perm" not in verify_token(create_refresh_token(uuid.uuid4(), "admin"), "refresh")
+
+
+@pytest.mark.asyncio
+async def test_guard_checks_mask_from_token(async_db_session: AsyncSession) -> None:
+    user = await async_create_user(async_db_session, "perm1", "pw", role="user")
+    current = await get_current_user(
+        authorization=f"Bearer {create_access_token(user.id, user.role)}", db=async_db_session
+    )
+
+    assert _guard_callable_for("students:read")(current).id == user.id
+    with pytest.raises(HTTPException) as ei:
+        _guard_callable_for("students:read", "students:write")(current)
+    assert ei.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_token_mask_overrides_role_default(async_db_session: AsyncSession) -> None:
+    user = await async_create_user(async_db_session, "perm2", "pw", role="admin")
+    claims = verify_token(create_access_token(user.id, user.role), "access")
+
+    # 收窄权限的令牌：即使角色为 admin，也只能读取
+    claims["perm"] = permission_mask("students:read")
+    narrowed = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    current = await get_current_user(authorization=f"Bearer {narrowed}", db=async_db_session)
+    with pytest.raises(HTTPException):
+        _guard_callable_for("students:write")(current)
+
+    # 引入权限掩码之前签发的令牌：按角色默认掩码处理
+    del claims["perm"]
+    legacy = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    current = await get_current_user(authorization=f"Bearer {legacy}", db=async_db_session)
+    assert _guard_callable_for("students:write")(current).id == user.id
+
+
+# 降级：角色变更并失效快照后，携带旧 admin 掩码的令牌立即失去写权限
+@pytest.mark.asyncio
+async def test_demoted_user_loses_permissions_before_token_expires(async_db_session: AsyncSession, monkeypatch) -> None:
+    cache = UserCacheService(redis=FakeRedis())
+    monkeypatch.setattr(user_cache_module, "_service", cache)
+    user = await async_create_user(async_db_session, "perm3", "pw", role="admin")
+    authorization = f"Bearer {create_access_token(user.id, user.role)}"
+    current = await get_current_user(authorization=authorization, db=async_db_session)
+    assert _guard_callable_for("students:write")(current).id == user.id
+
+    await async_db_session.execute(update(User).where(User.id == user.id).values(role="user"))
+    await async_db_session.commit()
+    await cache.invalidate(user.id)
+
+    current = await get_current_user(authorization=authorization, db=async_db_session)
+    assert current.permissions == role_permission_mask("user")
+    with pytest.raises(HTTPException):
+        _guard_callable_for("students:write")(current)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+from services.refresh_grace_service import RefreshGraceService
+from tests.helpers import FakeRedis
+
+
+class _BrokenRedis:
+    async def get(self, key: str) -> str | None:
+        raise ConnectionError("redis down")
+
+    async def setex(self, key: str, seconds: int, value: str) -> None:
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+async def test_remember_and_recall_round_trip() -> None:
+    redis = FakeRedis()
+    service = RefreshGraceService(redis=redis, grace_seconds=10)
+
+    await service.remember("old", "new", {"access_token": "a", "refresh_token": "r", "refresh_expires_at": 1})
+
+    assert await service.recall("old") == ("new", {"access_token": "a", "refresh_token": "r", "refresh_expires_at": 1})
+    assert await redis.ttl("auth:refresh:rotated:old") == 10
+    assert await service.recall("other") is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_window_skips_redis() -> None:
+    redis = FakeRedis()
+    service = RefreshGraceService(redis=redis, grace_seconds=0)
+
+    await service.remember("old", "new", {"access_token": "a"})
+
+    assert await redis.exists("auth:refresh:rotated:old") == 0
+    assert await service.recall("old") is None
+
+
+@pytest.mark.asyncio
+async def test_malformed_entry_is_a_miss() -> None:
+    redis = FakeRedis()
+    await redis.set("auth:refresh:rotated:old", "not-json")
+    service = RefreshGraceService(redis=redis, grace_seconds=10)
+
+    assert await service.recall("old") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_degrades_to_miss() -> None:
+    service = RefreshGraceService(redis=_BrokenRedis(), grace_seconds=10)  # type: ignore[arg-type]
+
+    await service.remember("old", "new", {"access_token": "a"})
+    assert await service.recall("old") is None
+    # 熔断打开后不再访问 Redis
+    assert service._breaker.available() is False
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from models import RefreshToken
+from services.auth_service import AuthService
+from services.refresh_grace_service import RefreshGraceService
+from tests.helpers import FakeRedis, async_create_user, async_persist_refresh
+
+
+def _index(name: str):
+    return next(index for index in RefreshToken.__table__.indexes if index.name == name)
+
+
+async def _explain_hot_queries(async_db_session, flow) -> list[tuple[str, list[str]]]:
+    """执行一段鉴权流程，记录访问 refresh_tokens 的 SELECT/UPDATE，并返回各自的 SQLite 查询计划。"""
+    recorded: list[tuple[str, object]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "refresh_tokens" in statement and statement.split()[0] in ("SELECT", "UPDATE"):
+            recorded.append((statement, parameters))
+
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        await flow()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+    plans = []
+    async with async_db_session.bind.connect() as conn:
+        for statement, parameters in recorded:
+            rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            plans.append((" ".join(statement.split()), [row[-1] for row in rows]))
+    return plans
+
+
+# 查询计划：刷新（认领）、并发宽限校验、复用慢路径与登出按 jti 的定位都走部分索引，不扫表。
+@pytest.mark.asyncio
+async def test_hot_refresh_queries_use_partial_indexes(async_db_session) -> None:
+    user = await async_create_user(async_db_session, "idx-1", "pw")
+    token, _rt = await async_persist_refresh(async_db_session, user)
+    service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=10))
+    reuse_service = AuthService(grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=0))
+
+    async def flow() -> None:
+        first = await service.refresh(db=async_db_session, refresh_token=token)
+        assert (await service.refresh(db=async_db_session, refresh_token=token))["code"] == 0  # 宽限窗口
+        assert (await service.logout(db=async_db_session, refresh_token=first["data"]["refresh_token"]))["code"] == 0
+        assert (await reuse_service.refresh(db=async_db_session, refresh_token=token))["code"] == 40112  # 已撤销
+
+    plans = await _explain_hot_queries(async_db_session, flow)
+
+    by_jti = [(sql, plan) for sql, plan in plans if "refresh_tokens.jti = ?" in sql.split(" WHERE ", 1)[-1]]
+    assert len(by_jti) >= 5
+    for sql, plan in plans:
+        assert not any(step.startswith("SCAN refresh_tokens") for step in plan), sql
+    for sql, plan in by_jti:
+        if "refresh_tokens.family_id = ?" in sql:
+            assert any("refresh_tokens_family_id_idx" in step for step in plan), sql
+        elif "revoked IS 1" in sql:
+            assert any("refresh_tokens_revoked_jti_idx" in step for step in plan), sql
+        else:
+            assert any("refresh_tokens_active_jti_idx" in step for step in plan), sql
+
+
+def test_postgresql_active_jti_index_is_partial_and_covering() -> None:
+    ddl = str(CreateIndex(_index("refresh_tokens_active_jti_idx")).compile(dialect=postgresql.dialect()))
+    assert ddl.startswith("CREATE UNIQUE INDEX refresh_tokens_active_jti_idx ON refresh_tokens (jti, expires_at)")
+    assert "INCLUDE (family_id, user_id)" in ddl
+    assert ddl.endswith("WHERE revoked IS false")
+
+    parent_ddl = str(CreateIndex(_index("refresh_tokens_active_parent_jti_idx")).compile(dialect=postgresql.dialect()))
+    assert parent_ddl.endswith("WHERE revoked IS false")
+    # 会话索引只收录每个家族当前有效的令牌：轮换过的祖先（used_at 已置位）不在索引中
+    sessions_ddl = str(CreateIndex(_index("refresh_tokens_user_sessions_idx")).compile(dialect=postgresql.dialect()))
+    assert sessions_ddl.endswith("WHERE revoked IS false AND used_at IS NULL")
+    # used_at 只作为会话索引的谓词，不作为任何索引的键列或 INCLUDE 列
+    for index in RefreshToken.__table__.indexes:
+        assert "used_at" not in index.columns
+        assert "used_at" not in (index.dialect_options["postgresql"]["include"] or [])
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from services.refresh_token_partition_service import (
+    RefreshTokenPartitionService,
+    partition_for,
+    plan_partitions,
+)
+from services.refresh_token_purge_service import RefreshTokenPurgeService
+
+
+class _Result:
+    rowcount = 0
+
+    def __init__(self, rows: list[tuple]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[tuple]:
+        return self._rows
+
+    def scalar(self):
+        return self._rows[0][0] if self._rows else None
+
+
+class _FakePgSession:
+    """记录执行的 SQL；系统目录查询返回预设的分区边界（模拟 PostgreSQL 分区表）。"""
+
+    def __init__(
+        self,
+        catalog: list[tuple[str, str]],
+        executed: list[str],
+        *,
+        lock_available: bool = True,
+        default_rows: bool = False,
+    ) -> None:
+        self._catalog = catalog
+        self._executed = executed
+        self._lock_available = lock_available
+        self._default_rows = default_rows
+
+    async def __aenter__(self) -> _FakePgSession:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt, params=None) -> _Result:
+        sql = str(stmt)
+        self._executed.append(sql)
+        if "pg_inherits" in sql:
+            return _Result(self._catalog)
+        if sql.startswith("SELECT EXISTS") and "refresh_tokens_default" in sql:
+            return _Result([(self._default_rows,)])
+        if "pg_try_advisory_xact_lock" in sql:
+            return _Result([(self._lock_available,)])
+        return _Result([])
+
+    async def commit(self) -> None:
+        return None
+
+    async def rollback(self) -> None:
+        return None
+
+
+def _factory(
+    catalog: list[tuple[str, str]], executed: list[str], *, lock_available: bool = True, default_rows: bool = False
+):
+    return lambda: _FakePgSession(catalog, executed, lock_available=lock_available, default_rows=default_rows)
+
+
+def _bound(start: str, end: str) -> str:
+    return f"FOR VALUES FROM ('{start}') TO ('{end}')"
+
+
+def test_partitions_align_to_monday_weeks() -> None:
+    partition = partition_for(datetime(2026, 10, 17, 12, 30, tzinfo=UTC), 7)
+    assert partition.name == "refresh_tokens_p20261012"
+    assert partition.start == datetime(2026, 10, 12)
+    assert partition.end == datetime(2026, 10, 19)
+
+    planned = plan_partitions(datetime(2026, 10, 17, tzinfo=UTC), interval_days=7, premake=2)
+    assert [p.name for p in planned] == [
+        "refresh_tokens_p20261012",
+        "refresh_tokens_p20261019",
+        "refresh_tokens_p20261026",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ensure_creates_only_missing_partitions() -> None:
+    executed: list[str] = []
+    catalog = [
+        ("refresh_tokens_default", "DEFAULT"),
+        ("refresh_tokens_p20261012", _bound("2026-10-12 00:00:00", "2026-10-19 00:00:00")),
+    ]
+    service = RefreshTokenPartitionService(interval_days=7, premake=2)
+
+    created = await service.ensure_partitions(_factory(catalog, executed), datetime(2026, 10, 17, tzinfo=UTC))
+
+    assert created == ["refresh_tokens_p20261019", "refresh_tokens_p20261026"]
+    ddl = [sql for sql in executed if sql.startswith("CREATE TABLE")]
+    assert ddl[0] == (
+        "CREATE TABLE IF NOT EXISTS refresh_tokens_p20261019 PARTITION OF refresh_tokens "
+        "FOR VALUES FROM ('2026-10-19 00:00:00') TO ('2026-10-26 00:00:00') "
+        "WITH (autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02)"
+    )
+
+
+# DEFAULT 分区中已有落入计划分区范围的行：同一事务内 DETACH、建分区、迁移行、再 ATTACH，而不是每轮建分区失败
+@pytest.mark.asyncio
+async def test_ensure_moves_stranded_default_rows_into_the_new_partition() -> None:
+    executed: list[str] = []
+    catalog = [("refresh_tokens_default", "DEFAULT")]
+    service = RefreshTokenPartitionService(interval_days=7, premake=0, lock_timeout_ms=2000)
+
+    created = await service.ensure_partitions(
+        _factory(catalog, executed, default_rows=True), datetime(2026, 10, 17, tzinfo=UTC)
+    )
+
+    assert created == ["refresh_tokens_p20261012"]
+    assert "WHERE expires_at >= '2026-10-12 00:00:00' AND expires_at < '2026-10-19 00:00:00'" in executed[1]
+    detach_at = executed.index("ALTER TABLE refresh_tokens DETACH PARTITION refresh_tokens_default")
+    assert executed[detach_at - 1] == "SET LOCAL lock_timeout = '2000ms'"
+    assert executed[detach_at + 1].startswith("CREATE TABLE IF NOT EXISTS refresh_tokens_p20261012 PARTITION OF")
+    assert executed[detach_at + 2] == (
+        "WITH moved AS (DELETE FROM refresh_tokens_default "
+        "WHERE expires_at >= '2026-10-12 00:00:00' AND expires_at < '2026-10-19 00:00:00' RETURNING *) "
+        "INSERT INTO refresh_tokens_p20261012 SELECT * FROM moved"
+    )
+    assert executed[detach_at + 3] == "ALTER TABLE refresh_tokens ATTACH PARTITION refresh_tokens_default DEFAULT"
+
+
+@pytest.mark.asyncio
+async def test_drop_only_partitions_entirely_past_cutoff() -> None:
+    executed: list[str] = []
+    catalog = [
+        ("refresh_tokens_default", "DEFAULT"),
+        ("refresh_tokens_p20260921", _bound("2026-09-21 00:00:00", "2026-09-28 00:00:00")),
+        ("refresh_tokens_p20260928", _bound("2026-09-28 00:00:00", "2026-10-05 00:00:00")),
+        ("refresh_tokens_p20261005", _bound("2026-10-05 00:00:00", "2026-10-12 00:00:00")),
+    ]
+    service = RefreshTokenPartitionService(interval_days=7, premake=0, lock_timeout_ms=2000)
+
+    dropped = await service.drop_expired_partitions(_factory(catalog, executed), datetime(2026, 10, 6, tzinfo=UTC))
+
+    assert dropped == ["refresh_tokens_p20260921", "refresh_tokens_p20260928"]
+    assert "DROP TABLE IF EXISTS refresh_tokens_p20260921" in executed
+    assert "DROP TABLE IF EXISTS refresh_tokens_p20260928" in executed
+    assert not any("refresh_tokens_default" in sql for sql in executed if sql.startswith(("ALTER", "DROP")))
+    # 每条 DDL 前：先取维护咨询锁，再限定锁等待时间
+    drop_at = executed.index("DROP TABLE IF EXISTS refresh_tokens_p20260921")
+    assert executed[drop_at - 2].startswith("SELECT pg_try_advisory_xact_lock")
+    assert executed[drop_at - 1] == "SET LOCAL lock_timeout = '2000ms'"
+
+
+# 其他 worker 正持有维护锁：本轮不执行任何 DDL，也不排队等待
+@pytest.mark.asyncio
+async def test_maintenance_skipped_while_another_worker_holds_the_lock() -> None:
+    executed: list[str] = []
+    catalog = [("refresh_tokens_p20260921", _bound("2026-09-21 00:00:00", "2026-09-28 00:00:00"))]
+    service = RefreshTokenPartitionService(interval_days=7, premake=2, lock_timeout_ms=2000)
+    factory = _factory(catalog, executed, lock_available=False)
+
+    assert await service.ensure_partitions(factory, datetime(2026, 10, 17, tzinfo=UTC)) == []
+    assert await service.drop_expired_partitions(factory, datetime(2026, 10, 6, tzinfo=UTC)) == []
+    assert not any(sql.startswith(("CREATE", "DROP", "SET")) for sql in executed)
+    assert len([sql for sql in executed if "pg_try_advisory_xact_lock" in sql]) == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_table_is_not_partitioned(async_db_session) -> None:
+    assert await RefreshTokenPartitionService().is_partitioned(async_db_session) is False
+
+
+@pytest.mark.asyncio
+async def test_purge_drops_partitions_instead_of_deleting_rows() -> None:
+    class _Partitions(RefreshTokenPartitionService):
+        def __init__(self) -> None:
+            super().__init__(interval_days=7, premake=1)
+            self.calls: list[tuple[str, datetime]] = []
+
+        async def is_partitioned(self, db) -> bool:
+            return True
+
+        async def ensure_partitions(self, session_factory, now):
+            self.calls.append(("ensure", now))
+            return []
+
+        async def drop_expired_partitions(self, session_factory, cutoff):
+            self.calls.append(("drop", cutoff))
+            return ["refresh_tokens_p20260921"]
+
+    executed: list[str] = []
+    partitions = _Partitions()
+    service = RefreshTokenPurgeService(retention_days=7, partition_service=partitions)
+    now = datetime(2026, 10, 17, tzinfo=UTC)
+
+    assert await service.purge(_factory([], executed), now=now) == 0
+
+    assert partitions.calls == [("ensure", now), ("drop", now - timedelta(days=7))]
+    # 逐行删除只作用于 DEFAULT 分区
+    deletes = [" ".join(sql.split()) for sql in executed if sql.startswith("DELETE")]
+    assert deletes
+    assert all(sql.startswith("DELETE FROM refresh_tokens_default WHERE") for sql in deletes)
+    assert service.stats()["dropped_partitions"] == 1
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models import RefreshToken
+from services.refresh_token_partition_service import DEFAULT_PARTITION, RefreshTokenPartitionService
+from services.refresh_token_purge_service import RefreshTokenPurgeService
+from tests.helpers import async_create_user
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=UTC)
+
+
+async def _add_tokens(db: AsyncSession, user_id, *, expired_days_ago: float, count: int) -> None:
+    expires_at = NOW - timedelta(days=expired_days_ago)
+    db.add_all(
+        RefreshToken(
+            jti=str(uuid4()),
+            user_id=user_id,
+            issued_at=expires_at - timedelta(days=1),
+            expires_at=expires_at,
+            revoked=False,
+        )
+        for _ in range(count)
+    )
+    await db.commit()
+
+
+@pytest.fixture
+def session_factory(async_test_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=async_test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_only_rows_past_retention_in_batches(async_db_session, session_factory) -> None:
+    user = await async_create_user(async_db_session, "purge-1", "pw")
+    await _add_tokens(async_db_session, user.id, expired_days_ago=30, count=7)
+    await _add_tokens(async_db_session, user.id, expired_days_ago=3, count=2)  # 保留期内
+    await _add_tokens(async_db_session, user.id, expired_days_ago=-1, count=2)  # 尚未过期
+
+    service = RefreshTokenPurgeService(retention_days=7, batch_size=3, batch_sleep_seconds=0)
+    assert await service.count_expired(async_db_session, service.cutoff(NOW)) == 7
+
+    deleted = await service.purge(session_factory, now=NOW)
+
+    assert deleted == 7
+    remaining = (await async_db_session.execute(select(RefreshToken.expires_at))).scalars().all()
+    assert len(remaining) == 4
+    stats = service.stats()
+    assert stats["runs"] == 1
+    assert stats["last_deleted"] == 7
+
+
+@pytest.mark.asyncio
+async def test_purge_respects_max_batches(async_db_session, session_factory) -> None:
+    user = await async_create_user(async_db_session, "purge-2", "pw")
+    await _add_tokens(async_db_session, user.id, expired_days_ago=30, count=5)
+
+    service = RefreshTokenPurgeService(retention_days=7, batch_size=2, batch_sleep_seconds=0)
+    assert await service.purge(session_factory, now=NOW, max_batches=1) == 2
+    assert await service.purge(session_factory, now=NOW) == 3
+    assert service.total_deleted == 5
+
+
+def test_postgresql_batch_uses_skip_locked() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    stmt = RefreshTokenPurgeService(batch_size=500).build_batch_statement(NOW)
+    sql = " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+
+    assert sql.startswith("DELETE FROM refresh_tokens WHERE refresh_tokens.id IN (SELECT refresh_tokens.id")
+    assert "refresh_tokens.expires_at <" in sql
+    assert sql.endswith("FOR UPDATE SKIP LOCKED)")
+
+
+# 分区表上预建不足时落入 DEFAULT 分区的行不会随分区 DROP 删除，由逐行清理删除过期部分
+@pytest.mark.asyncio
+async def test_partitioned_purge_deletes_expired_rows_from_default_partition(async_db_session, session_factory) -> None:
+    class _Partitioned(RefreshTokenPartitionService):
+        async def is_partitioned(self, db) -> bool:
+            return True
+
+        async def ensure_partitions(self, session_factory, now):
+            return []
+
+        async def drop_expired_partitions(self, session_factory, cutoff):
+            return []
+
+    # SQLite 无分区：用与分区同名的表模拟 DEFAULT 分区
+    await async_db_session.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} (id CHAR(32), expires_at DATETIME)"))
+    await async_db_session.commit()
+    user = await async_create_user(async_db_session, "purge-default", "pw")
+    await _add_tokens(async_db_session, user.id, expired_days_ago=30, count=2)
+    await async_db_session.execute(
+        text(f"INSERT INTO {DEFAULT_PARTITION} SELECT id, expires_at FROM refresh_tokens WHERE expires_at < :now"),
+        {"now": NOW.replace(tzinfo=None)},
+    )
+    await _add_tokens(async_db_session, user.id, expired_days_ago=-1, count=1)
+    await async_db_session.execute(
+        text(f"INSERT INTO {DEFAULT_PARTITION} SELECT id, expires_at FROM refresh_tokens WHERE expires_at > :now"),
+        {"now": NOW.replace(tzinfo=None)},
+    )
+    await async_db_session.commit()
+
+    service = RefreshTokenPurgeService(
+        retention_days=7, batch_size=1, batch_sleep_seconds=0, partition_service=_Partitioned()
+    )
+
+    assert await service.purge(session_factory, now=NOW) == 2
+    remaining = (await async_db_session.execute(text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}"))).scalar()
+    assert remaining == 1
+    # 父表不做逐行删除
+    assert len((await async_db_session.execute(select(RefreshToken.id))).scalars().all()) == 3
@@ -1,4 +1,5 @@
 from datetime import UTC, datetime, timedelta
+from uuid import uuid4
 
 import pytest
 from sqlalchemy import select
@@ -6,6 +7,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.refresh_tokens import RefreshToken
+from models.user_agents import UserAgent
 from models.users import User
 
 
@@ -21,20 +23,24 @@ async def test_refresh_token_insert_and_query(async_db_session: AsyncSession):
     user = await _create_user(async_db_session)
 
     now = datetime.now(UTC)
+    jti = str(uuid4())
+    agent = UserAgent(user_agent="pytest-agent")
+    async_db_session.add(agent)
+    await async_db_session.flush()
     rt = RefreshToken(
-        jti="jti-001",
+        jti=jti,
         parent_jti=None,
         user_id=user.id,
         issued_at=now,
         expires_at=now + timedelta(hours=1),
         device_id="dev1",
         ip="127.0.0.1",
-        user_agent="pytest-agent",
+        user_agent_id=agent.id,
     )
     async_db_session.add(rt)
     await async_db_session.commit()
 
-    result = await async_db_session.execute(select(RefreshToken).where(RefreshToken.jti == "jti-001"))
+    result = await async_db_session.execute(select(RefreshToken).where(RefreshToken.jti == jti))
     got = result.scalar_one()
 
     assert got.user_id == user.id
@@ -43,7 +49,9 @@ async def test_refresh_token_insert_and_query(async_db_session: AsyncSession):
     assert got.used_at is None
     assert got.device_id == "dev1"
     assert got.ip == "127.0.0.1"
-    assert got.user_agent == "pytest-agent"
+    assert got.jti == jti
+    assert got.family_id == jti
+    assert (await async_db_session.get(UserAgent, got.user_agent_id)).user_agent == "pytest-agent"
     assert got.is_expired(now=now) is False
 
 
@@ -51,9 +59,10 @@ async def test_refresh_token_insert_and_query(async_db_session: AsyncSession):
 async def test_refresh_token_jti_unique(async_db_session: AsyncSession):
     user = await _create_user(async_db_session)
     now = datetime.now(UTC)
+    jti = str(uuid4())
     for _ in range(2):
         rt = RefreshToken(
-            jti="dup-jti",
+            jti=jti,
             parent_jti=None,
             user_id=user.id,
             issued_at=now,
@@ -75,13 +84,13 @@ async def test_is_expired_checks_expires_at(async_db_session: AsyncSession):
     now = datetime.now(UTC)
 
     rt_future = RefreshToken(
-        jti="future-jti",
+        jti=str(uuid4()),
         user_id=user.id,
         issued_at=now,
         expires_at=now + timedelta(minutes=1),
     )
     rt_past = RefreshToken(
-        jti="past-jti",
+        jti=str(uuid4()),
         user_id=user.id,
         issued_at=now - timedelta(minutes=2),
         expires_at=now - timedelta(minutes=1),
@@ -91,3 +100,22 @@ async def test_is_expired_checks_expires_at(async_db_session: AsyncSession):
 
     assert rt_future.is_expired(now=now) is False
     assert rt_past.is_expired(now=now) is True
+
+
+@pytest.mark.asyncio
+async def test_ip_is_normalized_and_invalid_values_stored_as_null(async_db_session: AsyncSession):
+    user = await _create_user(async_db_session)
+    now = datetime.now(UTC)
+    rows = [
+        RefreshToken(jti=str(uuid4()), user_id=user.id, issued_at=now, expires_at=now, ip=ip)
+        for ip in ("2001:DB8:0:0::1", "not-an-ip")
+    ]
+    async_db_session.add_all(rows)
+    await async_db_session.commit()
+    ids = [rt.id for rt in rows]
+
+    async_db_session.expire_all()
+    result = await async_db_session.execute(
+        select(RefreshToken.ip).where(RefreshToken.id.in_(ids)).order_by(RefreshToken.id)
+    )
+    assert result.scalars().all() == ["2001:db8::1", None]
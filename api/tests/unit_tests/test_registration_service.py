@@ -5,7 +5,7 @@ from datetime import UTC, datetime
 import pytest
 from sqlalchemy import select
 
-from models import RefreshToken, User
+from models import RefreshToken, User, UserAgent
 from services.registration_service import RegistrationService
 
 
@@ -55,7 +55,9 @@ async def test_registration_success(async_db_session, monkeypatch):
     assert rt.revoked is False
     assert rt.parent_jti is None
     assert rt.ip == "127.0.0.1"
-    assert rt.user_agent == "pytest"
+    agent = await async_db_session.get(UserAgent, rt.user_agent_id)
+    assert agent is not None
+    assert agent.user_agent == "pytest"
 
 
 @pytest.mark.asyncio
@@ -1,5 +1,7 @@
 import pytest
+from argon2 import PasswordHasher
 
+from core.security import password_needs_rehash
 from utils import hash_password, verify_password
 
 
@@ -40,3 +42,13 @@ def test_empty_values_behavior() -> None:
 
     # 非空明文配空哈希应返回 False
     assert verify_password("x", "") is False
+
+
+def test_password_needs_rehash_follows_configured_parameters() -> None:
+    weak = PasswordHasher(time_cost=1, memory_cost=64, parallelism=1).hash("pw")
+    assert password_needs_rehash(weak) is True
+    assert password_needs_rehash(hash_password("pw")) is False
+    # 无法解析的哈希不触发重算
+    assert password_needs_rehash("not-a-hash") is False
+    # 旧参数哈希依旧可以校验通过（参数编码在哈希串中）
+    assert verify_password("pw", weak) is True
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from models import RefreshToken
+from services.auth_service import AuthService
+from services.login_rate_limit_service import LoginRateLimitService
+from services.refresh_grace_service import RefreshGraceService
+from services.session_service import SessionService, decode_cursor, encode_cursor
+from tests.helpers import FakeRedis, async_create_user, async_persist_refresh
+
+
+def _auth_service(max_sessions: int = 0) -> AuthService:
+    return AuthService(
+        rate_limit_service=LoginRateLimitService(redis=FakeRedis()),
+        grace_service=RefreshGraceService(redis=FakeRedis(), grace_seconds=0),
+        session_service=SessionService(max_sessions=max_sessions),
+    )
+
+
+def test_cursor_round_trip_and_rejects_garbage() -> None:
+    moment = datetime(2026, 10, 17, 12, 30, 45, 123456, tzinfo=UTC)
+
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+    assert decode_cursor(encode_cursor(moment.replace(tzinfo=None), 42)) == (moment, 42)
+    assert decode_cursor("not a cursor") is None
+    assert decode_cursor("") is None
+
+
+# 每个家族只列出当前有效的那一条；轮换后的祖先令牌与已撤销的家族不计入
+@pytest.mark.asyncio
+async def test_list_sessions_returns_one_item_per_live_family(async_db_session) -> None:
+    user = await async_create_user(async_db_session, "s-list", "pw")
+    rotated_token, rotated = await async_persist_refresh(async_db_session, user)
+    family_id = rotated.family_id
+    _token, revoked = await async_persist_refresh(async_db_session, user)
+    revoked.revoked = True
+    await async_db_session.commit()
+
+    refreshed = await _auth_service().refresh(db=async_db_session, refresh_token=rotated_token)
+    assert refreshed["code"] == 0
+
+    result = await SessionService().list_sessions(
+        db=async_db_session, user_id=user.id, refresh_token=refreshed["data"]["refresh_token"]
+    )
+
+    assert result["code"] == 0
+    items = result["data"]["items"]
+    assert [item["id"] for item in items] == [str(uuid.UUID(family_id))]
+    assert items[0]["current"] is True
+    assert result["data"]["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_keyset_pagination(async_db_session) -> None:
+    user = await async_create_user(async_db_session, "s-page", "pw")
+    other = await async_create_user(async_db_session, "s-other", "pw")
+    for _ in range(5):
+        await async_persist_refresh(async_db_session, user)
+    await async_persist_refresh(async_db_session, other)
+    service = SessionService()
+
+    pages: list[list[dict]] = []
+    cursor = None
+    while True:
+        result = await service.list_sessions(db=async_db_session, user_id=user.id, limit=2, cursor=cursor)
+        assert result["code"] == 0
+        pages.append(result["data"]["items"])
+        cursor = result["data"]["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    items = [item for page in pages for item in page]
+    assert len({item["id"] for item in items}) == 5
+    assert [item["expires_at"] for item in items] == sorted((item["expires_at"] for item in items), reverse=True)
+
+    invalid = await service.list_sessions(db=async_db_session, user_id=user.id, cursor="bogus")
+    assert invalid["code"] == 42206
+
+
+@pytest.mark.asyncio
+async def test_revoke_session_only_affects_own_family(async_db_session) -> None:
+    owner = await async_create_user(async_db_session, "s-owner", "pw")
+    intruder = await async_create_user(async_db_session, "s-intruder", "pw")
+    owner_id, intruder_id = owner.id, intruder.id
+    token, rt = await async_persist_refresh(async_db_session, owner)
+    session_id = uuid.UUID(rt.family_id)
+    service = SessionService()
+
+    denied = await service.revoke_session(db=async_db_session, user_id=intruder_id, session_id=session_id)
+    assert denied["code"] == 40402
+
+    revoked = await service.revoke_session(db=async_db_session, user_id=owner_id, session_id=session_id)
+    assert revoked["code"] == 0
+    again = await service.revoke_session(db=async_db_session, user_id=owner_id, session_id=session_id)
+    assert again["code"] == 40402
+
+    refreshed = await _auth_service().refresh(db=async_db_session, refresh_token=token)
+    assert refreshed["code"] == 40112
+
+
+# 并发会话上限：登录时撤销最旧的会话，只保留最近活跃的 max_sessions 个
+@pytest.mark.asyncio
+async def test_login_evicts_oldest_sessions_over_the_cap(async_db_session) -> None:
+    user = await async_create_user(async_db_session, "s-cap", "pw")
+    user_id = user.id
+    _token, oldest = await async_persist_refresh(async_db_session, user)
+    oldest_family = oldest.family_id
+    service = _auth_service(max_sessions=2)
+
+    for _ in range(2):
+        assert (await service.login(db=async_db_session, username="s-cap", password="pw"))["code"] == 0
+
+    async_db_session.expire_all()
+    rows = (await async_db_session.execute(select(RefreshToken).where(RefreshToken.user_id == user_id))).scalars().all()
+    assert len([row for row in rows if not row.revoked]) == 2
+    evicted = next(row for row in rows if row.family_id == oldest_family)
+    assert evicted.revoked is True
+    assert evicted.revoked_reason == "session_limit"
+
+    listed = await SessionService().list_sessions(db=async_db_session, user_id=user_id)
+    assert len(listed["data"]["items"]) == 2
+
+
+# 查询计划：会话列表（含翻页）与上限检查都走 refresh_tokens_user_sessions_idx
+@pytest.mark.asyncio
+async def test_session_queries_use_user_sessions_index(async_db_session) -> None:
+    user = await async_create_user(async_db_session, "s-plan", "pw")
+    for _ in range(3):
+        await async_persist_refresh(async_db_session, user)
+
+    recorded: list[tuple[str, object]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.startswith("SELECT") and "FROM refresh_tokens" in statement:
+            recorded.append((statement, parameters))
+
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        service = SessionService(max_sessions=2)
+        first = await service.list_sessions(db=async_db_session, user_id=user.id, limit=1)
+        await service.list_sessions(db=async_db_session, user_id=user.id, cursor=first["data"]["next_cursor"])
+        await service.evict_excess_sessions(async_db_session, user.id)
+        await async_db_session.rollback()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+    assert len(recorded) == 3
+    async with async_db_session.bind.connect() as conn:
+        for statement, parameters in recorded:
+            plan = [row[-1] for row in (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))]
+            assert any("refresh_tokens_user_sessions_idx" in step for step in plan), (statement, plan)
+            assert not any(step.startswith("USE TEMP B-TREE FOR ORDER BY") for step in plan), plan
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from core import jwt_tokens as jwt_mod
+from core.jwt_tokens import (
+    TokenExpiredError,
+    TokenInvalidError,
+    TokenSignatureError,
+    TokenTypeError,
+    create_access_token,
+    verify_token_cached,
+)
+from core.token_cache import VerifiedClaimsCache, token_digest
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch) -> VerifiedClaimsCache:
+    cache = VerifiedClaimsCache(max_entries=100, max_ttl_seconds=300)
+    monkeypatch.setattr(jwt_mod, "claims_cache", cache)
+    return cache
+
+
+def test_cache_hit_skips_decode(fresh_cache: VerifiedClaimsCache, monkeypatch) -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    first = verify_token_cached(token, "access")
+
+    # 命中后不应再调用完整校验
+    def _boom(*_args, **_kwargs):
+        raise AssertionError("verify_token should not be called on cache hit")
+
+    monkeypatch.setattr(jwt_mod, "verify_token", _boom)
+    second = verify_token_cached(token, "access")
+
+    assert second == first
+    assert second is not first  # 返回副本，防止调用方污染缓存
+    stats = fresh_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_does_not_store_failures(fresh_cache: VerifiedClaimsCache) -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    header, payload, signature = token.split(".")
+    bad = ".".join([header, payload, ("A" if signature[0] != "A" else "B") + signature[1:]])
+
+    for _ in range(2):
+        with pytest.raises(TokenSignatureError):
+            verify_token_cached(bad, "access")
+    assert fresh_cache.stats()["size"] == 0
+
+
+# 夹带非 ASCII 字符的令牌不能与合法令牌共用缓存键，否则会命中缓存而跳过验签
+def test_cache_key_distinguishes_non_ascii_characters(fresh_cache: VerifiedClaimsCache) -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    verify_token_cached(token, "access")
+    tampered = token[:-1] + "\u00e9" + token[-1]
+
+    assert token_digest(tampered) != token_digest(token)
+    with pytest.raises(TokenInvalidError):
+        verify_token_cached(tampered, "access")
+    assert fresh_cache.stats()["hits"] == 0
+
+
+def test_cache_hit_still_checks_type(fresh_cache: VerifiedClaimsCache) -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    verify_token_cached(token, "access")
+    with pytest.raises(TokenTypeError):
+        verify_token_cached(token, "refresh")
+
+
+def test_cached_entry_expires_with_token(fresh_cache: VerifiedClaimsCache, monkeypatch) -> None:
+    token = create_access_token(uuid.uuid4(), "user")
+    claims = verify_token_cached(token, "access")
+
+    # 时间推进到 exp 之后：缓存条目失效，重新校验并抛出过期异常
+    after_exp = datetime.fromtimestamp(claims["exp"], UTC) + timedelta(seconds=1)
+    monkeypatch.setattr(jwt_mod, "_now", lambda: after_exp)
+    with pytest.raises(TokenExpiredError):
+        verify_token_cached(token, "access")
+    assert fresh_cache.stats()["expirations"] == 1
+
+
+def test_entry_ttl_capped_by_token_exp() -> None:
+    cache = VerifiedClaimsCache(max_entries=10, max_ttl_seconds=3600)
+    now_ts = int(datetime.now(UTC).timestamp())
+    key = token_digest("t")
+    cache.put(key, {"exp": now_ts + 5, "type": "access"}, now_ts)
+
+    assert cache.get(key, now_ts + 4) is not None
+    assert cache.get(key, now_ts + 5) is None
+
+
+def test_lru_eviction_counts() -> None:
+    cache = VerifiedClaimsCache(max_entries=2, max_ttl_seconds=60)
+    now_ts = int(datetime.now(UTC).timestamp())
+    keys = [token_digest(f"t{i}") for i in range(3)]
+    for key in keys:
+        cache.put(key, {"exp": now_ts + 60, "type": "access"}, now_ts)
+
+    assert cache.get(keys[0], now_ts) is None
+    assert cache.get(keys[2], now_ts) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_disabled_cache_falls_back_to_verify(monkeypatch) -> None:
+    cache = VerifiedClaimsCache(max_entries=0, max_ttl_seconds=300)
+    monkeypatch.setattr(jwt_mod, "claims_cache", cache)
+    token = create_access_token(uuid.uuid4(), "user")
+    assert verify_token_cached(token, "access")["type"] == "access"
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import uuid
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import services.token_version_service as token_version_module
+import services.user_cache_service as user_cache_module
+from core.auth_dependency import get_current_user
+from core.jwt_tokens import TokenMissingClaimError, create_access_token, verify_token
+from services.auth_service import AuthService
+from services.password_service import PasswordService
+from services.token_version_service import TokenVersionService, is_token_version_current
+from services.user_cache_service import UserCacheService
+from tests.helpers import FakeRedis, async_create_user, async_persist_refresh
+from utils.config import settings
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def token_versions(monkeypatch, fake_redis: FakeRedis) -> TokenVersionService:
+    service = TokenVersionService(redis=fake_redis)
+    monkeypatch.setattr(token_version_module, "_service", service)
+    monkeypatch.setattr(user_cache_module, "_service", UserCacheService(redis=fake_redis))
+    return service
+
+
+def test_tokens_carry_version_claim() -> None:
+    token = create_access_token(uuid.uuid4(), "user", 3)
+    assert verify_token(token, "access")["ver"] == 3
+
+
+def test_verify_rejects_non_integer_version() -> None:
+    claims = jwt.decode(
+        create_access_token(uuid.uuid4(), "user"), settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+    )
+    claims["ver"] = "2"
+    token = jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    with pytest.raises(TokenMissingClaimError):
+        verify_token(token, "access")
+
+
+def test_version_comparison_treats_missing_claim_as_initial() -> None:
+    assert is_token_version_current({}, None) is True
+    assert is_token_version_current({}, 1) is True
+    assert is_token_version_current({}, 2) is False
+    assert is_token_version_current({"ver": 2}, 2) is True
+
+
+@pytest.mark.asyncio
+async def test_resolve_backfills_map_from_db(async_db_session: AsyncSession, fake_redis: FakeRedis, token_versions):
+    user = await async_create_user(async_db_session, "ver1", "pw")
+
+    assert await token_versions.get(user.id) is None
+    assert await token_versions.resolve(async_db_session, user.id) == 1
+    assert await fake_redis.hget(TokenVersionService.HASH_KEY, str(user.id)) == "1"
+
+    # 其他 worker 直接从版本表读取
+    other = TokenVersionService(redis=fake_redis)
+    assert await other.get(user.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_existing_access_tokens(
+    async_db_session: AsyncSession, fake_redis: FakeRedis, token_versions
+):
+    user = await async_create_user(async_db_session, "ver2@example.com", "oldpass")
+    token = create_access_token(user.id, user.role, user.token_version)
+    current = await get_current_user(authorization=f"Bearer {token}", db=async_db_session)
+
+    result = await PasswordService().change_password(
+        db=async_db_session,
+        user=current,
+        old_password="oldpass",
+        new_password="newpass1",
+        confirm_password="newpass1",
+    )
+    assert result["code"] == 0
+    assert await fake_redis.hget(TokenVersionService.HASH_KEY, str(user.id)) == "2"
+
+    with pytest.raises(HTTPException) as ei:
+        await get_current_user(authorization=f"Bearer {token}", db=async_db_session)
+    assert ei.value.status_code == 401
+
+    # 新版本签发的令牌可正常使用
+    fresh = create_access_token(user.id, user.role, 2)
+    got = await get_current_user(authorization=f"Bearer {fresh}", db=async_db_session)
+    assert got.token_version == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_version_rejected_without_redis(async_db_session: AsyncSession, monkeypatch):
+    # 版本表不可用时，以用户快照（数据库）中的版本兜底
+    monkeypatch.setattr(token_version_module, "_service", TokenVersionService(redis=FakeRedis()))
+    monkeypatch.setattr(user_cache_module, "_service", UserCacheService(redis=FakeRedis(), local_ttl_seconds=0))
+    user = await async_create_user(async_db_session, "ver3", "pw")
+    user.token_version = 5
+    await async_db_session.commit()
+
+    token = create_access_token(user.id, user.role, 4)
+    with pytest.raises(HTTPException) as ei:
+        await get_current_user(authorization=f"Bearer {token}", db=async_db_session)
+    assert ei.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejected_after_version_bump(async_db_session: AsyncSession, token_versions):
+    user = await async_create_user(async_db_session, "ver4", "pw")
+    token, _ = await async_persist_refresh(async_db_session, user)
+
+    await token_versions.publish(user.id, 2)
+
+    result = await AuthService().refresh(db=async_db_session, refresh_token=token)
+    assert result["code"] == 40112
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event, func, select
+
+from models import UserAgent
+from services.user_agent_service import MAX_USER_AGENT_LENGTH, UserAgentService
+
+
+def _record_statements(session) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(session.bind.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_resolve_deduplicates_agents(async_db_session) -> None:
+    service = UserAgentService(cache_size=16)
+
+    first = await service.resolve(async_db_session, "Mozilla/5.0")
+    await async_db_session.commit()
+    second = await UserAgentService(cache_size=16).resolve(async_db_session, "Mozilla/5.0")
+    other = await service.resolve(async_db_session, "curl/8.0")
+    await async_db_session.commit()
+
+    assert first is not None
+    assert second == first
+    assert other not in (None, first)
+    count = (await async_db_session.execute(select(func.count()).select_from(UserAgent))).scalar_one()
+    assert count == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_agent_resolves_without_query(async_db_session) -> None:
+    service = UserAgentService(cache_size=16)
+    await service.resolve(async_db_session, "Mozilla/5.0")
+    await async_db_session.commit()
+    # 本事务新插入的 ID 不进缓存；下一次查询到已提交的记录后才缓存
+    agent_id = await service.resolve(async_db_session, "Mozilla/5.0")
+
+    statements = _record_statements(async_db_session)
+    assert await service.resolve(async_db_session, "Mozilla/5.0") == agent_id
+    assert statements == []
+    assert service.stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(async_db_session) -> None:
+    service = UserAgentService(cache_size=2)
+    for agent in ("a", "b", "c"):
+        await service.resolve(async_db_session, agent)
+    await async_db_session.commit()
+    for agent in ("a", "b", "c"):
+        await service.resolve(async_db_session, agent)
+
+    assert service.stats()["cache_size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_blank_agent_is_null_and_long_agent_truncated(async_db_session) -> None:
+    service = UserAgentService(cache_size=16)
+
+    assert await service.resolve(async_db_session, None) is None
+    assert await service.resolve(async_db_session, "   ") is None
+
+    agent_id = await service.resolve(async_db_session, "x" * 1000)
+    await async_db_session.commit()
+    agent = await async_db_session.get(UserAgent, agent_id)
+    assert agent is not None
+    assert agent.user_agent == "x" * MAX_USER_AGENT_LENGTH
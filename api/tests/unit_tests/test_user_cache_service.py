@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import services.user_cache_service as user_cache_module
+from core.auth_dependency import get_current_user
+from core.jwt_tokens import create_access_token
+from services.password_service import PasswordService
+from services.user_cache_service import UserCacheService, UserSnapshot
+from tests.helpers import FakeRedis, async_create_user
+
+
+class _BrokenRedis:
+    async def get(self, key: str):
+        raise ConnectionError("redis down")
+
+    async def mget(self, keys: list[str]):
+        raise ConnectionError("redis down")
+
+    async def incr(self, key: str):
+        raise ConnectionError("redis down")
+
+    async def setex(self, key: str, seconds: int, value: str):
+        raise ConnectionError("redis down")
+
+    async def delete(self, *keys: str):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def user_cache(monkeypatch, fake_redis: FakeRedis) -> UserCacheService:
+    service = UserCacheService(redis=fake_redis)
+    monkeypatch.setattr(user_cache_module, "_service", service)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_load_populates_both_tiers(async_db_session: AsyncSession, fake_redis: FakeRedis, user_cache):
+    user = await async_create_user(async_db_session, "snap1", "pw")
+
+    snapshot = await user_cache.load(async_db_session, user.id)
+    assert snapshot == UserSnapshot.from_user(user)
+    assert user_cache.db_loads == 1
+    assert fake_redis._ttl[user_cache._key(user.id)] == user_cache.redis_ttl_seconds
+
+    # L1 命中
+    assert await user_cache.load(async_db_session, user.id) == snapshot
+    assert user_cache.local_hits == 1
+
+    # 另一个 worker（新实例，共享 Redis）命中 L2，且不回源数据库
+    other = UserCacheService(redis=fake_redis)
+    assert await other.load(None, user.id) == snapshot  # type: ignore[arg-type]
+    assert other.redis_hits == 1
+    assert other.db_loads == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_clears_both_tiers(async_db_session: AsyncSession, fake_redis: FakeRedis, user_cache):
+    user = await async_create_user(async_db_session, "snap2", "pw")
+    await user_cache.load(async_db_session, user.id)
+
+    await user_cache.invalidate(user.id)
+
+    assert await user_cache.get(user.id) is None
+    assert await fake_redis.exists(user_cache._key(user.id)) == 0
+
+
+class _InvalidatedDuringRead:
+    """模拟回源读到旧行后、回填前，另一个请求完成了写入并调用 invalidate。"""
+
+    def __init__(self, user, cache: UserCacheService) -> None:
+        self.user = user
+        self.cache = cache
+
+    async def get(self, model, user_id):
+        await self.cache.invalidate(user_id)
+        return self.user
+
+
+@pytest.mark.asyncio
+async def test_concurrent_invalidate_discards_stale_fill(
+    async_db_session: AsyncSession, fake_redis: FakeRedis, user_cache
+):
+    user = await async_create_user(async_db_session, "snap-race", "pw")
+
+    stale = await user_cache.load(_InvalidatedDuringRead(user, user_cache), user.id)  # type: ignore[arg-type]
+    assert stale is not None
+
+    # 旧快照既不进入本进程 L1；写回 L2 的条目带着旧代数，其他 worker 读取时也视为未命中
+    assert user_cache._get_local(user.id) is None
+    assert await fake_redis.exists(user_cache._key(user.id)) == 1
+    assert await UserCacheService(redis=fake_redis).get(user.id) is None
+    assert user_cache.stats()["stale_fills_skipped"] == 1
+
+    # 之后的回源按当前代数回填，恢复正常缓存
+    await user_cache.load(async_db_session, user.id)
+    assert await UserCacheService(redis=fake_redis).get(user.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_degrades_to_db(async_db_session: AsyncSession):
+    user = await async_create_user(async_db_session, "snap3", "pw")
+    service = UserCacheService(redis=_BrokenRedis(), local_ttl_seconds=0)
+
+    snapshot = await service.load(async_db_session, user.id)
+    assert snapshot is not None
+    assert snapshot.username == "snap3"
+    assert service.stats()["redis_available"] is False
+
+
+@pytest.mark.asyncio
+async def test_warm_get_current_user_does_not_touch_db(async_db_session: AsyncSession, user_cache):
+    user = await async_create_user(async_db_session, "snap4", "pw")
+    token = create_access_token(user.id, user.role)
+
+    first = await get_current_user(authorization=f"Bearer {token}", db=async_db_session)
+    # 缓存已热：即便没有数据库会话也能完成鉴权
+    second = await get_current_user(authorization=f"Bearer {token}", db=None)
+
+    assert first == second
+    assert second.username == "snap4"
+    assert user_cache.db_loads == 1
+
+
+@pytest.mark.asyncio
+async def test_change_password_invalidates_snapshot(async_db_session: AsyncSession, fake_redis: FakeRedis, user_cache):
+    user = await async_create_user(async_db_session, "snap5@example.com", "oldpass")
+    snapshot = await user_cache.load(async_db_session, user.id)
+
+    result = await PasswordService().change_password(
+        db=async_db_session,
+        user=snapshot,
+        old_password="oldpass",
+        new_password="newpass1",
+        confirm_password="newpass1",
+    )
+
+    assert result["code"] == 0
+    assert await fake_redis.exists(user_cache._key(user.id)) == 0
+    assert user_cache._get_local(user.id) is None
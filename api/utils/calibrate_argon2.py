@@ -0,0 +1,127 @@
+# 使用方法: python -m utils.calibrate_argon2 [--target-ms 250] [--max-memory-mib 64] [--parallelism 1]
+#
+# 在部署机器上标定 Argon2 参数：在内存上限内优先使用尽量大的内存开销，再增加迭代次数，
+# 使单次校验耗时尽量接近但不超过目标值。输出可直接写入 .env 的 ARGON2_* 配置。
+# 修改配置后，已存储的旧参数哈希会在用户下次登录成功时自动按新参数重算。
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from dataclasses import dataclass
+
+from argon2 import PasswordHasher
+
+from utils.config import settings
+from utils.logging import get_logger, init_logging
+
+SAMPLE_PASSWORD = "calibration-Passw0rd!"
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+    verify_ms: float
+
+    def env_lines(self) -> list[str]:
+        return [
+            f"ARGON2_TIME_COST={self.time_cost}",
+            f"ARGON2_MEMORY_COST={self.memory_cost}",
+            f"ARGON2_PARALLELISM={self.parallelism}",
+        ]
+
+
+def measure_verify_ms(time_cost: int, memory_cost: int, parallelism: int, *, samples: int = 5) -> float:
+    """返回给定参数下单次 verify 的耗时中位数（毫秒）。"""
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    password_hash = hasher.hash(SAMPLE_PASSWORD)
+    timings: list[float] = []
+    for _ in range(max(1, samples)):
+        start = time.perf_counter()
+        hasher.verify(password_hash, SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    target_ms: float,
+    *,
+    max_memory_kib: int = 65536,
+    min_memory_kib: int = 8192,
+    parallelism: int = 1,
+    samples: int = 5,
+    max_time_cost: int = 20,
+) -> CalibrationResult:
+    """
+    选出单次 verify 不超过 target_ms 的最强参数：
+
+    1. time_cost=1，从内存上限开始，超时则内存减半（不低于下限）
+    2. 按单轮耗时线性估算可承受的 time_cost，实测超出目标则逐步回退
+
+    即使最弱参数也超过目标时，返回下限参数并如实给出实测耗时。
+    """
+    memory_cost = max(min_memory_kib, max_memory_kib)
+    single_pass_ms = measure_verify_ms(1, memory_cost, parallelism, samples=samples)
+    while single_pass_ms > target_ms and memory_cost // 2 >= min_memory_kib:
+        memory_cost //= 2
+        single_pass_ms = measure_verify_ms(1, memory_cost, parallelism, samples=samples)
+
+    time_cost = max(1, min(max_time_cost, int(target_ms // single_pass_ms) if single_pass_ms else max_time_cost))
+    verify_ms = (
+        single_pass_ms if time_cost == 1 else measure_verify_ms(time_cost, memory_cost, parallelism, samples=samples)
+    )
+    while verify_ms > target_ms and time_cost > 1:
+        time_cost -= 1
+        verify_ms = measure_verify_ms(time_cost, memory_cost, parallelism, samples=samples)
+
+    return CalibrationResult(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, verify_ms=round(verify_ms, 2)
+    )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Calibrate Argon2 parameters for this machine.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="目标单次校验耗时（毫秒）")
+    parser.add_argument("--max-memory-mib", type=int, default=64, help="单次哈希允许的最大内存（MiB）")
+    parser.add_argument("--min-memory-mib", type=int, default=8, help="单次哈希的最小内存（MiB）")
+    parser.add_argument("--parallelism", type=int, default=1, help="Argon2 并行度（进程池 worker 各占一核时建议 1）")
+    parser.add_argument("--samples", type=int, default=5, help="每组参数的测量次数（取中位数）")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    init_logging(os.getenv("LOG_LEVEL"))
+    logger = get_logger()
+    args = _parse_args(argv)
+
+    current_ms = measure_verify_ms(
+        settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM, samples=args.samples
+    )
+    result = calibrate(
+        args.target_ms,
+        max_memory_kib=args.max_memory_mib * 1024,
+        min_memory_kib=args.min_memory_mib * 1024,
+        parallelism=args.parallelism,
+        samples=args.samples,
+    )
+    logger.info(
+        "current params t=%s m=%s p=%s verify=%.2fms",
+        settings.ARGON2_TIME_COST,
+        settings.ARGON2_MEMORY_COST,
+        settings.ARGON2_PARALLELISM,
+        current_ms,
+    )
+
+    print(f"# calibrated for target {args.target_ms:.0f} ms: verify {result.verify_ms:.2f} ms")
+    print(f"# ~{1000 / max(result.verify_ms, 0.01):.1f} verifications/sec per core")
+    print(f"# peak hashing memory per worker process: {result.memory_cost // 1024} MiB")
+    for line in result.env_lines():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -49,9 +49,51 @@ class Settings:
 
     鉴权（JWT）
     - JWT_SECRET: 签名密钥（HS256）。默认 dev-secret-change-me（请在生产环境中覆盖）
-    - JWT_ALGORITHM: 签名算法。固定 HS256
+    - JWT_ALGORITHM: 未配置密钥文件时的签名算法（HS256/HS384/HS512）。默认 HS256
+    - JWT_KEYS_FILE: 密钥环 JSON 文件路径（支持 kid 轮换与 EdDSA/ES256），为空时仅使用 JWT_SECRET。默认空
+    - JWT_KEYS_RELOAD_SECONDS: 检查密钥文件变更的间隔秒数，0 表示不热加载。默认 30
     - ACCESS_TOKEN_EXPIRES_MINUTES: 访问令牌有效期（分钟）。默认 60
     - REFRESH_TOKEN_EXPIRES_MINUTES: 刷新令牌有效期（分钟）。默认 1440（1 天）
+    - REFRESH_REUSE_GRACE_SECONDS: 并发刷新宽限秒数，窗口内重复提交同一旧令牌返回同一轮换结果，0 表示关闭。默认 10
+    - ACCESS_CLAIMS_CACHE_MAX_ENTRIES: 已验证 access 令牌声明缓存的最大条目数，0 表示关闭。默认 10000
+    - ACCESS_CLAIMS_CACHE_TTL_SECONDS: 声明缓存条目的最长存活秒数（同时不晚于令牌 exp）。默认 300
+
+    用户快照缓存（鉴权依赖读取用户状态）
+    - USER_SNAPSHOT_LOCAL_TTL_SECONDS: 进程内 L1 存活秒数（跨 worker 失效的最大滞后）。默认 5
+    - USER_SNAPSHOT_LOCAL_MAX_ENTRIES: 进程内 L1 最大条目数。默认 10000
+    - USER_SNAPSHOT_REDIS_TTL_SECONDS: Redis L2 存活秒数。默认 300
+    - TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS: 令牌版本表的进程内近缓存秒数（跨 worker 撤销的最大滞后）。默认 2
+
+    access token 注销名单（登出后旧 access token 立即失效）
+    - ACCESS_DENYLIST_SYNC_SECONDS: 各 worker 从 Redis 同步注销名单的间隔秒数（跨 worker 生效的最大滞后）。默认 2
+    - ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE: 预估每分钟注销量，与 access 有效期共同决定布隆过滤器容量。默认 100
+    - ACCESS_DENYLIST_FALSE_POSITIVE_RATE: 布隆过滤器目标误判率（误判时多一次 Redis 确认）。默认 0.001
+
+    过期刷新令牌清理（分批删除 refresh_tokens 中过期超过保留期的记录）
+    - REFRESH_TOKEN_RETENTION_DAYS: 过期后保留天数（供审计）。默认 7
+    - REFRESH_TOKEN_PURGE_BATCH_SIZE: 每批删除的最大行数。默认 1000
+    - REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS: 批次之间的休眠秒数。默认 0.2
+    - REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: 应用内周期任务的间隔秒数，0 表示关闭（改由 CLI 定时运行）。默认 3600
+    - REFRESH_TOKEN_PARTITION_DAYS: 分区表（PostgreSQL）每个分区覆盖的天数，需与迁移建表时一致。默认 7
+    - REFRESH_TOKEN_PARTITION_PREMAKE: 预建的未来分区个数（应覆盖刷新令牌有效期）。默认 4
+    - REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS: 分区 DDL 等待父表锁的上限（毫秒），超时放弃、下一轮重试。默认 2000
+    - USER_AGENT_CACHE_MAX_ENTRIES: User-Agent 字典 ID 的进程内缓存条目数，0 表示关闭。默认 1024
+    - MAX_SESSIONS_PER_USER: 每个用户的最大并发会话（令牌家族）数，登录时撤销最旧的会话，0 表示不限制。默认 10
+
+    令牌内省（内网服务批量校验 access token）
+    - INTROSPECTION_SERVICE_TOKEN: 内省接口的服务凭据（X-Service-Token 头），为空表示关闭接口。默认空
+    - INTROSPECTION_MAX_BATCH: 单次请求最多校验的令牌数。默认 100
+
+    密码哈希（Argon2 计算移出事件循环）
+    - PASSWORD_HASH_EXECUTOR: 执行器类型（process/thread/inline）。默认 process
+    - PASSWORD_HASH_WORKERS: 执行器 worker 数，0 表示按 CPU 核数。默认 0
+    - PASSWORD_HASH_MAX_CONCURRENCY: 准入控制的并发上限，0 表示等于 worker 数。默认 0
+    - PASSWORD_HASH_MAX_QUEUE: 超出并发上限时最多排队的请求数，队列满时直接返回 503。默认 32
+    - PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: 排队等待的最长秒数，超时返回 503。默认 2
+    - ARGON2_TIME_COST: Argon2 迭代次数。默认 3
+    - ARGON2_MEMORY_COST: Argon2 内存开销（KiB）。默认 65536（64 MiB）
+    - ARGON2_PARALLELISM: Argon2 并行度（lanes）。默认 4
+      以上三项建议用 `python -m utils.calibrate_argon2` 按部署机器标定；修改后旧哈希在用户下次登录时自动升级
 
     文档访问（Swagger）
     - DOCS_USERNAME: 文档 Basic Auth 用户名。默认 fastapi-nextjs
@@ -76,9 +118,68 @@ class Settings:
         # JWT 配置
         self.JWT_SECRET: str = os.getenv("JWT_SECRET", "dev-secret-change-me")
         self.JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+        # 密钥环：按 kid 轮换签名密钥，支持非对称算法（见 core/jwt_keys.py）
+        self.JWT_KEYS_FILE: str = os.getenv("JWT_KEYS_FILE", "")
+        self.JWT_KEYS_RELOAD_SECONDS: int = int(os.getenv("JWT_KEYS_RELOAD_SECONDS", "30"))
         # 允许字符串或数字，统一转为 int
         self.ACCESS_TOKEN_EXPIRES_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRES_MINUTES", "60"))
         self.REFRESH_TOKEN_EXPIRES_MINUTES: int = int(os.getenv("REFRESH_TOKEN_EXPIRES_MINUTES", "1440"))
+        # 并发刷新宽限窗口：多标签页同时刷新时不误判为令牌复用
+        self.REFRESH_REUSE_GRACE_SECONDS: int = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "10"))
+        # 已验证声明缓存：避免同一 access token 每次请求都重复验签与解析
+        self.ACCESS_CLAIMS_CACHE_MAX_ENTRIES: int = int(os.getenv("ACCESS_CLAIMS_CACHE_MAX_ENTRIES", "10000"))
+        self.ACCESS_CLAIMS_CACHE_TTL_SECONDS: int = int(os.getenv("ACCESS_CLAIMS_CACHE_TTL_SECONDS", "300"))
+
+        # 用户快照缓存：L1 进程内短 TTL，L2 Redis 共享
+        self.USER_SNAPSHOT_LOCAL_TTL_SECONDS: int = int(os.getenv("USER_SNAPSHOT_LOCAL_TTL_SECONDS", "5"))
+        self.USER_SNAPSHOT_LOCAL_MAX_ENTRIES: int = int(os.getenv("USER_SNAPSHOT_LOCAL_MAX_ENTRIES", "10000"))
+        self.USER_SNAPSHOT_REDIS_TTL_SECONDS: int = int(os.getenv("USER_SNAPSHOT_REDIS_TTL_SECONDS", "300"))
+
+        # 令牌版本表近缓存（改密后“登出所有设备”的跨 worker 生效延迟上限）
+        self.TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS", "2"))
+
+        # access token 注销名单：进程内布隆过滤器 + Redis 确认
+        self.ACCESS_DENYLIST_SYNC_SECONDS: int = int(os.getenv("ACCESS_DENYLIST_SYNC_SECONDS", "2"))
+        self.ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE: int = int(
+            os.getenv("ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE", "100")
+        )
+        self.ACCESS_DENYLIST_FALSE_POSITIVE_RATE: float = float(
+            os.getenv("ACCESS_DENYLIST_FALSE_POSITIVE_RATE", "0.001")
+        )
+
+        # 过期刷新令牌清理：分批删除 + 批间休眠，避免锁与 WAL 尖峰
+        self.REFRESH_TOKEN_RETENTION_DAYS: int = int(os.getenv("REFRESH_TOKEN_RETENTION_DAYS", "7"))
+        self.REFRESH_TOKEN_PURGE_BATCH_SIZE: int = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", "1000"))
+        self.REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS: float = float(
+            os.getenv("REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS", "0.2")
+        )
+        self.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = int(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", "3600"))
+        # refresh_tokens 按 expires_at 分区（PostgreSQL）：分区粒度与预建个数
+        self.REFRESH_TOKEN_PARTITION_DAYS: int = int(os.getenv("REFRESH_TOKEN_PARTITION_DAYS", "7"))
+        self.REFRESH_TOKEN_PARTITION_PREMAKE: int = int(os.getenv("REFRESH_TOKEN_PARTITION_PREMAKE", "4"))
+        self.REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS: int = int(
+            os.getenv("REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS", "2000")
+        )
+        # User-Agent 字典：最近使用的 User-Agent -> ID 进程内缓存，命中时写令牌无需额外查询
+        self.USER_AGENT_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_AGENT_CACHE_MAX_ENTRIES", "1024"))
+        # 每个用户的并发会话上限：限制单个账号的活跃令牌家族数与表增长
+        self.MAX_SESSIONS_PER_USER: int = int(os.getenv("MAX_SESSIONS_PER_USER", "10"))
+
+        # 令牌内省：服务凭据为空时接口关闭
+        self.INTROSPECTION_SERVICE_TOKEN: str = os.getenv("INTROSPECTION_SERVICE_TOKEN", "")
+        self.INTROSPECTION_MAX_BATCH: int = int(os.getenv("INTROSPECTION_MAX_BATCH", "100"))
+
+        # 密码哈希执行器：Argon2 在独立进程池中计算，不阻塞事件循环
+        self.PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+        self.PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+        # 哈希准入控制：并发上限 + 有界等待队列，撞库洪峰时快速拒绝
+        self.PASSWORD_HASH_MAX_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", "0"))
+        self.PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+        self.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "2"))
+        # Argon2 参数（默认与 argon2-cffi 库默认值一致）
+        self.ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+        self.ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+        self.ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
 
         # Redis 配置（用于邮箱验证码等功能）
         self.REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -95,6 +196,8 @@ class Settings:
 
         # 验证码有效期与频控参数
         self.EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES: int = int(os.getenv("EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES", "5"))
+        # 验证码摘要（HMAC-SHA256）的服务端密钥；为空时由 JWT_SECRET 派生
+        self.EMAIL_VERIFICATION_CODE_SECRET: str = os.getenv("EMAIL_VERIFICATION_CODE_SECRET", "")
         # 频率限制参数：为避免配置项过多，采用代码内默认值，可视需要再抽到环境变量
         # EMAIL_VERIFICATION_RATE_LIMIT_PER_EMAIL:
         #   - 含义：单个邮箱在一个短时间窗口内（目前实现为 60 秒）允许请求发送验证码的最大次数
@@ -133,8 +236,39 @@ class Settings:
             "DB_DATABASE": self.DB_DATABASE,
             "JWT_SECRET": "***" if self.JWT_SECRET else "",
             "JWT_ALGORITHM": self.JWT_ALGORITHM,
+            "JWT_KEYS_FILE": self.JWT_KEYS_FILE,
+            "JWT_KEYS_RELOAD_SECONDS": self.JWT_KEYS_RELOAD_SECONDS,
             "ACCESS_TOKEN_EXPIRES_MINUTES": self.ACCESS_TOKEN_EXPIRES_MINUTES,
             "REFRESH_TOKEN_EXPIRES_MINUTES": self.REFRESH_TOKEN_EXPIRES_MINUTES,
+            "REFRESH_REUSE_GRACE_SECONDS": self.REFRESH_REUSE_GRACE_SECONDS,
+            "ACCESS_CLAIMS_CACHE_MAX_ENTRIES": self.ACCESS_CLAIMS_CACHE_MAX_ENTRIES,
+            "ACCESS_CLAIMS_CACHE_TTL_SECONDS": self.ACCESS_CLAIMS_CACHE_TTL_SECONDS,
+            "USER_SNAPSHOT_LOCAL_TTL_SECONDS": self.USER_SNAPSHOT_LOCAL_TTL_SECONDS,
+            "USER_SNAPSHOT_LOCAL_MAX_ENTRIES": self.USER_SNAPSHOT_LOCAL_MAX_ENTRIES,
+            "USER_SNAPSHOT_REDIS_TTL_SECONDS": self.USER_SNAPSHOT_REDIS_TTL_SECONDS,
+            "TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS": self.TOKEN_VERSION_NEAR_CACHE_TTL_SECONDS,
+            "ACCESS_DENYLIST_SYNC_SECONDS": self.ACCESS_DENYLIST_SYNC_SECONDS,
+            "ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE": self.ACCESS_DENYLIST_REVOCATIONS_PER_MINUTE,
+            "ACCESS_DENYLIST_FALSE_POSITIVE_RATE": self.ACCESS_DENYLIST_FALSE_POSITIVE_RATE,
+            "REFRESH_TOKEN_RETENTION_DAYS": self.REFRESH_TOKEN_RETENTION_DAYS,
+            "REFRESH_TOKEN_PURGE_BATCH_SIZE": self.REFRESH_TOKEN_PURGE_BATCH_SIZE,
+            "REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS": self.REFRESH_TOKEN_PURGE_BATCH_SLEEP_SECONDS,
+            "REFRESH_TOKEN_PURGE_INTERVAL_SECONDS": self.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS,
+            "REFRESH_TOKEN_PARTITION_DAYS": self.REFRESH_TOKEN_PARTITION_DAYS,
+            "REFRESH_TOKEN_PARTITION_PREMAKE": self.REFRESH_TOKEN_PARTITION_PREMAKE,
+            "REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS": self.REFRESH_TOKEN_PARTITION_LOCK_TIMEOUT_MS,
+            "USER_AGENT_CACHE_MAX_ENTRIES": self.USER_AGENT_CACHE_MAX_ENTRIES,
+            "MAX_SESSIONS_PER_USER": self.MAX_SESSIONS_PER_USER,
+            "INTROSPECTION_SERVICE_TOKEN": "***" if self.INTROSPECTION_SERVICE_TOKEN else "",
+            "INTROSPECTION_MAX_BATCH": self.INTROSPECTION_MAX_BATCH,
+            "PASSWORD_HASH_EXECUTOR": self.PASSWORD_HASH_EXECUTOR,
+            "PASSWORD_HASH_WORKERS": self.PASSWORD_HASH_WORKERS,
+            "PASSWORD_HASH_MAX_CONCURRENCY": self.PASSWORD_HASH_MAX_CONCURRENCY,
+            "PASSWORD_HASH_MAX_QUEUE": self.PASSWORD_HASH_MAX_QUEUE,
+            "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS": self.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+            "ARGON2_TIME_COST": self.ARGON2_TIME_COST,
+            "ARGON2_MEMORY_COST": self.ARGON2_MEMORY_COST,
+            "ARGON2_PARALLELISM": self.ARGON2_PARALLELISM,
             "REDIS_HOST": self.REDIS_HOST,
             "REDIS_PORT": self.REDIS_PORT,
             "REDIS_DB": self.REDIS_DB,
@@ -144,6 +278,7 @@ class Settings:
             "EMAIL_VERIFICATION_SMTP_USER": "***" if self.EMAIL_VERIFICATION_SMTP_USER else "",
             "EMAIL_VERIFICATION_SMTP_PASSWORD": "***" if self.EMAIL_VERIFICATION_SMTP_PASSWORD else "",
             "EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES": self.EMAIL_VERIFICATION_CODE_EXPIRE_MINUTES,
+            "EMAIL_VERIFICATION_CODE_SECRET": "***" if self.EMAIL_VERIFICATION_CODE_SECRET else "",
             "DOCS_USERNAME": self.DOCS_USERNAME,
             "DOCS_PASSWORD": "***" if self.DOCS_PASSWORD else "",
             "EMAIL_VERIFICATION_RATE_LIMIT_PER_EMAIL": self.EMAIL_VERIFICATION_RATE_LIMIT_PER_EMAIL,
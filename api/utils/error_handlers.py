@@ -3,6 +3,8 @@ import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
+from core.admission import AdmissionRejectedError
+
 logger = logging.getLogger()
 
 
@@ -15,5 +17,16 @@ async def global_exception_handler(request: Request, e: Exception):
     return JSONResponse(status_code=500, content=error_response(str(e)))
 
 
+async def admission_rejected_handler(request: Request, e: AdmissionRejectedError):
+    # 过载保护：快速拒绝并提示客户端稍后重试，不计为服务异常
+    logger.warning("Request rejected by admission control: %s", e)
+    return JSONResponse(
+        status_code=503,
+        content=error_response("服务繁忙，请稍后再试", 50301),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 def register_exception_handlers(app: FastAPI) -> None:
+    app.add_exception_handler(AdmissionRejectedError, admission_rejected_handler)
     app.add_exception_handler(Exception, global_exception_handler)
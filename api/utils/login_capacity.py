@@ -0,0 +1,245 @@
+# 使用方法: python -m utils.login_capacity [--concurrency 1,2,4,8,16] [--logins 64] [--hash-workers N]
+#           [--time-cost T --memory-cost KiB --parallelism P]
+#
+# 登录吞吐容量规划：
+# 1. 单核基准：同步 hash_password / verify_password 的单次耗时与每核每秒次数
+# 2. 完整登录链路：AuthService.login（内存 SQLite + 进程内 Redis 替身 + 实际的哈希执行器与准入控制），
+#    在多个并发度下测量吞吐与延迟分位数
+#
+# 报告中的 “logins/s per core” 以哈希执行器实际可用的核数折算；据此选择 bin/boot.sh 中的 WORKERS 与
+# PASSWORD_HASH_WORKERS / ARGON2_* 配置（每个 uvicorn worker 各自持有一个哈希进程池，
+# WORKERS × PASSWORD_HASH_WORKERS 不宜超过机器核数）。--time-cost 等参数可用于评估候选 Argon2 参数。
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import core.security as security_module
+from core import password_hashing
+from core.admission import AdmissionRejectedError
+from core.password_hashing import PasswordHashingEngine
+from core.security import hash_password, verify_password
+from models import User
+from models.base import Base
+from services.auth_service import AuthService
+from services.login_rate_limit_service import LoginRateLimitService
+from utils.config import settings
+from utils.logging import get_logger, init_logging
+
+BENCH_PASSWORD = "capacity-Passw0rd!"
+
+
+class _MemoryRedis:
+    """登录链路用到的最小 Redis 命令集（频率限制），仅供本脚本在无 Redis 环境下运行。"""
+
+    def __init__(self) -> None:
+        self._data: dict[str, Any] = {}
+
+    async def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if key in self._data)
+
+    async def get(self, key: str) -> Any:
+        return self._data.get(key)
+
+    async def incr(self, key: str) -> int:
+        self._data[key] = int(self._data.get(key) or 0) + 1
+        return self._data[key]
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        return key in self._data
+
+    async def setex(self, key: str, seconds: int, value: Any) -> bool:
+        self._data[key] = value
+        return True
+
+    async def ttl(self, key: str) -> int:
+        return -1 if key in self._data else -2
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+
+@dataclass(frozen=True)
+class LevelResult:
+    concurrency: int
+    logins: int
+    rejected: int
+    failed: int
+    elapsed_seconds: float
+    latencies_ms: list[float]
+
+    @property
+    def logins_per_second(self) -> float:
+        return self.logins / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _apply_argon2_overrides(args: argparse.Namespace) -> None:
+    """命令行指定的 Argon2 参数同时作用于本进程与哈希子进程（子进程从环境变量读取配置）。"""
+    overrides = {
+        "ARGON2_TIME_COST": args.time_cost,
+        "ARGON2_MEMORY_COST": args.memory_cost,
+        "ARGON2_PARALLELISM": args.parallelism,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[name] = str(value)
+            setattr(settings, name, value)
+    security_module._hasher = None
+
+
+def measure_primitives(samples: int) -> dict[str, float]:
+    """单线程测量同步哈希/校验的耗时中位数（毫秒）。"""
+    password_hash = hash_password(BENCH_PASSWORD)
+    hash_ms: list[float] = []
+    verify_ms: list[float] = []
+    for _ in range(max(1, samples)):
+        start = time.perf_counter()
+        hash_password(BENCH_PASSWORD)
+        hash_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        verify_password(BENCH_PASSWORD, password_hash)
+        verify_ms.append((time.perf_counter() - start) * 1000)
+    return {"hash_ms": statistics.median(hash_ms), "verify_ms": statistics.median(verify_ms)}
+
+
+async def _run_level(
+    session_factory: async_sessionmaker[AsyncSession], service: AuthService, concurrency: int, total: int
+) -> LevelResult:
+    remaining = total
+    latencies: list[float] = []
+    rejected = 0
+    failed = 0
+
+    async def client(index: int) -> None:
+        nonlocal remaining, rejected, failed
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                async with session_factory() as db:
+                    result = await service.login(db=db, username=f"capacity-{index}", password=BENCH_PASSWORD)
+            except AdmissionRejectedError:
+                rejected += 1
+                continue
+            if result.get("code") != 0:
+                failed += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return LevelResult(concurrency, len(latencies), rejected, failed, elapsed, latencies)
+
+
+async def run_login_benchmark(
+    levels: list[int], logins_per_level: int, engine: PasswordHashingEngine
+) -> list[LevelResult]:
+    db_engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with db_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    # 每个并发客户端使用独立账号，避免单账号失败计数互相影响
+    password_hash = hash_password(BENCH_PASSWORD)
+    async with session_factory() as db:
+        db.add_all(
+            User(username=f"capacity-{i}", password_hash=password_hash, role="user", is_active=True)
+            for i in range(max(levels))
+        )
+        await db.commit()
+
+    service = AuthService(rate_limit_service=LoginRateLimitService(redis=_MemoryRedis()))
+    try:
+        await engine.warm_up()
+        await _run_level(session_factory, service, 1, 2)  # 预热连接与代码路径
+        return [await _run_level(session_factory, service, level, logins_per_level) for level in levels]
+    finally:
+        await db_engine.dispose()
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark password hashing and the login path for capacity planning.")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="逗号分隔的并发度列表")
+    parser.add_argument("--logins", type=int, default=64, help="每个并发度下完成的登录次数")
+    parser.add_argument("--samples", type=int, default=5, help="单核基准的测量次数（取中位数）")
+    parser.add_argument("--executor", default=None, help="哈希执行器类型，默认取 PASSWORD_HASH_EXECUTOR")
+    parser.add_argument("--hash-workers", type=int, default=None, help="哈希执行器 worker 数，默认取配置")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="登录 p99 延迟目标（毫秒），用于给出可持续吞吐")
+    parser.add_argument("--time-cost", type=int, default=None, help="覆盖 ARGON2_TIME_COST")
+    parser.add_argument("--memory-cost", type=int, default=None, help="覆盖 ARGON2_MEMORY_COST（KiB）")
+    parser.add_argument("--parallelism", type=int, default=None, help="覆盖 ARGON2_PARALLELISM")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    init_logging(os.getenv("LOG_LEVEL"))
+    logger = get_logger()
+    args = _parse_args(argv)
+    _apply_argon2_overrides(args)
+    levels = sorted({int(value) for value in args.concurrency.split(",") if value.strip()})
+
+    primitives = measure_primitives(args.samples)
+    # 队列足够容纳最大并发度且不设实际期限：容量规划关心饱和吞吐，而非拒绝行为
+    engine = PasswordHashingEngine(
+        mode=args.executor,
+        max_workers=args.hash_workers,
+        max_queue=max(levels),
+        queue_timeout_seconds=3600,
+    )
+    password_hashing._engine = engine
+    try:
+        results = asyncio.run(run_login_benchmark(levels, args.logins, engine))
+    finally:
+        engine.shutdown()
+
+    cores = min(engine.max_workers, os.cpu_count() or 1) if engine.mode != "inline" else 1
+    logger.info("capacity run finished: executor=%s hash_workers=%s", engine.mode, engine.max_workers)
+
+    print(
+        f"# argon2 t={settings.ARGON2_TIME_COST} m={settings.ARGON2_MEMORY_COST} p={settings.ARGON2_PARALLELISM}; "
+        f"executor={engine.mode} hash_workers={engine.max_workers} hashing_cores={cores}"
+    )
+    print(
+        f"hash_password: {primitives['hash_ms']:.2f} ms  verify_password: {primitives['verify_ms']:.2f} ms  "
+        f"(~{1000 / max(primitives['verify_ms'], 0.001):.1f} verifications/s per core)"
+    )
+    print(
+        f"{'concurrency':>11} {'logins/s':>9} {'per core':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}"
+    )
+    for result in results:
+        print(
+            f"{result.concurrency:>11} {result.logins_per_second:>9.1f} {result.logins_per_second / cores:>9.1f} "
+            f"{result.percentile(0.50):>9.1f} {result.percentile(0.95):>9.1f} {result.percentile(0.99):>9.1f} "
+            f"{result.failed + result.rejected:>7}"
+        )
+
+    within_slo = [r for r in results if r.logins and r.percentile(0.99) <= args.slo_ms]
+    if within_slo:
+        best = max(within_slo, key=lambda r: r.logins_per_second)
+        print(
+            f"# sustainable within p99 <= {args.slo_ms:.0f} ms: {best.logins_per_second:.1f} logins/s "
+            f"at concurrency {best.concurrency} ({best.logins_per_second / cores:.1f} logins/s per core)"
+        )
+    else:
+        print(f"# no concurrency level met p99 <= {args.slo_ms:.0f} ms; consider cheaper ARGON2_* parameters")
+    print("# total hashing processes = WORKERS (bin/boot.sh) x PASSWORD_HASH_WORKERS; keep it <= CPU cores")
+
+
+if __name__ == "__main__":
+    main()
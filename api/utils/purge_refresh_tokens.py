@@ -0,0 +1,53 @@
+# 使用方法: python -m utils.purge_refresh_tokens [--retention-days 7] [--batch-size 1000] [--sleep 0.2]
+#           [--max-batches N] [--dry-run]
+#
+# 分批删除过期超过保留期的 refresh_tokens 记录（FOR UPDATE SKIP LOCKED，可与在线服务及应用内周期任务并行运行）。
+# refresh_tokens 已按 expires_at 分区时（PostgreSQL），改为预建未来分区并 DROP 整个过期分区。
+# 未指定的参数取 REFRESH_TOKEN_RETENTION_DAYS / REFRESH_TOKEN_PURGE_* 配置；--dry-run 只统计可删除行数。
+# 适合由 cron/Kubernetes CronJob 调度，此时可将 REFRESH_TOKEN_PURGE_INTERVAL_SECONDS 设为 0 关闭应用内任务。
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+
+from services.refresh_token_purge_service import RefreshTokenPurgeService
+from utils.db import AsyncSessionLocal, async_engine
+from utils.logging import get_logger, init_logging
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Delete expired refresh tokens in bounded batches.")
+    parser.add_argument("--retention-days", type=int, default=None, help="过期后保留天数，默认取配置")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批删除的最大行数，默认取配置")
+    parser.add_argument("--sleep", type=float, default=None, help="批次之间的休眠秒数，默认取配置")
+    parser.add_argument("--max-batches", type=int, default=None, help="本次最多执行的批次数，默认直到删完")
+    parser.add_argument("--dry-run", action="store_true", help="只统计可删除的行数，不删除")
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    service = RefreshTokenPurgeService(
+        retention_days=args.retention_days, batch_size=args.batch_size, batch_sleep_seconds=args.sleep
+    )
+    try:
+        if args.dry_run:
+            async with AsyncSessionLocal() as db:
+                return await service.count_expired(db, service.cutoff())
+        return await service.purge(AsyncSessionLocal, max_batches=args.max_batches)
+    finally:
+        await async_engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    init_logging(os.getenv("LOG_LEVEL"))
+    logger = get_logger()
+    args = _parse_args(argv)
+
+    count = asyncio.run(_run(args))
+    logger.info("refresh token purge finished: %s=%s", "eligible" if args.dry_run else "deleted", count)
+
+
+if __name__ == "__main__":
+    main()
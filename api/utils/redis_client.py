@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+
 from redis import asyncio as aioredis
 
 from utils.config import settings
@@ -28,3 +30,26 @@ def get_redis() -> aioredis.Redis:
             decode_responses=True,
         )
     return _redis_client
+
+
+class RedisBreaker:
+    """
+    热路径用的简易熔断器。
+
+    鉴权等每个请求都会经过的路径上，Redis 故障时若每次都尝试连接并打印异常栈，
+    既拖慢请求又刷屏日志。记录一次失败后在 cooldown 秒内直接跳过 Redis（调用方自行降级），
+    冷却结束后再放行一次探测。
+    """
+
+    def __init__(self, name: str, cooldown_seconds: float = 5.0) -> None:
+        self.name = name
+        self.cooldown_seconds = cooldown_seconds
+        self._open_until = 0.0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._open_until
+
+    def record_failure(self) -> None:
+        if self.available():
+            logger.warning("redis unavailable for %s, degrade for %.1fs", self.name, self.cooldown_seconds)
+        self._open_until = time.monotonic() + self.cooldown_seconds